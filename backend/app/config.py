@@ -36,6 +36,48 @@ class Settings(BaseSettings):
     rag_confidence_threshold: float = 0.75
     kb_relevance_threshold: float = 0.5
     query_reformulation_model: str = "gpt-4o-mini"
+    speculative_retrieval: bool = True         # search the raw query while reformulation runs
+    local_query_correction: bool = True        # SymSpell typo fix from KB vocabulary before the LLM
+    vocabulary_dir: str = "./knowledge_base/vocabulary"
+    metadata_index_dir: str = "./knowledge_base/metadata_index"  # source key -> chunk id maps
+    vectorstore_backend: str = "deeplake"      # "deeplake", or "numpy" for a local exact-search store
+    numpy_vector_dtype: str = "float32"        # "float16" halves the numpy backend's matrix size
+    ann_index_dir: str = "./knowledge_base/ann_index"
+    ann_min_chunks: int = 20_000               # search via the HNSW index above this many chunks; 0 disables
+    ann_ef_search: int = 64                    # HNSW search beam width (higher = better recall, slower)
+    lexical_index_dir: str = "./knowledge_base/lexical_index"
+    hybrid_retrieval: bool = False             # fuse BM25 and dense results (RRF) in similarity_search
+    user_settings_ttl: int = 60                # cache Deep Memory flag / chunk count per user (seconds)
+    answer_cache_max_entries: int = 200        # cached answers per user; 0 disables the semantic answer cache
+    answer_cache_similarity: float = 0.97      # min cosine similarity for a question to reuse a cached answer
+    answer_cache_ttl: int = 86400
+    vectorstore_pool_size: int = 32            # max opened DeepLake handles kept per process
+    vectorstore_pool_idle_seconds: int = 900   # evict handles unused for this long
+    embedding_cache_path: Optional[str] = "./knowledge_base/embedding_cache.db"  # empty disables
+    embedding_cache_max_entries: int = 500_000
+    shared_video_store_path: Optional[str] = "./knowledge_base/shared_videos.db"  # empty disables
+    embedding_max_tokens_per_request: int = 250_000  # provider cap is 300k tokens/request
+    embedding_max_inputs_per_request: int = 2048
+    embedding_concurrency: int = 4             # concurrent embedding requests per add
+    embedding_tokens_per_minute: int = 1_000_000  # shared TPM budget; 0 disables
+    query_embedding_cache_size: int = 2048     # 0 disables the in-process query cache
+    query_embedding_cache_ttl: int = 3600
+    browser_pool_max_browsers: int = 2         # shared Chromium instances for scraping
+    browser_pool_max_contexts: int = 6         # concurrent scrape pages across all browsers
+    browser_pool_recycle_pages: int = 200      # relaunch a browser after this many pages
+    scrape_http_first: bool = True             # try a plain HTTP fetch before launching a browser
+    scrape_http_timeout: float = 15.0
+    scrape_strategy_ttl: int = 21600           # how long a per-domain http/browser choice is kept
+    scrape_block_resources: bool = True        # abort images, media, fonts and trackers in the browser
+    scrape_block_allow_domains: List[str] = [] # sites that break when those are blocked
+    transcription_max_concurrency: int = 4     # ceiling for parallel transcriptions per host
+    transcription_max_rate: float = 1.0        # ceiling for transcription request starts/sec per host
+    ingest_batch_tokens: int = 50_000          # commit a micro-batch once this many tokens are buffered
+    ingest_batch_seconds: float = 15.0         # ...or once the oldest buffered document is this old
+    http_max_connections: int = 100           # pooled connections shared by OpenAI and Serper clients
+    http_max_keepalive_connections: int = 20
+    http_keepalive_seconds: float = 60.0
+    supabase_max_workers: int = 16            # threads running blocking Supabase calls for async code
     proxy_user: Optional[str] = None
     proxy_pass: Optional[str] = None
     log_level: str = "INFO"
@@ -7,6 +7,7 @@ from fastapi import Depends, HTTPException, Request
 from supabase import create_client, Client
 
 from app.config import Settings
+from app.services import db
 from app.services.api_key_service import APIKeyService
 from app.services.job_manager import JobManager
 from app.services.rate_limiter import RateLimiter
@@ -133,7 +134,7 @@ async def verify_api_key(
     api_key = auth_header.removeprefix("Bearer ").strip()
 
     service = APIKeyService(supabase)
-    verified = service.verify(api_key)
+    verified = await db.run(service.verify, api_key)
 
     if not verified:
         raise HTTPException(status_code=401, detail="Invalid or expired API key")
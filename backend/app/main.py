@@ -1,4 +1,5 @@
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -9,11 +10,27 @@ logging.basicConfig(level=getattr(logging, settings.log_level.upper(), logging.I
 
 from app.config import Settings
 from app.routers import api_keys, articles, chat, deep_memory, documentation, events, knowledge, public_query, user_cleanup, youtube
+from app.services import db
+from app.services.ann_index import flush_ann_indexes
+from app.services.article_scraper import close_http_client
+from app.services.browser_pool import close_browser_pool
+from app.services.clients import close_clients, get_clients
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    get_clients()
+    yield
+    await close_clients()
+    await close_http_client()
+    await close_browser_pool()
+    db.shutdown()
+    flush_ann_indexes()
 
 
 def create_app() -> FastAPI:
     settings = Settings()
-    app = FastAPI(title="AlphaBase Knowledge Base", version="0.1.0")
+    app = FastAPI(title="AlphaBase Knowledge Base", version="0.1.0", lifespan=lifespan)
 
     app.add_middleware(
         CORSMiddleware,
@@ -81,6 +81,10 @@ class DocScrapeJob:
     failed_pages: list[str] = field(default_factory=list)
     succeeded_pages: list[str] = field(default_factory=list)
     message: str = ""
+    blocked_requests: int = 0
+    blocked_by_kind: dict[str, int] = field(default_factory=dict)
+    # Typical transfer size per blocked kind (see resource_blocker), not measured
+    estimated_bytes_saved: int = 0
 
     @property
     def progress(self) -> int:
@@ -98,6 +102,9 @@ class DocScrapeJob:
             "failed_pages": self.failed_pages,
             "succeeded_pages": self.succeeded_pages,
             "message": self.message,
+            "blocked_requests": self.blocked_requests,
+            "blocked_by_kind": self.blocked_by_kind,
+            "estimated_bytes_saved": self.estimated_bytes_saved,
         }
 
     def to_json(self) -> str:
@@ -8,6 +8,7 @@ from app.models.api_keys import (
     APIKeyItem,
     APIKeyListResponse,
 )
+from app.services import db
 from app.services.api_key_service import APIKeyService
 
 router = APIRouter(prefix="/v1/api/keys", tags=["api-keys"])
@@ -21,7 +22,8 @@ async def create_api_key(
 ):
     """Create a new API key. The full key is returned ONCE — store it securely."""
     service = APIKeyService(supabase)
-    full_key, key_prefix, key_id = service.create(
+    full_key, key_prefix, key_id = await db.run(
+        service.create,
         user_id=user_id,
         name=request.name,
     )
@@ -41,7 +43,7 @@ async def list_api_keys(
 ):
     """List all API keys for a user."""
     service = APIKeyService(supabase)
-    keys = service.list_keys(user_id)
+    keys = await db.run(service.list_keys, user_id)
 
     return APIKeyListResponse(
         keys=[
@@ -66,4 +68,4 @@ async def revoke_api_key(
 ):
     """Revoke (deactivate) an API key."""
     service = APIKeyService(supabase)
-    service.revoke(user_id, key_id)
+    await db.run(service.revoke, user_id, key_id)
@@ -8,10 +8,12 @@ from app.config import Settings
 from app.dependencies import get_current_user, get_job_manager, get_settings, get_supabase
 from app.models.articles import ArticleDeleteResponse, ArticleJob, ArticleScrapeRequest, ArticleScrapeResponse
 from app.models.knowledge import JobStatus
+from app.services import db
 from app.services.article_scraper import scrape_article
 from app.models.errors import AuthenticationError
 from app.services.cookie_service import clear_cookie_failure, get_cookies_for_domain, mark_cookie_failed
 from app.services.job_manager import JobManager
+from app.services.resource_blocker import BlockStats
 from app.services.chunk_count import update_cached_chunk_count
 from app.services.url_validator import validate_url
 from app.services.vectorstore import get_user_vectorstore
@@ -37,12 +39,11 @@ async def scrape_article_endpoint(
         raise HTTPException(status_code=400, detail=str(e))
 
     # Check for duplicate URL
-    existing = (
+    existing = await db.execute(
         supabase.table("articles")
         .select("id")
         .eq("url", request.url)
         .eq("user_id", user_id)
-        .execute()
     )
     if existing.data:
         raise HTTPException(
@@ -50,7 +51,7 @@ async def scrape_article_endpoint(
         )
 
     # Create article record with pending status
-    article_result = (
+    article_result = await db.execute(
         supabase.table("articles")
         .insert(
             {
@@ -59,7 +60,6 @@ async def scrape_article_endpoint(
                 "status": "pending",
             }
         )
-        .execute()
     )
     article_id = article_result.data[0]["id"]
 
@@ -97,12 +97,11 @@ async def delete_article(
 ):
     """Delete an article and its vector store chunks."""
     # Verify article exists and belongs to user
-    article = (
+    article = await db.execute(
         supabase.table("articles")
         .select("id")
         .eq("id", article_id)
         .eq("user_id", user_id)
-        .execute()
     )
     if not article.data:
         raise HTTPException(status_code=404, detail="Article not found")
@@ -114,15 +113,15 @@ async def delete_article(
         deleted_count = vs.delete_by_article_ids([article_id])
         vectors_deleted = deleted_count > 0
         if deleted_count > 0:
-            update_cached_chunk_count(supabase, user_id, -deleted_count)
+            await db.run(update_cached_chunk_count, supabase, user_id, -deleted_count)
         logger.info("Deleted %d vector chunks for article %s", deleted_count, article_id)
     except Exception as e:
         logger.warning("Failed to delete vectors for article %s: %s", article_id, e)
 
     # Delete article record from Supabase
-    supabase.table("articles").delete().eq(
-        "id", article_id
-    ).eq("user_id", user_id).execute()
+    await db.execute(
+        supabase.table("articles").delete().eq("id", article_id).eq("user_id", user_id)
+    )
 
     return ArticleDeleteResponse(
         message="Article deleted",
@@ -148,9 +147,9 @@ async def process_article_scrape(
         article_job.message = "Scraping article..."
         job_manager._notify(job_id, article_job)
 
-        supabase.table("articles").update({"status": "scraping"}).eq(
-            "id", article_id
-        ).execute()
+        await db.execute(
+            supabase.table("articles").update({"status": "scraping"}).eq("id", article_id)
+        )
 
         # Fetch cookies if requested
         cookie_result = None
@@ -158,19 +157,28 @@ async def process_article_scrape(
             cookie_result = await get_cookies_for_domain(user_id, url, supabase)
 
         # Scrape the article
+        block_stats = BlockStats()
         result = await scrape_article(
-            url, cookies_json=cookie_result.cookies_json if cookie_result else None
+            url,
+            cookies_json=cookie_result.cookies_json if cookie_result else None,
+            block_stats=block_stats,
         )
+        if block_stats.blocked_requests:
+            logger.info(
+                "Article %s: blocked %d requests (estimated ~%d KB not downloaded)",
+                article_id, block_stats.blocked_requests,
+                block_stats.estimated_bytes_saved // 1024,
+            )
 
         # Update article record with content
-        supabase.table("articles").update(
+        await db.execute(supabase.table("articles").update(
             {
                 "title": result["title"],
                 "content_markdown": result["content_markdown"],
                 "is_truncated": result["is_truncated"],
                 "status": "completed",
             }
-        ).eq("id", article_id).execute()
+        ).eq("id", article_id))
 
         # Index article content in vector store
         try:
@@ -183,7 +191,7 @@ async def process_article_scrape(
                     url=url,
                 )
                 if chunks_added > 0:
-                    update_cached_chunk_count(supabase, user_id, chunks_added)
+                    await db.run(update_cached_chunk_count, supabase, user_id, chunks_added)
                 logger.info(
                     "Indexed article %s (%d chunks) for user %s",
                     article_id, chunks_added, user_id,
@@ -193,7 +201,7 @@ async def process_article_scrape(
 
         # Clear cookie failure on successful use
         if cookie_result:
-            clear_cookie_failure(cookie_result.cookie_id, supabase)
+            await db.run(clear_cookie_failure, cookie_result.cookie_id, supabase)
 
         # Update job status
         article_job.status = JobStatus.COMPLETED
@@ -205,16 +213,16 @@ async def process_article_scrape(
 
         # Mark cookie as failed
         if cookie_result:
-            mark_cookie_failed(cookie_result.cookie_id, str(e)[:200], supabase)
+            await db.run(mark_cookie_failed, cookie_result.cookie_id, str(e)[:200], supabase)
 
         # Update article to failed status
         error_msg = str(e)[:500]
-        supabase.table("articles").update(
+        await db.execute(supabase.table("articles").update(
             {
                 "status": "failed",
                 "error_message": error_msg,
             }
-        ).eq("id", article_id).execute()
+        ).eq("id", article_id))
 
         # Update job status
         article_job = job_manager._jobs.get(job_id)
@@ -228,12 +236,12 @@ async def process_article_scrape(
 
         # Update article to failed status
         error_msg = str(e)[:500]
-        supabase.table("articles").update(
+        await db.execute(supabase.table("articles").update(
             {
                 "status": "failed",
                 "error_message": error_msg,
             }
-        ).eq("id", article_id).execute()
+        ).eq("id", article_id))
 
         # Update job status
         article_job = job_manager._jobs.get(job_id)
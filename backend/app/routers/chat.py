@@ -8,6 +8,7 @@ from supabase import Client
 from app.config import Settings
 from app.dependencies import get_current_user, get_settings, get_supabase, get_web_search_limiter
 from app.models.chat import ChatRequest
+from app.services import db
 from app.services.chat import AgentChatService
 from app.services.web_search_limiter import WebSearchLimiter
 
@@ -33,9 +34,9 @@ async def chat(
     web_search_limiter: WebSearchLimiter = Depends(get_web_search_limiter),
 ):
     # Resolve user_id from chat ownership — never trust the client
-    chat_result = supabase.table("projects").select("user_id").eq(
-        "id", request.chat_id
-    ).single().execute()
+    chat_result = await db.execute(
+        supabase.table("projects").select("user_id").eq("id", request.chat_id).single()
+    )
     if not chat_result.data:
         raise HTTPException(status_code=404, detail="Chat not found")
     user_id = chat_result.data["user_id"]
@@ -74,18 +75,18 @@ async def chat(
 
         # Store messages in Supabase
         try:
-            supabase.table("chat_messages").insert({
+            await db.execute(supabase.table("chat_messages").insert({
                 "project_id": request.chat_id,
                 "role": "user",
                 "content": request.message,
-            }).execute()
+            }))
 
-            supabase.table("chat_messages").insert({
+            await db.execute(supabase.table("chat_messages").insert({
                 "project_id": request.chat_id,
                 "role": "assistant",
                 "content": full_response,
                 "sources": json.dumps(sources),
-            }).execute()
+            }))
         except Exception as e:
             logger.error("Failed to store chat messages: %s", e)
 
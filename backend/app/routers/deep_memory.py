@@ -21,9 +21,11 @@ from app.models.deep_memory import (
     TrainingRunSummary,
     UpdateSettingsRequest,
 )
+from app.services import db
 from app.services.job_manager import JobManager
 from app.services.deep_memory_service import train_deep_memory
 from app.services.training_generator import generate_training_data
+from app.services.user_settings import get_user_settings_cache
 from app.services.vectorstore import get_user_vectorstore
 
 # is_cloud is derived from config — no need to instantiate DeepLake at request time
@@ -41,11 +43,11 @@ async def start_generation(
 ):
     """Start training data generation from existing transcript chunks."""
     # Block if any non-completed run exists
-    blocking_result = supabase.table("deep_memory_training_runs").select(
+    blocking_result = await db.execute(supabase.table("deep_memory_training_runs").select(
         "id, status"
     ).eq("user_id", user_id).neq(
         "status", "completed"
-    ).limit(1).execute()
+    ).limit(1))
 
     if blocking_result.data:
         blocking_run = blocking_result.data[0]
@@ -59,18 +61,17 @@ async def start_generation(
         )
 
     vectorstore = get_user_vectorstore(user_id, settings)
-    chunks = await asyncio.to_thread(vectorstore.get_all_chunk_ids_and_texts)
-    total_chunks = len(chunks)
+    total_chunks = await asyncio.to_thread(vectorstore.get_chunk_count)
 
     if total_chunks == 0:
         raise HTTPException(status_code=400, detail="No chunks in your knowledge base")
 
     # Create training run record
-    run_result = supabase.table("deep_memory_training_runs").insert({
+    run_result = await db.execute(supabase.table("deep_memory_training_runs").insert({
         "user_id": user_id,
         "status": "generating",
         "total_chunks": total_chunks,
-    }).execute()
+    }))
 
     training_run_id = run_result.data[0]["id"]
 
@@ -105,9 +106,9 @@ async def start_training(
 ):
     """Start Deep Memory training with approved training data."""
     # Verify run exists and belongs to user
-    run_result = supabase.table("deep_memory_training_runs").select("*").eq(
+    run_result = await db.execute(supabase.table("deep_memory_training_runs").select("*").eq(
         "id", request.training_run_id
-    ).eq("user_id", user_id).execute()
+    ).eq("user_id", user_id))
 
     if not run_result.data:
         raise HTTPException(status_code=404, detail="Training run not found")
@@ -148,9 +149,9 @@ async def proceed_failed_run(
     supabase: Client = Depends(get_supabase),
 ):
     """Resume a failed generation or training run from the point of failure."""
-    run_result = supabase.table("deep_memory_training_runs").select("*").eq(
+    run_result = await db.execute(supabase.table("deep_memory_training_runs").select("*").eq(
         "id", request.training_run_id
-    ).eq("user_id", user_id).execute()
+    ).eq("user_id", user_id))
 
     if not run_result.data:
         raise HTTPException(status_code=404, detail="Training run not found")
@@ -166,10 +167,10 @@ async def proceed_failed_run(
 
     # Clear error and reset status
     new_status = "generating" if original_status == "generating_failed" else "training"
-    supabase.table("deep_memory_training_runs").update({
+    await db.execute(supabase.table("deep_memory_training_runs").update({
         "status": new_status,
         "error_message": None,
-    }).eq("id", request.training_run_id).execute()
+    }).eq("id", request.training_run_id))
 
     job = job_manager.create_job(total_videos=0)
 
@@ -207,9 +208,9 @@ async def list_training_runs(
     supabase: Client = Depends(get_supabase),
 ):
     """List training runs for the user."""
-    result = supabase.table("deep_memory_training_runs").select("*").eq(
+    result = await db.execute(supabase.table("deep_memory_training_runs").select("*").eq(
         "user_id", user_id
-    ).order("created_at", desc=True).execute()
+    ).order("created_at", desc=True))
 
     runs = [
         TrainingRunSummary(
@@ -236,9 +237,9 @@ async def get_training_run(
     supabase: Client = Depends(get_supabase),
 ):
     """Get details for a specific training run including sample pairs."""
-    run_result = supabase.table("deep_memory_training_runs").select("*").eq(
+    run_result = await db.execute(supabase.table("deep_memory_training_runs").select("*").eq(
         "id", run_id
-    ).eq("user_id", user_id).execute()
+    ).eq("user_id", user_id))
 
     if not run_result.data:
         raise HTTPException(status_code=404, detail="Training run not found")
@@ -246,9 +247,9 @@ async def get_training_run(
     r = run_result.data[0]
 
     # Fetch sample pairs
-    pairs_result = supabase.table("deep_memory_training_pairs").select(
+    pairs_result = await db.execute(supabase.table("deep_memory_training_pairs").select(
         "question_text, chunk_preview, relevance_score"
-    ).eq("training_run_id", run_id).limit(10).execute()
+    ).eq("training_run_id", run_id).limit(10))
 
     sample_pairs = [
         SamplePair(
@@ -292,9 +293,9 @@ async def delete_training_run(
     supabase: Client = Depends(get_supabase),
 ):
     """Delete a failed training run and its associated training pairs."""
-    run_result = supabase.table("deep_memory_training_runs").select("*").eq(
+    run_result = await db.execute(supabase.table("deep_memory_training_runs").select("*").eq(
         "id", run_id
-    ).eq("user_id", user_id).execute()
+    ).eq("user_id", user_id))
 
     if not run_result.data:
         raise HTTPException(status_code=404, detail="Training run not found")
@@ -307,15 +308,15 @@ async def delete_training_run(
         )
 
     # Count pairs before deletion (CASCADE will remove them)
-    pairs_result = supabase.table("deep_memory_training_pairs").select(
+    pairs_result = await db.execute(supabase.table("deep_memory_training_pairs").select(
         "id", count="exact"
-    ).eq("training_run_id", run_id).execute()
+    ).eq("training_run_id", run_id))
     pair_count = pairs_result.count or 0
 
     # Delete the run (CASCADE removes pairs)
-    supabase.table("deep_memory_training_runs").delete().eq(
-        "id", run_id
-    ).eq("user_id", user_id).execute()
+    await db.execute(
+        supabase.table("deep_memory_training_runs").delete().eq("id", run_id).eq("user_id", user_id)
+    )
 
     return {
         "message": f"Deleted training run and {pair_count} associated pairs",
@@ -330,25 +331,25 @@ async def get_settings_endpoint(
     supabase: Client = Depends(get_supabase),
 ):
     """Get Deep Memory settings for the user."""
-    settings_result = supabase.table("deep_memory_settings").select("*").eq(
-        "user_id", user_id
-    ).execute()
+    settings_result = await db.execute(
+        supabase.table("deep_memory_settings").select("*").eq("user_id", user_id)
+    )
 
     # Check for any non-completed runs that block new generation
-    blocking_result = supabase.table("deep_memory_training_runs").select(
+    blocking_result = await db.execute(supabase.table("deep_memory_training_runs").select(
         "id, status"
     ).eq("user_id", user_id).neq(
         "status", "completed"
-    ).limit(1).execute()
+    ).limit(1))
 
     has_blocking_run = bool(blocking_result.data)
     blocking_run_id = blocking_result.data[0]["id"] if blocking_result.data else None
     blocking_run_status = blocking_result.data[0]["status"] if blocking_result.data else None
 
     # Check if any completed training run exists
-    completed_result = supabase.table("deep_memory_training_runs").select(
+    completed_result = await db.execute(supabase.table("deep_memory_training_runs").select(
         "id", count="exact"
-    ).eq("user_id", user_id).eq("status", "completed").execute()
+    ).eq("user_id", user_id).eq("status", "completed"))
     can_enable = (completed_result.count or 0) > 0
 
     # Read cached total_chunks from DB; derive is_cloud from config
@@ -363,15 +364,15 @@ async def get_settings_endpoint(
         s = settings_result.data[0]
         last_run_id = s.get("last_training_run_id")
         if last_run_id:
-            pairs_result = supabase.rpc(
+            pairs_result = await db.execute(supabase.rpc(
                 "get_unique_chunk_count",
                 {"run_id": last_run_id},
-            ).execute()
+            ))
             # Fallback: count distinct chunk_ids from pairs
             if not pairs_result.data:
-                chunk_result = supabase.table("deep_memory_training_pairs").select(
+                chunk_result = await db.execute(supabase.table("deep_memory_training_pairs").select(
                     "chunk_id"
-                ).eq("training_run_id", last_run_id).execute()
+                ).eq("training_run_id", last_run_id))
                 trained_chunk_count = len({r["chunk_id"] for r in (chunk_result.data or [])})
             else:
                 trained_chunk_count = pairs_result.data[0].get("count", 0) if pairs_result.data else 0
@@ -412,9 +413,9 @@ async def update_settings_endpoint(
     """Toggle Deep Memory on/off."""
     if request.enabled:
         # Validate at least one completed training run exists
-        completed_result = supabase.table("deep_memory_training_runs").select(
+        completed_result = await db.execute(supabase.table("deep_memory_training_runs").select(
             "id", count="exact"
-        ).eq("user_id", user_id).eq("status", "completed").execute()
+        ).eq("user_id", user_id).eq("status", "completed"))
 
         if (completed_result.count or 0) == 0:
             raise HTTPException(
@@ -423,11 +424,12 @@ async def update_settings_endpoint(
             )
 
     # Upsert settings
-    supabase.table("deep_memory_settings").upsert({
+    await db.execute(supabase.table("deep_memory_settings").upsert({
         "user_id": user_id,
         "enabled": request.enabled,
         "updated_at": datetime.now(timezone.utc).isoformat(),
-    }, on_conflict="user_id").execute()
+    }, on_conflict="user_id"))
+    get_user_settings_cache().invalidate(user_id)
 
     return {
         "enabled": request.enabled,
@@ -19,6 +19,7 @@ from app.models.documentation import (
     DiscoveredPage,
 )
 from app.models.knowledge import JobStatus
+from app.services import db
 from app.services.cookie_service import get_cookies_for_domain
 from app.services.chunk_count import update_cached_chunk_count
 from app.services.doc_crawler import discover_pages
@@ -92,14 +93,14 @@ async def scrape_documentation(
         raise HTTPException(status_code=400, detail="No pages to scrape")
 
     # Create collection record
-    collection_result = supabase.table("doc_collections").insert({
+    collection_result = await db.execute(supabase.table("doc_collections").insert({
         "user_id": request.user_id,
         "entry_url": request.entry_url,
         "site_name": request.site_name,
         "scope_path": request.scope_path,
         "total_pages": len(request.pages),
         "status": "scraping",
-    }).execute()
+    }))
     collection_id = collection_result.data[0]["id"]
 
     # Create page records
@@ -114,7 +115,7 @@ async def scrape_documentation(
             "display_order": i,
         })
 
-    pages_result = supabase.table("doc_pages").insert(page_records).execute()
+    pages_result = await db.execute(supabase.table("doc_pages").insert(page_records))
 
     # Build page list with IDs for the background task
     pages_with_ids = [
@@ -162,9 +163,9 @@ async def retry_failed_pages(
         raise HTTPException(status_code=401, detail="Missing user_id")
 
     # Verify collection exists and belongs to user
-    collection = supabase.table("doc_collections").select("*").eq(
-        "id", collection_id
-    ).eq("user_id", user_id).execute()
+    collection = await db.execute(
+        supabase.table("doc_collections").select("*").eq("id", collection_id).eq("user_id", user_id)
+    )
 
     if not collection.data:
         raise HTTPException(status_code=404, detail="Collection not found")
@@ -173,24 +174,25 @@ async def retry_failed_pages(
         raise HTTPException(status_code=400, detail="No failed pages to retry")
 
     # Get failed pages
-    failed_pages = supabase.table("doc_pages").select("id, page_url, title").eq(
-        "collection_id", collection_id
-    ).eq("status", "failed").execute()
+    failed_pages = await db.execute(
+        supabase.table("doc_pages").select("id, page_url, title")
+        .eq("collection_id", collection_id).eq("status", "failed")
+    )
 
     if not failed_pages.data:
         raise HTTPException(status_code=400, detail="No failed pages to retry")
 
     # Reset failed pages to pending
     for page in failed_pages.data:
-        supabase.table("doc_pages").update({
+        await db.execute(supabase.table("doc_pages").update({
             "status": "pending",
             "error_message": None,
-        }).eq("id", page["id"]).execute()
+        }).eq("id", page["id"]))
 
     # Update collection status
-    supabase.table("doc_collections").update(
-        {"status": "scraping"}
-    ).eq("id", collection_id).execute()
+    await db.execute(
+        supabase.table("doc_collections").update({"status": "scraping"}).eq("id", collection_id)
+    )
 
     # Build page list for background task
     pages_with_ids = [
@@ -236,17 +238,17 @@ async def delete_collection(
         raise HTTPException(status_code=401, detail="Missing user_id")
 
     # Verify collection exists and belongs to user
-    collection = supabase.table("doc_collections").select("*").eq(
-        "id", collection_id
-    ).eq("user_id", user_id).execute()
+    collection = await db.execute(
+        supabase.table("doc_collections").select("*").eq("id", collection_id).eq("user_id", user_id)
+    )
 
     if not collection.data:
         raise HTTPException(status_code=404, detail="Collection not found")
 
     # Count pages before deletion
-    pages_count = supabase.table("doc_pages").select(
-        "id", count="exact"
-    ).eq("collection_id", collection_id).execute()
+    pages_count = await db.execute(
+        supabase.table("doc_pages").select("id", count="exact").eq("collection_id", collection_id)
+    )
     pages_deleted = pages_count.count or 0
 
     # Delete from vector store
@@ -256,15 +258,15 @@ async def delete_collection(
         deleted_count = vs.delete_by_collection_id(collection_id)
         vectors_deleted = deleted_count > 0
         if deleted_count > 0:
-            update_cached_chunk_count(supabase, user_id, -deleted_count)
+            await db.run(update_cached_chunk_count, supabase, user_id, -deleted_count)
         logger.info("Deleted %d vector chunks for collection %s", deleted_count, collection_id)
     except Exception as e:
         logger.warning("Failed to delete vectors for collection %s: %s", collection_id, e)
 
     # Delete collection (CASCADE deletes pages)
-    supabase.table("doc_collections").delete().eq(
-        "id", collection_id
-    ).eq("user_id", user_id).execute()
+    await db.execute(
+        supabase.table("doc_collections").delete().eq("id", collection_id).eq("user_id", user_id)
+    )
 
     return DocumentationDeleteResponse(
         message="Collection deleted",
@@ -279,9 +281,11 @@ async def list_collection_pages(
     supabase: Client = Depends(get_supabase),
 ):
     """List pages in a collection."""
-    pages = supabase.table("doc_pages").select(
-        "id, page_url, title, status, is_truncated, display_order"
-    ).eq("collection_id", collection_id).order("display_order").execute()
+    pages = await db.execute(
+        supabase.table("doc_pages").select(
+            "id, page_url, title, status, is_truncated, display_order"
+        ).eq("collection_id", collection_id).order("display_order")
+    )
 
     return DocumentationPagesResponse(
         collection_id=collection_id,
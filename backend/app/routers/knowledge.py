@@ -1,8 +1,9 @@
 import asyncio
 import logging
-from pathlib import Path
+import re
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
 from supabase import Client
 
 logger = logging.getLogger(__name__)
@@ -22,14 +23,21 @@ from app.models.knowledge import (
     TranscriptResponse,
 )
 from app.models.errors import AuthenticationError
+from app.services import db
 from app.services.chunk_count import update_cached_chunk_count
 from app.services.cookie_service import clear_cookie_failure, get_cookies_for_domain, mark_cookie_failed
+from app.services.host_limiter import get_host_limiter
+from app.services.ingest import StreamingIngestor
 from app.services.job_manager import JobManager
-from app.services.transcriber import delete_transcripts, get_transcript, get_transcript_content, save_transcript_md
+from app.services.shared_videos import get_shared_video_store
+from app.services.transcriber import delete_transcripts, fetch_transcript, get_transcript_entry, save_transcript
+from app.services.transcript_store import get_transcript_store
 from app.services.vectorstore import get_user_vectorstore
 
 router = APIRouter(prefix="/v1/api/knowledge", tags=["knowledge"])
 
+YOUTUBE_HOST = "www.youtube.com"
+
 
 async def process_knowledge_job(
     job_id: str,
@@ -40,30 +48,55 @@ async def process_knowledge_job(
     supabase: Client,
     user_id: str = "",
 ) -> None:
-    """Background task: transcribe videos and vectorize them."""
+    """Background task: transcribe videos and vectorize them.
+
+    Videos are transcribed concurrently under the adaptive YouTube host
+    limiter (see host_limiter) and streamed into the user's vector store in
+    micro-batches (see ingest), so finished videos become searchable while
+    the job is still running. Public transcripts already fetched for any
+    user are taken from the shared store (see shared_videos) instead.
+    """
     job_manager.update_job(job_id, status=JobStatus.IN_PROGRESS)
-    transcripts: list[str] = []
-    metadatas: list[dict] = []
+    vectorstore = get_user_vectorstore(user_id, settings)
+    ingestor = StreamingIngestor(
+        vectorstore,
+        max_tokens=settings.ingest_batch_tokens,
+        max_seconds=settings.ingest_batch_seconds,
+        on_batch=lambda chunks: db.run(update_cached_chunk_count, supabase, user_id, chunks),
+    )
     cookie_marked_failed = False
-
-    for i, video in enumerate(videos):
+    processed = 0
+    limiter = get_host_limiter(YOUTUBE_HOST, settings)
+    shared = get_shared_video_store(settings)
+
+    # Every video resolves to the same YouTube cookie set, so look it up once
+    cookie_result = None
+    if user_id:
+        cookie_result = await get_cookies_for_domain(user_id, f"https://{YOUTUBE_HOST}/", supabase)
+    cookies_json = cookie_result.cookies_json if cookie_result else None
+
+    async def transcribe(video) -> None:
+        nonlocal cookie_marked_failed, processed
         try:
-            cookie_result = None
-            if user_id:
-                youtube_url = f"https://www.youtube.com/watch?v={video.video_id}"
-                cookie_result = await get_cookies_for_domain(user_id, youtube_url, supabase)
-
-            text = await asyncio.to_thread(
-                get_transcript, video.video_id, video.title,
-                cookie_result.cookies_json if cookie_result else None,
-                settings,
+            text = None
+            if shared is not None:
+                text = await asyncio.to_thread(shared.get_transcript, video.video_id)
+            if text is None:
+                async with limiter.slot() as lease:
+                    def _on_rate_limited() -> None:
+                        lease.throttled = True
+
+                    text, public = await asyncio.to_thread(
+                        fetch_transcript, video.video_id, video.title,
+                        cookies_json, settings, _on_rate_limited,
+                    )
+                if shared is not None and public:
+                    await asyncio.to_thread(shared.put_transcript, video.video_id, text)
+            await asyncio.to_thread(
+                save_transcript,
+                video.video_id, video.title, text, settings.transcripts_dir,
             )
-            save_transcript_md(
-                video.video_id, video.title, text,
-                Path(settings.transcripts_dir),
-            )
-            transcripts.append(text)
-            metadatas.append({
+            await ingestor.add(text, {
                 "video_id": video.video_id,
                 "title": video.title,
                 "channel": channel_title,
@@ -72,14 +105,15 @@ async def process_knowledge_job(
             })
             # Mark video as transcribed in Supabase
             try:
-                supabase.table("videos").update(
-                    {"is_transcribed": True}
-                ).eq("video_id", video.video_id).execute()
+                await db.execute(
+                    supabase.table("videos").update({"is_transcribed": True})
+                    .eq("video_id", video.video_id)
+                )
             except Exception as db_err:
                 logger.error("Failed to mark video %s as transcribed: %s", video.video_id, db_err)
             # Clear cookie failure on successful use
             if cookie_result:
-                clear_cookie_failure(cookie_result.cookie_id, supabase)
+                await db.run(clear_cookie_failure, cookie_result.cookie_id, supabase)
             # Track successful transcription
             job = job_manager.get_job(job_id)
             succeeded = list(job.succeeded_videos) if job else []
@@ -88,8 +122,8 @@ async def process_knowledge_job(
         except AuthenticationError as e:
             logger.error("Auth failure transcribing video %s: %s", video.video_id, e)
             if cookie_result and not cookie_marked_failed:
-                mark_cookie_failed(cookie_result.cookie_id, str(e)[:200], supabase)
                 cookie_marked_failed = True
+                await db.run(mark_cookie_failed, cookie_result.cookie_id, str(e)[:200], supabase)
             job = job_manager.get_job(job_id)
             failed = list(job.failed_videos) if job else []
             failed.append(video.video_id)
@@ -101,30 +135,31 @@ async def process_knowledge_job(
             failed.append(video.video_id)
             job_manager.update_job(job_id, failed_videos=failed)
 
+        processed += 1
         job_manager.update_job(
             job_id,
-            processed_videos=i + 1,
-            message=f"Processed {i + 1}/{len(videos)}: {video.title[:50]}",
+            processed_videos=processed,
+            message=f"Processed {processed}/{len(videos)}: {video.title[:50]}",
         )
 
-        # Delay between requests to avoid YouTube rate limiting
-        if i < len(videos) - 1:
-            await asyncio.sleep(2)
+    async with ingestor:
+        await asyncio.gather(*(transcribe(video) for video in videos))
 
-    # Batch vectorize all successful transcripts
-    if transcripts:
-        try:
-            vectorstore = get_user_vectorstore(user_id, settings)
-            chunks_added = await asyncio.to_thread(
-                vectorstore.add_documents, transcripts, metadatas
+    if ingestor.failed_metadatas:
+        # Transcribed but not searchable: report these videos as failed
+        unindexed = {m["video_id"] for m in ingestor.failed_metadatas}
+        job = job_manager.get_job(job_id)
+        if job:
+            job_manager.update_job(
+                job_id,
+                succeeded_videos=[v for v in job.succeeded_videos if v not in unindexed],
+                failed_videos=list(job.failed_videos) + sorted(unindexed),
             )
-            if chunks_added > 0:
-                update_cached_chunk_count(supabase, user_id, chunks_added)
-        except Exception as e:
+        if ingestor.chunks_added == 0:
             job_manager.update_job(
                 job_id,
                 status=JobStatus.FAILED,
-                message=f"Vectorization failed: {e}",
+                message="Vectorization failed",
             )
             return
 
@@ -195,7 +230,7 @@ async def _delete_single_channel(
     Raises HTTPException on failure (404, 409, 500).
     """
     # 1. Fetch channel from Supabase
-    result = supabase.table("channels").select("*").eq("id", channel_id).eq("user_id", user_id).execute()
+    result = await db.execute(supabase.table("channels").select("*").eq("id", channel_id).eq("user_id", user_id))
     if not result.data:
         raise HTTPException(status_code=404, detail="Channel not found")
     channel = result.data[0]
@@ -209,7 +244,7 @@ async def _delete_single_channel(
         )
 
     # 3. Fetch all videos for this channel
-    videos_result = supabase.table("videos").select("video_id, title, is_transcribed").eq("channel_id", channel_id).execute()
+    videos_result = await db.execute(supabase.table("videos").select("video_id, title, is_transcribed").eq("channel_id", channel_id))
     videos = videos_result.data or []
     transcribed_videos = [v for v in videos if v.get("is_transcribed")]
 
@@ -225,17 +260,26 @@ async def _delete_single_channel(
             vectorstore = get_user_vectorstore(user_id, settings)
             vectors_deleted = await asyncio.to_thread(vectorstore.delete_by_video_ids, video_ids)
             if vectors_deleted > 0:
-                update_cached_chunk_count(supabase, user_id, -vectors_deleted)
+                await db.run(update_cached_chunk_count, supabase, user_id, -vectors_deleted)
         except Exception as e:
             raise HTTPException(
                 status_code=500,
                 detail=f"Vector store cleanup failed: {e}",
             )
 
-        # 4b. Delete transcript files
+        # 4b. Delete transcript files (stored once per video, so keep those
+        # other users have transcribed too)
         try:
+            shared_result = await db.execute(
+                supabase.table("videos").select("video_id")
+                .in_("video_id", video_ids).neq("user_id", user_id)
+                .eq("is_transcribed", True)
+            )
+            still_used = {row["video_id"] for row in shared_result.data or []}
             files_deleted = await asyncio.to_thread(
-                delete_transcripts, transcribed_videos, settings.transcripts_dir
+                delete_transcripts,
+                [v for v in transcribed_videos if v["video_id"] not in still_used],
+                settings.transcripts_dir,
             )
         except Exception as e:
             raise HTTPException(
@@ -244,7 +288,7 @@ async def _delete_single_channel(
             )
 
     # 5. Delete channel from Supabase (cascade deletes videos)
-    supabase.table("channels").delete().eq("id", channel_id).eq("user_id", user_id).execute()
+    await db.execute(supabase.table("channels").delete().eq("id", channel_id).eq("user_id", user_id))
 
     return ChannelDeleteResponse(
         channel_id=channel_id,
@@ -292,7 +336,7 @@ async def delete_channels_bulk(
             ))
         except HTTPException as e:
             # Look up channel title for error reporting
-            ch_result = supabase.table("channels").select("channel_title").eq("id", channel_id).execute()
+            ch_result = await db.execute(supabase.table("channels").select("channel_title").eq("id", channel_id))
             title = ch_result.data[0]["channel_title"] if ch_result.data else channel_id
             failed.append(BulkDeleteItemFailure(
                 channel_id=channel_id,
@@ -305,14 +349,114 @@ async def delete_channels_bulk(
     return BulkDeleteResponse(succeeded=succeeded, failed=failed, message=message)
 
 
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    return if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]
+
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """Parse a single ``bytes=`` range into [start, end); None if unsatisfiable.
+
+    Unsupported forms (multiple ranges, other units) raise ValueError and
+    are answered with the whole transcript.
+    """
+    match = _RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        raise ValueError(header)
+    first, last = match.groups()
+    if first == "":
+        start, end = max(size - int(last), 0), size
+    else:
+        start = int(first)
+        end = size if last == "" else min(int(last) + 1, size)
+    if start >= end:
+        return None
+    return start, end
+
+
 @router.get("/videos/{video_id}/transcript", response_model=TranscriptResponse)
 async def get_video_transcript(
     video_id: str,
+    request: Request,
+    user_id: str = Depends(get_current_user),
+    settings: Settings = Depends(get_settings),
+    supabase: Client = Depends(get_supabase),
+):
+    """Transcript with its metadata; revalidates with ETag / If-None-Match."""
+    video, entry = await db.run(
+        get_transcript_entry, video_id, user_id, settings, supabase
+    )
+    headers = {"ETag": f'"{entry.etag}"', "Cache-Control": "private, no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    store = get_transcript_store(settings.transcripts_dir)
+    entry, content = await asyncio.to_thread(store.read_latest, entry)
+    headers["ETag"] = f'"{entry.etag}"'
+    body = TranscriptResponse(
+        video_id=video["video_id"],
+        title=video["title"],
+        url=video["url"],
+        content=content.decode("utf-8").strip(),
+    )
+    return JSONResponse(body.model_dump(), headers=headers)
+
+
+@router.get("/videos/{video_id}/transcript/text")
+async def get_video_transcript_text(
+    video_id: str,
+    request: Request,
     user_id: str = Depends(get_current_user),
     settings: Settings = Depends(get_settings),
     supabase: Client = Depends(get_supabase),
 ):
-    return get_transcript_content(video_id, user_id, settings, supabase)
+    """Raw transcript text (UTF-8) with ETag and single byte-range support.
+
+    Only the compressed blocks overlapping the requested range are decoded.
+    """
+    _, entry = await db.run(
+        get_transcript_entry, video_id, user_id, settings, supabase
+    )
+    headers = {
+        "ETag": f'"{entry.etag}"',
+        "Cache-Control": "private, no-cache",
+        "Accept-Ranges": "bytes",
+    }
+    if _etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range.strip() == headers["ETag"]):
+        try:
+            byte_range = _parse_range(range_header, entry.size)
+        except ValueError:
+            byte_range = (0, entry.size)
+        else:
+            if byte_range is None:
+                headers["Content-Range"] = f"bytes */{entry.size}"
+                return Response(status_code=416, headers=headers)
+
+    store = get_transcript_store(settings.transcripts_dir)
+    if byte_range is not None and byte_range != (0, entry.size):
+        start, end = byte_range
+        current, data = await asyncio.to_thread(store.read_latest, entry, start, end)
+        if current.etag == entry.etag:
+            headers["Content-Range"] = f"bytes {start}-{end - 1}/{entry.size}"
+            return Response(
+                data, status_code=206, media_type="text/plain; charset=utf-8", headers=headers
+            )
+        # Replaced while reading: the range was for the old version, send the new one whole
+        entry = current
+
+    entry, data = await asyncio.to_thread(store.read_latest, entry)
+    headers["ETag"] = f'"{entry.etag}"'
+    return Response(data, media_type="text/plain; charset=utf-8", headers=headers)
 
 
 @router.get("/jobs/{job_id}", response_model=JobStatusResponse)
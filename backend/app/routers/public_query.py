@@ -6,6 +6,7 @@ from supabase import Client
 from app.config import Settings
 from app.dependencies import get_settings, get_supabase, verify_api_key
 from app.models.api_keys import PublicQueryRequest, PublicQueryResponse
+from app.services import db
 from app.services.api_key_service import APIKeyService
 from app.services.public_chat import PublicChatService
 
@@ -33,25 +34,14 @@ async def public_query(
     try:
         chat_service = PublicChatService(settings, supabase=supabase)
 
-        # Retrieve context from vector store (respects Deep Memory if enabled)
-        context, sources = await chat_service._retrieve_context(
-            request.question, user_id=user_id
+        # Retrieve context and answer (respects Deep Memory; cached answers skip both)
+        full_response, sources = await chat_service.answer(
+            request.question, request.history, user_id=user_id
         )
 
-        # Build LLM messages
-        messages = chat_service._build_messages(
-            context, request.history, request.question
-        )
-
-        # Collect full response (non-streaming)
-        full_response = ""
-        async for chunk in chat_service.llm.astream(messages):
-            token = chunk.content
-            if token:
-                full_response += token
-
         # Log successful usage
-        key_service.log_usage(
+        await db.run(
+            key_service.log_usage,
             api_key_id=key_id,
             user_id=user_id,
             endpoint="/v1/api/public/query",
@@ -66,7 +56,8 @@ async def public_query(
     except Exception as e:
         logger.exception("Public query failed for key %s", key_id)
 
-        key_service.log_usage(
+        await db.run(
+            key_service.log_usage,
             api_key_id=key_id,
             user_id=user_id,
             endpoint="/v1/api/public/query",
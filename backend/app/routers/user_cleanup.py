@@ -6,6 +6,7 @@ from supabase import Client
 
 from app.config import Settings
 from app.dependencies import get_current_user, get_settings, get_supabase
+from app.services import db
 from app.services.chunk_count import reset_cached_chunk_count
 from app.services.vectorstore import cleanup_user_vectorstore
 
@@ -26,6 +27,6 @@ async def cleanup_user_data(
     Supabase webhooks or Edge Functions on auth.users DELETE.
     """
     await cleanup_user_vectorstore(user_id, settings)
-    reset_cached_chunk_count(supabase, user_id)
+    await db.run(reset_cached_chunk_count, supabase, user_id)
     logger.info("Cleaned up vector store for user %s", user_id)
     return {"status": "ok", "user_id": user_id}
@@ -1,76 +1,112 @@
+"""Tools for the extended-search ReAct agent.
+
+The tools are module-level so the compiled agent graph can be cached and
+shared by all requests (see chat.get_agent_graph). Per-request state is
+passed in the run config: ``configurable["kb_search"]`` holds a
+KBSearchContext and ``configurable["serper_api_key"]`` the web search key.
+"""
+
 import logging
+from dataclasses import dataclass
 
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
-from langchain_community.utilities import GoogleSerperAPIWrapper
 
 from app.config import Settings
-from app.services.query_reformulation import reformulate_query
+from app.services.clients import get_clients
+from app.services.embedding_cache import normalize_query
+from app.services.retrieval import search_with_reformulation
 from app.services.vectorstore import VectorStoreService
 
 logger = logging.getLogger(__name__)
 
 
-def make_kb_search_tool(
-    vectorstore: VectorStoreService,
-    deep_memory: bool = False,
-    settings: Settings | None = None,
-):
-    """Create a knowledge base search tool bound to a user's vectorstore."""
-
-    @tool
-    async def search_knowledge_base(query: str) -> str:
-        """Search the user's personal knowledge base of YouTube transcripts, articles,
-        and documentation. Always use this tool first before web search."""
-        search_query = query
-        if settings:
-            search_query = await reformulate_query(query, settings)
-        results = await vectorstore.similarity_search(
-            query=search_query, k=5, score_threshold=0.3, deep_memory=deep_memory,
+@dataclass
+class KBSearchContext:
+    """Per-request bindings for search_knowledge_base.
+
+    *seed_results* are an earlier retrieval for *seed_query* (e.g. the
+    extended-search fast-path check on the user's message). The first tool
+    call for the same query reuses them as its raw-query results; query
+    correction still runs on top.
+    """
+    vectorstore: VectorStoreService
+    deep_memory: bool = False
+    settings: Settings | None = None
+    seed_query: str = ""
+    seed_results: list[tuple] | None = None
+
+    def take_seed(self, query: str) -> list[tuple] | None:
+        """Return the seed results once, if they were retrieved for *query*."""
+        if not self.seed_results or normalize_query(query) != normalize_query(self.seed_query):
+            return None
+        seed, self.seed_results = self.seed_results, None
+        return seed
+
+
+def _configurable(config: RunnableConfig, key: str):
+    value = (config.get("configurable") or {}).get(key)
+    if value is None:
+        raise ValueError(f"Agent run config is missing '{key}'")
+    return value
+
+
+@tool
+async def search_knowledge_base(query: str, config: RunnableConfig) -> str:
+    """Search the user's personal knowledge base of YouTube transcripts, articles,
+    and documentation. Always use this tool first before web search."""
+    ctx: KBSearchContext = _configurable(config, "kb_search")
+    seed = ctx.take_seed(query)
+    if seed is not None:
+        logger.info("KB search reusing fast-path retrieval for: '%s'", query)
+    if ctx.settings:
+        results = await search_with_reformulation(
+            query, ctx.vectorstore, ctx.settings, k=5, score_threshold=0.3,
+            deep_memory=ctx.deep_memory, raw_results=seed,
         )
-        if not results:
-            return "No relevant content found in the knowledge base."
-
-        parts = []
-        for i, (doc, score) in enumerate(results):
-            meta = doc.metadata or {}
-            title = meta.get("title", meta.get("page_title", "Unknown"))
-            source_url = meta.get("source", "")
-            parts.append(
-                f"[Source {i + 1}: {title} (relevance: {score:.2f})]"
-                f"\nURL: {source_url}"
-                f"\n{doc.page_content}"
-            )
-        return "\n\n".join(parts)
-
-    return search_knowledge_base
-
-
-def make_web_search_tool(serper_api_key: str):
-    """Create a Serper web search tool."""
-    serper = GoogleSerperAPIWrapper(serper_api_key=serper_api_key, k=3)
-
-    @tool
-    async def web_search(query: str) -> str:
-        """Search the web for current information. Use this only when the knowledge
-        base does not contain relevant results for the user's question."""
-        results = await serper.aresults(query)
-        parts = []
-
-        # Parse organic results from Serper response
-        organic = results.get("organic", [])
-        for r in organic[:3]:
-            title = r.get("title", "")
-            url = r.get("link", "")
-            snippet = r.get("snippet", "")
-            parts.append(f"[{title}]\nURL: {url}\n{snippet}")
-
-        # Include answer box if present
-        answer_box = results.get("answerBox", {})
-        if answer_box:
-            answer = answer_box.get("answer") or answer_box.get("snippet", "")
-            if answer:
-                parts.insert(0, f"[Direct Answer]\n{answer}")
-
-        return "\n\n".join(parts) if parts else "No web results found."
-
-    return web_search
+    elif seed is not None:
+        results = [(doc, score) for doc, score in seed if score >= 0.3][:5]
+    else:
+        results = await ctx.vectorstore.similarity_search(
+            query=query, k=5, score_threshold=0.3, deep_memory=ctx.deep_memory,
+        )
+    if not results:
+        return "No relevant content found in the knowledge base."
+
+    parts = []
+    for i, (doc, score) in enumerate(results):
+        meta = doc.metadata or {}
+        title = meta.get("title", meta.get("page_title", "Unknown"))
+        source_url = meta.get("source", "")
+        parts.append(
+            f"[Source {i + 1}: {title} (relevance: {score:.2f})]"
+            f"\nURL: {source_url}"
+            f"\n{doc.page_content}"
+        )
+    return "\n\n".join(parts)
+
+
+@tool
+async def web_search(query: str, config: RunnableConfig) -> str:
+    """Search the web for current information. Use this only when the knowledge
+    base does not contain relevant results for the user's question."""
+    serper = get_clients().serper(_configurable(config, "serper_api_key"), k=3)
+    results = await serper.aresults(query)
+    parts = []
+
+    # Parse organic results from Serper response
+    organic = results.get("organic", [])
+    for r in organic[:3]:
+        title = r.get("title", "")
+        url = r.get("link", "")
+        snippet = r.get("snippet", "")
+        parts.append(f"[{title}]\nURL: {url}\n{snippet}")
+
+    # Include answer box if present
+    answer_box = results.get("answerBox", {})
+    if answer_box:
+        answer = answer_box.get("answer") or answer_box.get("snippet", "")
+        if answer:
+            parts.insert(0, f"[Direct Answer]\n{answer}")
+
+    return "\n\n".join(parts) if parts else "No web results found."
@@ -0,0 +1,432 @@
+"""Per-user HNSW approximate-nearest-neighbour index over chunk embeddings.
+
+Exact search cost grows with the dataset. Above ``ann_min_chunks``,
+similarity_search answers from this index: a hierarchical navigable
+small-world graph over L2-normalised vectors, searched by cosine
+similarity. It is written in NumPy because no ANN library is available
+to the deployment.
+
+The index is optional and lives under ``ann_index_dir``:
+
+- It is built once a dataset crosses the threshold.
+- It is then updated incrementally on every add and delete, and saved
+  on a debounce (SAVE_INTERVAL).
+- Deleted chunks become tombstones: still traversed, never returned.
+- Once tombstones pass MAX_DELETED_RATIO, the index is discarded and
+  rebuilt.
+"""
+
+import heapq
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from app.config import Settings
+
+logger = logging.getLogger(__name__)
+
+M = 16                 # links per node on upper layers (2 * M on layer 0)
+EF_CONSTRUCTION = 64
+MAX_DELETED_RATIO = 0.3
+SAVE_INTERVAL = 30.0   # seconds between saves of an incrementally updated index
+
+
+class HNSWIndex:
+    def __init__(
+        self, dim: int, m: int = M, ef_construction: int = EF_CONSTRUCTION, seed: int = 0
+    ):
+        self.dim = dim
+        self.m = m
+        self.m0 = 2 * m
+        self.ef_construction = ef_construction
+        self._level_mult = 1 / math.log(m)
+        self._rng = np.random.default_rng(seed)
+        self.count = 0
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.layer0 = np.full((0, self.m0), -1, dtype=np.int32)
+        self.levels = np.zeros(0, dtype=np.int8)
+        self.upper: list[dict[int, list[int]]] = []  # upper[l - 1][node] -> neighbours
+        self.deleted = np.zeros(0, dtype=bool)
+        self.labels: list[str] = []
+        self.nodes: dict[str, int] = {}
+        self.entry = -1
+        self._persisted = 0  # rows already in the vectors file
+
+    # -- storage -------------------------------------------------------------
+
+    def _grow(self, needed: int) -> None:
+        capacity = len(self.vectors)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2, 1024)
+
+        def _resize(array: np.ndarray, fill) -> np.ndarray:
+            grown = np.full((capacity, *array.shape[1:]), fill, dtype=array.dtype)
+            grown[: self.count] = array[: self.count]
+            return grown
+
+        self.vectors = _resize(self.vectors, 0)
+        self.layer0 = _resize(self.layer0, -1)
+        self.levels = _resize(self.levels, 0)
+        self.deleted = _resize(self.deleted, False)
+
+    def _neighbours(self, node: int, level: int) -> np.ndarray | list[int]:
+        if level == 0:
+            row = self.layer0[node]
+            return row[row >= 0]
+        return self.upper[level - 1].get(node, [])
+
+    def _set_neighbours(self, node: int, level: int, neighbours: list[int]) -> None:
+        if level == 0:
+            self.layer0[node] = -1
+            self.layer0[node, : len(neighbours)] = neighbours
+        else:
+            self.upper[level - 1][node] = list(neighbours)
+
+    @property
+    def max_level(self) -> int:
+        return int(self.levels[self.entry]) if self.entry >= 0 else -1
+
+    @property
+    def live_count(self) -> int:
+        return self.count - int(self.deleted[: self.count].sum())
+
+    # -- graph algorithms ----------------------------------------------------
+
+    def _search_layer(
+        self, query: np.ndarray, entries: list[int], ef: int, level: int
+    ) -> list[tuple[float, int]]:
+        """Best-first search of one layer; returns (distance, node) ascending."""
+        visited = set(entries)
+        distances = 1.0 - self.vectors[entries] @ query
+        candidates = [(float(d), n) for d, n in zip(distances, entries)]
+        heapq.heapify(candidates)
+        results = [(-d, n) for d, n in candidates]
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            distance, node = heapq.heappop(candidates)
+            if distance > -results[0][0] and len(results) >= ef:
+                break
+            fresh = [n for n in self._neighbours(node, level) if n not in visited]
+            if not fresh:
+                continue
+            visited.update(fresh)
+            for n, d in zip(fresh, (1.0 - self.vectors[fresh] @ query).tolist()):
+                if len(results) < ef or d < -results[0][0]:
+                    heapq.heappush(candidates, (d, n))
+                    heapq.heappush(results, (-d, n))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+        return sorted((-d, n) for d, n in results)
+
+    def _select(self, candidates: list[tuple[float, int]], limit: int) -> list[int]:
+        """HNSW neighbour heuristic: keep candidates closer to the node than to any kept one."""
+        if len(candidates) <= limit:
+            return [n for _, n in candidates]
+        nodes = [n for _, n in candidates]
+        vectors = self.vectors[nodes]
+        similarity = (vectors @ vectors.T).tolist()
+        selected: list[int] = []
+        for i, (distance, _) in enumerate(candidates):
+            row, bound = similarity[i], 1.0 - distance
+            for j in selected:
+                if row[j] >= bound:
+                    break
+            else:
+                selected.append(i)
+                if len(selected) == limit:
+                    break
+        if len(selected) < limit:  # top up with the nearest pruned candidates
+            chosen = set(selected)
+            selected += [i for i in range(len(nodes)) if i not in chosen][: limit - len(selected)]
+        return [nodes[i] for i in selected]
+
+    def _connect(self, node: int, neighbour: int, level: int) -> None:
+        limit = self.m0 if level == 0 else self.m
+        links = list(self._neighbours(neighbour, level))
+        if len(links) < limit:
+            self._set_neighbours(neighbour, level, links + [node])
+            return
+        links.append(node)
+        distances = 1.0 - self.vectors[links] @ self.vectors[neighbour]
+        ranked = sorted(zip(distances.tolist(), links))
+        self._set_neighbours(neighbour, level, self._select(ranked, limit))
+
+    def _insert(self, label: str, vector: np.ndarray) -> None:
+        node = self.count
+        self._grow(node + 1)
+        self.vectors[node] = vector
+        level = int(-math.log(1.0 - self._rng.random()) * self._level_mult)
+        self.levels[node] = level
+        self.labels.append(label)
+        self.nodes[label] = node
+        self.count += 1
+        while len(self.upper) < level:
+            self.upper.append({})
+
+        if self.entry < 0:
+            self.entry = node
+            return
+
+        entries = [self.entry]
+        for current in range(self.max_level, level, -1):
+            entries = [self._search_layer(vector, entries, 1, current)[0][1]]
+        for current in range(min(level, self.max_level), -1, -1):
+            found = self._search_layer(vector, entries, self.ef_construction, current)
+            neighbours = self._select(found, self.m0 if current == 0 else self.m)
+            self._set_neighbours(node, current, neighbours)
+            for neighbour in neighbours:
+                self._connect(node, neighbour, current)
+            entries = [n for _, n in found]
+        if level > self.max_level:
+            self.entry = node
+
+    # -- public API ----------------------------------------------------------
+
+    def add(self, labels: list[str], vectors) -> None:
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms == 0, 1, norms)
+        for label, vector in zip(labels, matrix):
+            if label not in self.nodes:
+                self._insert(label, vector)
+
+    def remove(self, labels: list[str]) -> int:
+        removed = 0
+        for label in labels:
+            node = self.nodes.pop(label, None)
+            if node is not None:
+                self.deleted[node] = True
+                removed += 1
+        return removed
+
+    @property
+    def deleted_ratio(self) -> float:
+        return 1 - self.live_count / self.count if self.count else 0.0
+
+    def search(self, query, k: int, ef: int = 64) -> list[tuple[str, float]]:
+        """Return up to *k* (label, cosine similarity) pairs, most similar first."""
+        if self.live_count == 0 or k <= 0:
+            return []
+        query = np.asarray(query, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        entries = [self.entry]
+        for level in range(self.max_level, 0, -1):
+            entries = [self._search_layer(query, entries, 1, level)[0][1]]
+        # Widen the beam by the share of tombstones it will have to skip
+        ef = int(max(ef, k) / max(0.1, 1 - self.deleted_ratio))
+        found = self._search_layer(query, entries, ef, 0)
+        return [
+            (self.labels[n], 1.0 - d) for d, n in found if not self.deleted[n]
+        ][:k]
+
+    def save(self, path: Path) -> None:
+        """Persist to *path* (graph, .npz) and its append-only ``.vectors`` file.
+
+        Only vectors added since the last save are written. The graph is
+        replaced atomically afterwards and its node count decides how many
+        vectors are valid, so a crash in between loses nothing already saved.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        vectors_path = path.with_suffix(".vectors")
+        row_bytes = self.dim * np.dtype(np.float32).itemsize
+        with open(vectors_path, "r+b" if self._persisted and vectors_path.exists() else "wb") as f:
+            f.truncate(self._persisted * row_bytes)
+            f.seek(self._persisted * row_bytes)
+            f.write(self.vectors[self._persisted:self.count].tobytes())
+        self._persisted = self.count
+
+        upper_nodes, upper_levels, upper_links = [], [], []
+        for level, layer in enumerate(self.upper, start=1):
+            for node, links in layer.items():
+                upper_nodes.append(node)
+                upper_levels.append(level)
+                upper_links.append(list(links) + [-1] * (self.m - len(links)))
+        tmp_path = path.with_suffix(".tmp.npz")
+        np.savez(
+            tmp_path,
+            params=np.array([self.dim, self.m, self.ef_construction, self.entry, self.count]),
+            layer0=self.layer0[: self.count],
+            levels=self.levels[: self.count],
+            deleted=self.deleted[: self.count],
+            labels=np.array(self.labels, dtype=str),
+            upper_nodes=np.array(upper_nodes, dtype=np.int32),
+            upper_levels=np.array(upper_levels, dtype=np.int32),
+            upper_links=np.array(upper_links, dtype=np.int32).reshape(-1, self.m),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "HNSWIndex":
+        with np.load(path) as data:
+            dim, m, ef_construction, entry, count = (int(v) for v in data["params"])
+            index = cls(dim, m=m, ef_construction=ef_construction)
+            index._grow(count)
+            index.count = count
+            index.entry = entry
+            index.vectors[:count] = np.fromfile(
+                path.with_suffix(".vectors"), dtype=np.float32, count=count * dim
+            ).reshape(count, dim)
+            index.layer0[:count] = data["layer0"]
+            index.levels[:count] = data["levels"]
+            index.deleted[:count] = data["deleted"]
+            index.labels = [str(label) for label in data["labels"]]
+            index.upper = [{} for _ in range(int(data["levels"].max(initial=0)))]
+            for node, level, links in zip(
+                data["upper_nodes"], data["upper_levels"], data["upper_links"]
+            ):
+                index.upper[level - 1][int(node)] = [int(n) for n in links if n >= 0]
+        index.nodes = {
+            label: node for node, label in enumerate(index.labels) if not index.deleted[node]
+        }
+        index._persisted = count
+        return index
+
+
+class ANNIndex:
+    """A dataset's persisted HNSW index plus its build state.
+
+    ``ready`` and ``live_count`` are lock-free snapshots, so the event loop
+    can check them while an ingest holds the lock for a long insert. Adds
+    and removes are saved at most every SAVE_INTERVAL seconds (and by
+    flush, e.g. after a background refresh); an index persisted behind its
+    dataset is caught up by the next refresh.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock = threading.RLock()
+        self.building = False
+        self.hnsw: HNSWIndex | None = None
+        self._live_count = 0
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        if path.exists():
+            try:
+                self.hnsw = HNSWIndex.load(path)
+                self._live_count = self.hnsw.live_count
+            except Exception as e:
+                logger.warning("Discarding unreadable ANN index %s: %s", path, e)
+
+    @property
+    def ready(self) -> bool:
+        return self.hnsw is not None
+
+    @property
+    def live_count(self) -> int:
+        return self._live_count
+
+    def labels(self) -> set[str]:
+        with self.lock:
+            return set(self.hnsw.nodes) if self.hnsw is not None else set()
+
+    def _save_locked(self) -> None:
+        self.hnsw.save(self.path)
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    def _changed_locked(self) -> None:
+        self._live_count = self.hnsw.live_count
+        self._dirty = True
+        if time.monotonic() - self._saved_at >= SAVE_INTERVAL:
+            self._save_locked()
+
+    def build(self, pages) -> int:
+        """Build from ``{"ids": [...], "embeddings": [...]}`` pages and persist."""
+        hnsw: HNSWIndex | None = None
+        for page in pages:
+            if not page["ids"]:
+                continue
+            if hnsw is None:
+                hnsw = HNSWIndex(len(page["embeddings"][0]))
+            hnsw.add(page["ids"], page["embeddings"])
+        with self.lock:
+            if hnsw is None:
+                self.reset()
+                return 0
+            self.hnsw = hnsw
+            self._live_count = hnsw.live_count
+            self._save_locked()
+            return hnsw.live_count
+
+    def add(self, ids: list[str], vectors) -> None:
+        with self.lock:
+            if self.hnsw is None:
+                return
+            self.hnsw.add(ids, vectors)
+            self._changed_locked()
+
+    def remove(self, ids: list[str]) -> None:
+        with self.lock:
+            if self.hnsw is None or not self.hnsw.remove(ids):
+                return
+            if self.hnsw.deleted_ratio > MAX_DELETED_RATIO:
+                logger.info("ANN index %s has too many tombstones; dropping it", self.path)
+                self.reset()
+            else:
+                self._changed_locked()
+
+    def flush(self) -> None:
+        """Persist changes not yet saved."""
+        with self.lock:
+            if self.hnsw is not None and self._dirty:
+                self._save_locked()
+
+    def reset(self) -> None:
+        """Forget the index; it is rebuilt the next time it is needed."""
+        with self.lock:
+            self.hnsw = None
+            self._live_count = 0
+            self._dirty = False
+            self.path.unlink(missing_ok=True)
+            self.path.with_suffix(".vectors").unlink(missing_ok=True)
+
+    def search(self, query, k: int, ef: int) -> list[tuple[str, float]] | None:
+        with self.lock:
+            return self.hnsw.search(query, k, ef) if self.hnsw is not None else None
+
+
+_indexes: OrderedDict[str, ANNIndex] = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_ann_index(dataset_path: str, settings: Settings) -> ANNIndex:
+    """Return the (LRU-cached) ANN index for a per-user dataset path."""
+    name = dataset_path.rstrip("/").rsplit("/", 1)[-1]
+    path = Path(settings.ann_index_dir) / f"{name}.npz"
+    key = str(path)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            return index
+        index = ANNIndex(path)
+        _indexes[key] = index
+        evicted = []
+        while len(_indexes) > settings.vectorstore_pool_size:
+            evicted.append(_indexes.popitem(last=False)[1])
+    for old in evicted:
+        old.flush()
+    return index
+
+
+def flush_ann_indexes() -> None:
+    """Persist unsaved changes of all cached indexes (see main.lifespan)."""
+    with _indexes_lock:
+        indexes = list(_indexes.values())
+    for index in indexes:
+        try:
+            index.flush()
+        except Exception as e:
+            logger.warning("Failed to save ANN index %s: %s", index.path, e)
@@ -0,0 +1,156 @@
+"""Semantic answer cache for repeated questions.
+
+Public API consumers and chat users ask many near-identical questions
+against knowledge bases that rarely change between ingests. Answers are
+cached per user and matched by query embedding: a question whose cosine
+similarity to a cached one reaches ``answer_cache_similarity`` gets the
+cached answer, skipping retrieval and the chat model call.
+
+An entry only matches within its scope:
+
+- ``kb_version`` (see user_settings): changed by ingestion, deletes and the
+  Deep Memory toggle, so an answer never outlives the KB it came from.
+  Other workers pick up a change within ``user_settings_ttl``;
+- the pipeline and retrieval mode that produced it (``answer_scope``);
+- the conversation history, matched exactly.
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from app.config import Settings
+from app.models.chat import ChatMessage
+
+# Replayed answers are streamed word by word, like the model's own tokens
+_TOKEN_PATTERN = re.compile(r"\s*\S+\s*|\s+")
+
+
+@dataclass(frozen=True)
+class CachedAnswer:
+    text: str
+    sources: tuple[str, ...] = ()
+    kb_relevant: bool | None = None
+
+
+@dataclass
+class _UserAnswers:
+    kb_version: str
+    scopes: list[str] = field(default_factory=list)
+    vectors: list[np.ndarray] = field(default_factory=list)
+    answers: list[CachedAnswer] = field(default_factory=list)
+    expires: list[float] = field(default_factory=list)
+
+    def drop(self, i: int) -> None:
+        for entries in (self.scopes, self.vectors, self.answers, self.expires):
+            del entries[i]
+
+
+def answer_scope(pipeline: str, deep_memory: bool, history: list[ChatMessage]) -> str:
+    """Scope key for answers from *pipeline* with the given retrieval mode and history."""
+    turns = json.dumps([[m.role, m.content] for m in history])
+    digest = hashlib.sha256(turns.encode("utf-8")).hexdigest()[:16]
+    return f"{pipeline}:{'deep_memory' if deep_memory else 'standard'}:{digest}"
+
+
+def replay_tokens(text: str) -> list[str]:
+    """Split a cached answer into stream tokens that concatenate back to *text*."""
+    return _TOKEN_PATTERN.findall(text)
+
+
+def _unit(vector) -> np.ndarray:
+    v = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(v))
+    return v / norm if norm else v
+
+
+class AnswerCache:
+    def __init__(
+        self,
+        similarity: float,
+        max_entries: int,
+        ttl_seconds: float,
+        max_users: int = 10_000,
+    ):
+        self.similarity = similarity
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_users = max_users
+        self._users: OrderedDict[str, _UserAnswers] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _entries(self, user_id: str, kb_version: str) -> _UserAnswers:
+        """Return the user's answers, dropping them if the KB version changed."""
+        entries = self._users.get(user_id)
+        if entries is None or entries.kb_version != kb_version:
+            entries = _UserAnswers(kb_version)
+            self._users[user_id] = entries
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        self._users.move_to_end(user_id)
+        return entries
+
+    def lookup(
+        self, user_id: str, kb_version: str, scope: str, vector
+    ) -> CachedAnswer | None:
+        """Return the best cached answer for a similar question, if any."""
+        query = _unit(vector)
+        now = time.monotonic()
+        with self._lock:
+            entries = self._entries(user_id, kb_version)
+            for i in reversed(range(len(entries.expires))):
+                if entries.expires[i] <= now:
+                    entries.drop(i)
+            candidates = [i for i, s in enumerate(entries.scopes) if s == scope]
+            if not candidates:
+                return None
+            scores = np.stack([entries.vectors[i] for i in candidates]) @ query
+            best = int(np.argmax(scores))
+            if scores[best] < self.similarity:
+                return None
+            return entries.answers[candidates[best]]
+
+    def put(
+        self, user_id: str, kb_version: str, scope: str, vector, answer: CachedAnswer
+    ) -> None:
+        with self._lock:
+            entries = self._entries(user_id, kb_version)
+            entries.scopes.append(scope)
+            entries.vectors.append(_unit(vector))
+            entries.answers.append(answer)
+            entries.expires.append(time.monotonic() + self.ttl_seconds)
+            while len(entries.answers) > self.max_entries:
+                entries.drop(0)
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._users.clear()
+
+
+_cache: AnswerCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_answer_cache(settings: Settings) -> AnswerCache | None:
+    """Return the process-wide answer cache, or None when disabled."""
+    global _cache
+    if settings.answer_cache_max_entries <= 0:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = AnswerCache(
+                similarity=settings.answer_cache_similarity,
+                max_entries=settings.answer_cache_max_entries,
+                ttl_seconds=settings.answer_cache_ttl,
+            )
+        return _cache
@@ -1,13 +1,26 @@
 import asyncio
-import json
 import logging
+import re
+import time
+from collections import OrderedDict
+from html import escape
+from http.cookiejar import CookieJar, DefaultCookiePolicy
 from urllib.parse import urlparse
 
+import httpx
+import lxml.html
+from lxml import etree
 from markdownify import markdownify
-from playwright.async_api import async_playwright
 
+from app.config import settings
 from app.models.errors import AuthenticationError
-from app.services.auth_detection import PAYWALL_DETECT_JS, is_cloudflare_challenge
+from app.services.auth_detection import (
+    PAYWALL_DETECT_JS,
+    detect_paywall_html,
+    is_cloudflare_challenge,
+)
+from app.services.browser_pool import get_browser_pool, parse_cookies
+from app.services.resource_blocker import BlockStats, block_heavy_resources
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +56,75 @@ NOISE_SELECTORS = [
     "[class*='social']",
 ]
 
+STRATEGY_HTTP = "http"
+STRATEGY_BROWSER = "browser"
+
+# Static extractions with less visible text than this are treated as JS-rendered
+STATIC_MIN_TEXT_CHARS = 200
+
+_JS_REQUIRED_RE = re.compile(
+    r"enable javascript|javascript is (?:required|disabled)|"
+    r'id=["\'](?:root|__next|app|__nuxt)["\']\s*>\s*</div>',
+    re.IGNORECASE,
+)
+
+CONTENT_READY_POLL_MS = 250
+CONTENT_READY_TIMEOUT_MS = 5_000
+
+# Resolves once the first matching content selector has had the same,
+# non-empty text length for two consecutive polls.
+CONTENT_READY_JS = """(selectors) => {
+    const el = selectors.map(s => document.querySelector(s)).find(Boolean);
+    const length = el ? el.innerText.length : 0;
+    const state = window.__contentReady || (window.__contentReady = {length: -1, stable: 0});
+    if (length > 0 && length === state.length) {
+        state.stable += 1;
+    } else {
+        state.length = length;
+        state.stable = 0;
+    }
+    return state.stable >= 2;
+}"""
+
+# One round trip: paywall verdict (before stripping, as it inspects the full
+# page), noise removal, title (og:title > h1 > <title>) and content HTML.
+EXTRACT_JS = """({noiseSelectors, contentSelectors, checkPaywall}) => {
+    const html = document.documentElement ? document.documentElement.outerHTML : "";
+    const paywall = checkPaywall ? (__PAYWALL_DETECT__)() : null;
+
+    for (const selector of noiseSelectors) {
+        try {
+            document.querySelectorAll(selector).forEach(el => el.remove());
+        } catch (e) {}
+    }
+
+    let title = null;
+    const ogTitle = document.querySelector('meta[property="og:title"]');
+    const h1 = document.querySelector("h1");
+    const candidates = [
+        ogTitle ? ogTitle.getAttribute("content") : null,
+        h1 ? h1.innerText : null,
+        document.title,
+    ];
+    for (const candidate of candidates) {
+        if (candidate && candidate.trim()) {
+            title = candidate.trim();
+            break;
+        }
+    }
+
+    let contentHtml = null;
+    for (const selector of contentSelectors) {
+        const el = document.querySelector(selector);
+        if (el && el.innerHTML.trim()) {
+            contentHtml = el.innerHTML;
+            break;
+        }
+    }
+
+    return {html, paywall, title, contentHtml};
+}""".replace("__PAYWALL_DETECT__", PAYWALL_DETECT_JS)
+
 CHROME_USER_AGENT = (
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
     "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
@@ -50,13 +132,14 @@ CHROME_USER_AGENT = (
 
 
 async def scrape_article(
-    url: str, cookies_json: str | None = None
+    url: str, cookies_json: str | None = None, block_stats: BlockStats | None = None
 ) -> dict:
     """Scrape an article URL and return extracted content as Markdown.
 
     Args:
         url: The article URL to scrape.
         cookies_json: Optional JSON string of cookies to inject (CookieEntry[] format).
+        block_stats: Optional per-job counters for requests blocked in the browser.
 
     Returns:
         dict with keys: title, content_markdown, is_truncated
@@ -64,23 +147,191 @@ async def scrape_article(
     Raises:
         Exception with descriptive message on failure.
     """
-    browser = None
+    domain = urlparse(url).hostname or ""
+    if settings.scrape_http_first and _domain_strategies.get(domain) != STRATEGY_BROWSER:
+        result = await _scrape_static(url, cookies_json)
+        if result is not None:
+            _domain_strategies.record(domain, STRATEGY_HTTP)
+            return result
+        _domain_strategies.record(domain, STRATEGY_BROWSER)
+    return await _scrape_with_browser(url, cookies_json, block_stats)
+
+
+class _StrategyCache:
+    """Remembers which fetch strategy worked per domain, for ``ttl`` seconds."""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    def get(self, domain: str) -> str | None:
+        entry = self._entries.get(domain)
+        if entry is None:
+            return None
+        expires_at, strategy = entry
+        if expires_at <= time.monotonic():
+            del self._entries[domain]
+            return None
+        return strategy
+
+    def record(self, domain: str, strategy: str) -> None:
+        if self._entries.get(domain, (0, None))[1] != strategy:
+            logger.info("Scrape strategy for %s: %s", domain, strategy)
+        self._entries[domain] = (time.monotonic() + settings.scrape_strategy_ttl, strategy)
+        self._entries.move_to_end(domain)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+_domain_strategies = _StrategyCache()
+_http_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared HTTP client for static page fetches.
+
+    Its cookie jar rejects everything so one user's session cookies never
+    leak into another user's request; cookies are sent per request instead.
+    """
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            follow_redirects=True,
+            timeout=settings.scrape_http_timeout,
+            headers={
+                "User-Agent": CHROME_USER_AGENT,
+                "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+                "Accept-Language": "en-US,en;q=0.9",
+            },
+            cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[])),
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def _cookie_header(cookies_json: str | None, host: str) -> str | None:
+    """Build a Cookie header from CookieEntry[] JSON for cookies matching *host*."""
+    pairs = []
+    for cookie in parse_cookies(cookies_json):
+        name, value = cookie.get("name"), cookie.get("value")
+        domain = (cookie.get("domain") or host).lstrip(".")
+        if name and value is not None and (host == domain or host.endswith("." + domain)):
+            pairs.append(f"{name}={value}")
+    return "; ".join(pairs) or None
+
+
+def _inner_html(element) -> str:
+    parts = [escape(element.text)] if element.text else []
+    parts.extend(lxml.html.tostring(child, encoding="unicode") for child in element)
+    return "".join(parts)
+
+
+def _extract_static(html: str) -> tuple[str | None, str | None, str]:
+    """Apply the noise/content/title rules to raw HTML.
+
+    Returns (title, content_html, content_text).
+    """
+    doc = lxml.html.fromstring(html)
+    for selector in NOISE_SELECTORS:
+        for element in doc.cssselect(selector):
+            if element.getparent() is not None:
+                element.drop_tree()
+
+    title = None
+    og_title = doc.cssselect('meta[property="og:title"]')
+    if og_title and (og_title[0].get("content") or "").strip():
+        title = og_title[0].get("content").strip()
+    if title is None:
+        for selector in ("h1", "title"):
+            found = doc.cssselect(selector)
+            if found and found[0].text_content().strip():
+                title = found[0].text_content().strip()
+                break
+
+    for selector in CONTENT_SELECTORS:
+        found = doc.cssselect(selector)
+        if found:
+            content_html = _inner_html(found[0])
+            if content_html.strip():
+                return title, content_html, found[0].text_content()
+    return title, None, ""
+
+
+def _looks_js_rendered(html: str, content_text: str) -> bool:
+    """Heuristic for app shells whose content only appears after JS runs."""
+    text_length = len(" ".join(content_text.split()))
+    if text_length < STATIC_MIN_TEXT_CHARS:
+        return True
+    return text_length < 4 * STATIC_MIN_TEXT_CHARS and bool(_JS_REQUIRED_RE.search(html))
+
+
+async def _scrape_static(url: str, cookies_json: str | None) -> dict | None:
+    """Fetch and extract *url* without a browser.
+
+    Returns None whenever the browser path should decide instead: HTTP
+    errors and 403s, Cloudflare challenges, a paywall despite cookies,
+    non-HTML responses, and empty or JS-rendered content.
+    """
+    host = urlparse(url).hostname or ""
+    headers = {}
+    cookie_header = _cookie_header(cookies_json, host)
+    if cookie_header:
+        headers["Cookie"] = cookie_header
+
+    try:
+        response = await get_http_client().get(url, headers=headers)
+    except httpx.HTTPError as e:
+        logger.info("Static fetch failed for %s (%s); using browser", url, e)
+        return None
+
+    content_type = response.headers.get("content-type", "")
+    if response.status_code != 200 or "html" not in content_type:
+        logger.info(
+            "Static fetch of %s returned %s %s; using browser",
+            url, response.status_code, content_type,
+        )
+        return None
+
+    html = response.text
+    if is_cloudflare_challenge(html):
+        return None
+    if cookies_json and detect_paywall_html(html):
+        return None
+
+    try:
+        title, content_html, content_text = await asyncio.to_thread(_extract_static, html)
+    except (ValueError, etree.ParserError):
+        return None
+    if not content_html or _looks_js_rendered(html, content_text):
+        return None
+
     try:
-        pw = await async_playwright().start()
-        browser = await pw.chromium.launch(headless=True)
-        context = await browser.new_context(user_agent=CHROME_USER_AGENT)
-
-        if cookies_json:
-            try:
-                cookies = json.loads(cookies_json)
-                if cookies:
-                    await context.add_cookies(cookies)
-            except (json.JSONDecodeError, Exception) as e:
-                logger.warning("Failed to parse/inject cookies: %s", e)
-
-        page = await context.new_page()
+        return _build_result(title, content_html)
+    except Exception:
+        return None
+
+
+async def _scrape_with_browser(
+    url: str, cookies_json: str | None, block_stats: BlockStats | None = None
+) -> dict:
+    """Scrape *url* in a pooled headless browser.
+
+    After a readiness wait, a single ``page.evaluate`` (EXTRACT_JS) runs the
+    paywall check, strips noise, and returns title and content HTML.
+    """
+    async with get_browser_pool().page(cookies_json, user_agent=CHROME_USER_AGENT) as page:
+        await block_heavy_resources(page, url, block_stats)
         response = await page.goto(url, timeout=30_000, wait_until="domcontentloaded")
-        await asyncio.sleep(2)  # Allow JS-rendered content to appear
 
         # Check for authentication failures
         domain = urlparse(url).hostname or ""
@@ -98,9 +349,19 @@ async def scrape_article(
                 error_type="http_403",
             )
 
+        await _wait_for_content(page)
+
+        extracted = await page.evaluate(
+            EXTRACT_JS,
+            {
+                "noiseSelectors": NOISE_SELECTORS,
+                "contentSelectors": CONTENT_SELECTORS,
+                "checkPaywall": bool(cookies_json),
+            },
+        )
+
         # Check for Cloudflare challenge on non-403 responses (some use 503 or JS redirect)
-        page_html = await page.content()
-        if is_cloudflare_challenge(page_html):
+        if is_cloudflare_challenge(extracted["html"]):
             raise AuthenticationError(
                 message="Cloudflare challenge page detected",
                 domain=domain,
@@ -109,109 +370,62 @@ async def scrape_article(
 
         # Check for soft paywall (site returns 200 but truncated content).
         # Only relevant when cookies were provided — it means they didn't work.
-        if cookies_json:
-            paywall_reason = await page.evaluate(PAYWALL_DETECT_JS)
-            if paywall_reason:
-                raise AuthenticationError(
-                    message=f"Paywall detected ({paywall_reason}) — cookies may be expired",
-                    domain=domain,
-                    error_type="paywall",
-                )
+        if extracted["paywall"]:
+            raise AuthenticationError(
+                message=f"Paywall detected ({extracted['paywall']}) — cookies may be expired",
+                domain=domain,
+                error_type="paywall",
+            )
 
-        # Strip noise elements
-        for selector in NOISE_SELECTORS:
-            try:
-                await page.evaluate(
-                    f"""() => {{
-                        document.querySelectorAll('{selector}').forEach(el => el.remove());
-                    }}"""
-                )
-            except Exception:
-                pass
-
-        # Extract title: og:title > h1 > title
-        title = await _extract_title(page)
-
-        # Find content element using selector priority
-        content_html = None
-        for selector in CONTENT_SELECTORS:
-            element = await page.query_selector(selector)
-            if element:
-                content_html = await element.inner_html()
-                if content_html and content_html.strip():
-                    break
-                content_html = None
-
-        if not content_html or not content_html.strip():
-            raise Exception("Could not extract article content from the page")
-
-        # Convert HTML to Markdown
-        content_markdown = markdownify(
-            content_html, heading_style="ATX", strip=["img"]
-        )
-        content_markdown = content_markdown.strip()
-
-        if not content_markdown:
-            raise Exception("Article content is empty after conversion")
-
-        # Enforce 200KB limit
-        is_truncated = False
-        content_bytes = content_markdown.encode("utf-8")
-        if len(content_bytes) > MAX_CONTENT_BYTES:
-            truncated = content_bytes[:MAX_CONTENT_BYTES].decode("utf-8", errors="ignore")
-            last_break = truncated.rfind("\n\n")
-            if last_break > 0:
-                content_markdown = truncated[:last_break]
-            else:
-                content_markdown = truncated
-            is_truncated = True
-
-        await context.close()
-
-        return {
-            "title": title,
-            "content_markdown": content_markdown,
-            "is_truncated": is_truncated,
-        }
+        return _build_result(extracted["title"], extracted["contentHtml"])
 
-    except Exception:
-        raise
-    finally:
-        if browser:
-            await browser.close()
 
+async def _wait_for_content(page) -> None:
+    """Wait until the main content's text length stops changing.
 
-async def _extract_title(page) -> str | None:
-    """Extract title from page using priority: og:title > h1 > title tag."""
-    # Try og:title
+    Replaces a fixed sleep: server-rendered pages pass after two polls,
+    JS-rendered ones as soon as hydration settles, and slow pages are
+    given up on after CONTENT_READY_TIMEOUT_MS.
+    """
     try:
-        og_title = await page.evaluate(
-            """() => {
-                const meta = document.querySelector('meta[property="og:title"]');
-                return meta ? meta.getAttribute('content') : null;
-            }"""
+        await page.wait_for_function(
+            CONTENT_READY_JS,
+            arg=CONTENT_SELECTORS,
+            polling=CONTENT_READY_POLL_MS,
+            timeout=CONTENT_READY_TIMEOUT_MS,
         )
-        if og_title and og_title.strip():
-            return og_title.strip()
     except Exception:
-        pass
-
-    # Try h1
-    try:
-        h1 = await page.query_selector("h1")
-        if h1:
-            text = await h1.inner_text()
-            if text and text.strip():
-                return text.strip()
-    except Exception:
-        pass
-
-    # Try title tag
-    try:
-        title = await page.title()
-        if title and title.strip():
-            return title.strip()
-    except Exception:
-        pass
-
-    return None
+        logger.debug("Content did not settle within %d ms", CONTENT_READY_TIMEOUT_MS)
+
+
+def _build_result(title: str | None, content_html: str | None) -> dict:
+    """Convert extracted content HTML to Markdown and enforce the size limit."""
+    if not content_html or not content_html.strip():
+        raise Exception("Could not extract article content from the page")
+
+    # Convert HTML to Markdown
+    content_markdown = markdownify(
+        content_html, heading_style="ATX", strip=["img"]
+    )
+    content_markdown = content_markdown.strip()
+
+    if not content_markdown:
+        raise Exception("Article content is empty after conversion")
+
+    # Enforce 200KB limit
+    is_truncated = False
+    content_bytes = content_markdown.encode("utf-8")
+    if len(content_bytes) > MAX_CONTENT_BYTES:
+        truncated = content_bytes[:MAX_CONTENT_BYTES].decode("utf-8", errors="ignore")
+        last_break = truncated.rfind("\n\n")
+        if last_break > 0:
+            content_markdown = truncated[:last_break]
+        else:
+            content_markdown = truncated
+        is_truncated = True
+
+    return {
+        "title": title,
+        "content_markdown": content_markdown,
+        "is_truncated": is_truncated,
+    }
@@ -1,7 +1,11 @@
 """Utilities for detecting authentication-related failures in scraping responses."""
 
+import json
 import re
 
+import lxml.html
+from lxml import etree
+
 # yt-dlp error message patterns that indicate auth/login failures
 _YTDLP_AUTH_PATTERNS = [
     re.compile(r"Sign in to confirm", re.IGNORECASE),
@@ -13,6 +17,16 @@ _YTDLP_AUTH_PATTERNS = [
     re.compile(r"you.re not a bot", re.IGNORECASE),
 ]
 
+# Upstream throttling: HTTP 429, bot checks and IP blocks (yt-dlp and
+# youtube-transcript-api messages)
+_RATE_LIMIT_PATTERNS = [
+    re.compile(r"\b429\b"),
+    re.compile(r"Too Many Requests", re.IGNORECASE),
+    re.compile(r"you.re not a bot", re.IGNORECASE),
+    re.compile(r"blocking requests from your IP", re.IGNORECASE),
+]
+_RATE_LIMIT_ERROR_TYPES = {"RequestBlocked", "IpBlocked"}
+
 # Cloudflare challenge page fingerprints
 _CF_PATTERNS = [
     re.compile(r"<title>\s*Just a moment", re.IGNORECASE),
@@ -42,6 +56,84 @@ def is_auth_error(error: Exception) -> bool:
     return any(p.search(msg) for p in _YTDLP_AUTH_PATTERNS)
 
 
+def is_rate_limited(error: Exception) -> bool:
+    """Check if an exception indicates the upstream is throttling us."""
+    if type(error).__name__ in _RATE_LIMIT_ERROR_TYPES:
+        return True
+    msg = str(error)
+    return any(p.search(msg) for p in _RATE_LIMIT_PATTERNS)
+
+
+# Paywall signals shared by PAYWALL_DETECT_JS (rendered pages) and
+# detect_paywall_html (raw HTML fetched without a browser).
+PAYWALL_CLASS_SELECTORS = [
+    '[class*="metered"]',
+    '[class*="paywall"]', '[class*="Paywall"]',
+    '[class*="gate"]',
+    '[class*="locked"]', '[class*="Locked"]',
+    '[class*="premium"]', '[class*="Premium"]',
+    '[class*="subscriber"]',
+    '[class*="regwall"]',
+    '[class*="leaky"]',
+    '[class*="restrict"]',
+    '[class*="truncat"]',
+    '[class*="content-overlay"]',
+    '[class*="piano"]',
+]
+
+PAYWALL_ATTR_SELECTORS = [
+    '[id*="paywall"]',
+    '[id*="regwall"]',
+    '[id*="piano"]',
+    '[data-testid="paywall"]',
+    '[data-paywall]',
+    '[data-piano-id]',
+    '[data-content-tier="locked"]',
+    '[data-content-tier="metered"]',
+]
+
+PAYWALL_TEXT_SIGNALS = [
+    "Member-only story",
+    "members-only story",
+    "Members only",
+    "Subscribe to read",
+    "Subscribe to continue reading",
+    "Unlock this story",
+    "Unlock this article",
+    "Sign in to read",
+    "Log in to read the full",
+    "Create a free account to read",
+    "This article is for subscribers only",
+    "This content is available to registered users",
+    "Premium content",
+    "Premium article",
+    "Get unlimited access",
+    "Start your free trial",
+    "Already a member? Sign in",
+    "Continue reading with a subscription",
+    "You've reached your limit of free articles",
+    "You have 0 free articles remaining",
+    "Exclusive content",
+    "Paid content",
+    "Read the rest of this story",
+    "Dieser Artikel ist nur für Abonnenten",
+    "Jetzt lesen mit",
+    "Réservé aux abonnés",
+    "Contenu exclusif",
+]
+
+PAYWALL_SERVICES = [
+    "tinypass.com",
+    "cdn.piano.io",
+    "js.pelcro.com",
+    "cdn.cxense.com",
+    "smartwall.io",
+    "poool.fr",
+    "pico.tools",
+    "memberful.com",
+]
+
+
 # Soft-paywall detection: sites that return 200 but serve truncated content
 # when cookies are missing/expired. Checked via Playwright page.evaluate().
 #
@@ -57,65 +149,15 @@ PAYWALL_DETECT_JS = """() => {
     const html = document.documentElement ? document.documentElement.innerHTML : "";
 
     // --- Layer 1: CSS class selectors ---
-    const classSelectors = [
-        '[class*="metered"]',
-        '[class*="paywall"]', '[class*="Paywall"]',
-        '[class*="gate"]',
-        '[class*="locked"]', '[class*="Locked"]',
-        '[class*="premium"]', '[class*="Premium"]',
-        '[class*="subscriber"]',
-        '[class*="regwall"]',
-        '[class*="leaky"]',
-        '[class*="restrict"]',
-        '[class*="truncat"]',
-        '[class*="content-overlay"]',
-        '[class*="piano"]',
-    ];
+    const classSelectors = __CLASS_SELECTORS__;
     const matchedClass = classSelectors.find(s => !!document.querySelector(s));
 
     // --- Layer 2: Data attributes and IDs ---
-    const attrSelectors = [
-        '[id*="paywall"]',
-        '[id*="regwall"]',
-        '[id*="piano"]',
-        '[data-testid="paywall"]',
-        '[data-paywall]',
-        '[data-piano-id]',
-        '[data-content-tier="locked"]',
-        '[data-content-tier="metered"]',
-    ];
+    const attrSelectors = __ATTR_SELECTORS__;
     const matchedAttr = attrSelectors.find(s => !!document.querySelector(s));
 
     // --- Layer 3: Text signals (EN, DE, FR) ---
-    const textSignals = [
-        "Member-only story",
-        "members-only story",
-        "Members only",
-        "Subscribe to read",
-        "Subscribe to continue reading",
-        "Unlock this story",
-        "Unlock this article",
-        "Sign in to read",
-        "Log in to read the full",
-        "Create a free account to read",
-        "This article is for subscribers only",
-        "This content is available to registered users",
-        "Premium content",
-        "Premium article",
-        "Get unlimited access",
-        "Start your free trial",
-        "Already a member? Sign in",
-        "Continue reading with a subscription",
-        "You've reached your limit of free articles",
-        "You have 0 free articles remaining",
-        "Exclusive content",
-        "Paid content",
-        "Read the rest of this story",
-        "Dieser Artikel ist nur für Abonnenten",
-        "Jetzt lesen mit",
-        "Réservé aux abonnés",
-        "Contenu exclusif",
-    ];
+    const textSignals = __TEXT_SIGNALS__;
     const lowerText = text.toLowerCase();
     const matchedText = textSignals.find(s => lowerText.includes(s.toLowerCase()));
 
@@ -142,16 +184,7 @@ PAYWALL_DETECT_JS = """() => {
     }
 
     // --- Layer 5: External paywall service scripts ---
-    const paywallServices = [
-        "tinypass.com",
-        "cdn.piano.io",
-        "js.pelcro.com",
-        "cdn.cxense.com",
-        "smartwall.io",
-        "poool.fr",
-        "pico.tools",
-        "memberful.com",
-    ];
+    const paywallServices = __PAYWALL_SERVICES__;
     const scripts = Array.from(document.querySelectorAll("script[src]"));
     const matchedService = paywallServices.find(svc =>
         scripts.some(sc => (sc.getAttribute("src") || "").includes(svc))
@@ -199,3 +232,86 @@ PAYWALL_DETECT_JS = """() => {
         || "paywall indicators detected";
     return reason;
 }"""
+
+PAYWALL_DETECT_JS = (
+    PAYWALL_DETECT_JS
+    .replace("__CLASS_SELECTORS__", json.dumps(PAYWALL_CLASS_SELECTORS))
+    .replace("__ATTR_SELECTORS__", json.dumps(PAYWALL_ATTR_SELECTORS))
+    .replace("__TEXT_SIGNALS__", json.dumps(PAYWALL_TEXT_SIGNALS, ensure_ascii=False))
+    .replace("__PAYWALL_SERVICES__", json.dumps(PAYWALL_SERVICES))
+)
+
+_READ_TIME_RE = re.compile(r"(\d+)\s*min read", re.IGNORECASE)
+
+
+def detect_paywall_html(html: str) -> str | None:
+    """Static counterpart of PAYWALL_DETECT_JS for raw, unrendered HTML.
+
+    Applies the same layers and the same strong/weak signal rule; returns
+    the reason string or None.
+    """
+    try:
+        doc = lxml.html.fromstring(html)
+    except (ValueError, etree.ParserError):
+        return None
+
+    def first_match(selectors: list[str]) -> str | None:
+        return next((sel for sel in selectors if doc.cssselect(sel)), None)
+
+    matched_class = first_match(PAYWALL_CLASS_SELECTORS)
+    matched_attr = first_match(PAYWALL_ATTR_SELECTORS)
+
+    meta_paywall = any(
+        (meta.get("content") or "").lower() in ("metered", "locked", "premium")
+        for meta in doc.cssselect(
+            'meta[property="article:content_tier"], meta[name="article:content_tier"]'
+        )
+    )
+    if not meta_paywall:
+        for script in doc.cssselect('script[type="application/ld+json"]'):
+            try:
+                ld = json.loads(script.text_content())
+            except ValueError:
+                continue
+            if isinstance(ld, dict) and ld.get("isAccessibleForFree") in (False, "False"):
+                meta_paywall = True
+                break
+
+    script_srcs = [sc.get("src") or "" for sc in doc.cssselect("script[src]")]
+    matched_service = next(
+        (svc for svc in PAYWALL_SERVICES if any(svc in src for src in script_srcs)), None
+    )
+
+    # Text checks run on visible text only (innerText excludes scripts/styles)
+    for el in doc.xpath("//script | //style | //noscript"):
+        el.drop_tree()
+    text = doc.text_content()
+    lower_text = text.lower()
+    matched_text = next((s for s in PAYWALL_TEXT_SIGNALS if s.lower() in lower_text), None)
+
+    truncation_detected = False
+    articles = doc.cssselect("article")
+    read_time = _READ_TIME_RE.search(text)
+    if articles and read_time:
+        expected_words = int(read_time.group(1)) * 230
+        actual_words = len(articles[0].text_content().split())
+        truncation_detected = expected_words > 0 and actual_words < expected_words * 0.3
+    has_gradient = bool(doc.cssselect(
+        '[class*="fade-out"], [class*="gradient-overlay"], [class*="content-fade"]'
+    ))
+    has_blur = bool(doc.cssselect('[class*="blur"]'))
+
+    strong = [matched_text, matched_class, matched_attr, "meta" if meta_paywall else None]
+    weak = [matched_service, truncation_detected or None, has_gradient or None, has_blur or None]
+    if not any(strong) and sum(1 for w in weak if w) < 2:
+        return None
+
+    return (
+        matched_text
+        or (f"paywall class: {matched_class}" if matched_class else None)
+        or (f"paywall element: {matched_attr}" if matched_attr else None)
+        or ("meta content_tier: locked/metered" if meta_paywall else None)
+        or (f"paywall service: {matched_service}" if matched_service else None)
+        or ("content truncated vs read-time" if truncation_detected else None)
+        or "paywall indicators detected"
+    )
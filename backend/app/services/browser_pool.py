@@ -0,0 +1,219 @@
+"""Shared headless Chromium pool for article and documentation scraping.
+
+Launching Chromium costs seconds per page, so scrapers lease pages from an
+application-scoped pool instead. Browsers are launched lazily (at most
+``browser_pool_max_browsers``), concurrent contexts are bounded by
+``browser_pool_max_contexts``, and idle contexts are reused for the same
+cookie set and user agent. A browser is recycled after serving
+``browser_pool_recycle_pages`` pages, and disconnected browsers are
+replaced on the next lease.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import math
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from playwright.async_api import Browser, BrowserContext, Page, async_playwright
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def parse_cookies(cookies_json: str | None) -> list[dict]:
+    """Parse a CookieEntry[] JSON string; invalid input yields no cookies."""
+    if not cookies_json:
+        return []
+    try:
+        cookies = json.loads(cookies_json)
+    except json.JSONDecodeError as e:
+        logger.warning("Failed to parse cookies: %s", e)
+        return []
+    return cookies if isinstance(cookies, list) else []
+
+
+class _BrowserSlot:
+    def __init__(self, browser: Browser):
+        self.browser = browser
+        self.pages_served = 0
+        self.active = 0
+        self.retiring = False
+
+    @property
+    def healthy(self) -> bool:
+        return not self.retiring and self.browser.is_connected()
+
+
+class _PooledContext:
+    def __init__(self, slot: _BrowserSlot, context: BrowserContext, key: tuple):
+        self.slot = slot
+        self.context = context
+        self.key = key
+
+
+class BrowserPool:
+    """Bounded pool of Chromium browsers and reusable browser contexts."""
+
+    def __init__(self, max_browsers: int = 2, max_contexts: int = 6, recycle_after: int = 200):
+        self.max_browsers = max(1, max_browsers)
+        self.max_contexts = max(1, max_contexts)
+        self.recycle_after = recycle_after
+        self._per_browser = math.ceil(self.max_contexts / self.max_browsers)
+        self._playwright = None
+        self._slots: list[_BrowserSlot] = []
+        self._idle: list[_PooledContext] = []
+        self._semaphore = asyncio.Semaphore(self.max_contexts)
+        self._lock = asyncio.Lock()
+
+    async def _launch_browser(self) -> Browser:
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        return await self._playwright.chromium.launch(headless=True)
+
+    async def _close_context(self, pooled: _PooledContext) -> None:
+        try:
+            await pooled.context.close()
+        except Exception:
+            pass
+
+    async def _close_slot(self, slot: _BrowserSlot) -> None:
+        if slot in self._slots:
+            self._slots.remove(slot)
+        try:
+            await slot.browser.close()
+        except Exception:
+            pass
+        logger.info("Closed pooled browser after %d page(s)", slot.pages_served)
+
+    async def _pick_slot(self) -> _BrowserSlot:
+        for slot in list(self._slots):
+            if not slot.browser.is_connected():
+                logger.warning("Pooled browser disconnected; replacing it")
+                slot.retiring = True
+                await self._close_slot(slot)
+        live = [s for s in self._slots if s.healthy]
+        least_busy = min(live, key=lambda s: s.active, default=None)
+        if least_busy is None or (
+            least_busy.active >= self._per_browser and len(self._slots) < self.max_browsers
+        ):
+            slot = _BrowserSlot(await self._launch_browser())
+            self._slots.append(slot)
+            logger.info("Launched pooled browser (%d open)", len(self._slots))
+            return slot
+        return least_busy
+
+    async def _acquire(self, key: tuple, cookies: list[dict], user_agent: str | None) -> _PooledContext:
+        async with self._lock:
+            for pooled in reversed(self._idle):
+                if pooled.key == key and pooled.slot.healthy:
+                    self._idle.remove(pooled)
+                    pooled.slot.active += 1
+                    return pooled
+
+            # Keep open contexts (idle + leased) within max_contexts
+            while self._idle and len(self._idle) + self._leased() >= self.max_contexts:
+                await self._close_context(self._idle.pop(0))
+
+            slot = await self._pick_slot()
+            context = await slot.browser.new_context(user_agent=user_agent)
+            if cookies:
+                try:
+                    await context.add_cookies(cookies)
+                except Exception as e:
+                    logger.warning("Failed to inject cookies: %s", e)
+            slot.active += 1
+            return _PooledContext(slot, context, key)
+
+    def _leased(self) -> int:
+        return sum(s.active for s in self._slots)
+
+    async def _release(self, pooled: _PooledContext) -> None:
+        async with self._lock:
+            slot = pooled.slot
+            slot.active -= 1
+            slot.pages_served += 1
+            if self.recycle_after and slot.pages_served >= self.recycle_after:
+                slot.retiring = True
+
+            if slot.healthy:
+                if not pooled.key[0]:
+                    # Anonymous contexts must not carry one site's session into the next lease
+                    try:
+                        await pooled.context.clear_cookies()
+                    except Exception:
+                        pass
+                self._idle.append(pooled)
+            else:
+                await self._close_context(pooled)
+
+            if slot.retiring and slot.active == 0:
+                for idle in [p for p in self._idle if p.slot is slot]:
+                    self._idle.remove(idle)
+                    await self._close_context(idle)
+                await self._close_slot(slot)
+
+    @asynccontextmanager
+    async def page(
+        self, cookies_json: str | None = None, user_agent: str | None = None
+    ) -> AsyncIterator[Page]:
+        """Lease a fresh page in a pooled context for the given cookie set.
+
+        The page is closed on exit; its context goes back to the pool.
+        """
+        cookies = parse_cookies(cookies_json)
+        cookie_key = (
+            hashlib.sha256(json.dumps(cookies, sort_keys=True).encode()).hexdigest()
+            if cookies else ""
+        )
+        key = (cookie_key, user_agent)
+
+        async with self._semaphore:
+            pooled = await self._acquire(key, cookies, user_agent)
+            page = None
+            try:
+                page = await pooled.context.new_page()
+                yield page
+            finally:
+                if page is not None:
+                    try:
+                        await page.close()
+                    except Exception:
+                        pass
+                await self._release(pooled)
+
+    async def close(self) -> None:
+        """Close all contexts, browsers and the Playwright driver."""
+        async with self._lock:
+            for pooled in self._idle:
+                await self._close_context(pooled)
+            self._idle.clear()
+            for slot in list(self._slots):
+                await self._close_slot(slot)
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+
+_browser_pool: BrowserPool | None = None
+
+
+def get_browser_pool() -> BrowserPool:
+    global _browser_pool
+    if _browser_pool is None:
+        _browser_pool = BrowserPool(
+            max_browsers=settings.browser_pool_max_browsers,
+            max_contexts=settings.browser_pool_max_contexts,
+            recycle_after=settings.browser_pool_recycle_pages,
+        )
+    return _browser_pool
+
+
+async def close_browser_pool() -> None:
+    global _browser_pool
+    if _browser_pool is not None:
+        await _browser_pool.close()
+        _browser_pool = None
@@ -1,5 +1,6 @@
 import logging
 import re
+import threading
 import warnings
 from collections.abc import AsyncGenerator
 
@@ -11,15 +12,19 @@ warnings.filterwarnings(
     category=DeprecationWarning,
 )
 
-from langchain_openai import ChatOpenAI
+from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+from langgraph.graph.state import CompiledStateGraph
 from langgraph.prebuilt import create_react_agent
 from supabase import Client
 
 from app.config import Settings
 from app.models.chat import ChatMessage
-from app.services.agent_tools import make_kb_search_tool, make_web_search_tool
-from app.services.query_reformulation import reformulate_query
+from app.services.agent_tools import KBSearchContext, search_knowledge_base, web_search
+from app.services.answer_cache import CachedAnswer, answer_scope, get_answer_cache, replay_tokens
+from app.services.clients import get_clients
+from app.services.retrieval import search_with_reformulation
+from app.services.user_settings import get_user_settings_cache
 from app.services.vectorstore import get_user_vectorstore
 from app.services.web_search_limiter import WebSearchLimiter
 
@@ -59,6 +64,28 @@ IMPORTANT RULES:
 # URL extraction pattern
 URL_PATTERN = re.compile(r'https?://[^\s\])\'">,]+')
 
+_agent_graphs: dict[tuple, CompiledStateGraph] = {}
+_agent_graphs_lock = threading.Lock()
+
+
+def get_agent_graph(llm: BaseChatModel, web_search_enabled: bool) -> CompiledStateGraph:
+    """Return the compiled ReAct graph for a tool configuration.
+
+    Graphs are built once per (shared chat model, tool set) and reused by
+    all requests; per-request bindings travel in the run config (see
+    agent_tools). The cached graph references *llm*, so its id stays unique.
+    """
+    key = (id(llm), web_search_enabled)
+    with _agent_graphs_lock:
+        graph = _agent_graphs.get(key)
+        if graph is None:
+            tools = [search_knowledge_base]
+            if web_search_enabled:
+                tools.append(web_search)
+            graph = create_react_agent(model=llm, tools=tools, prompt=EXTENDED_SYSTEM_PROMPT)
+            _agent_graphs[key] = graph
+        return graph
+
 
 class AgentChatService:
     def __init__(
@@ -70,66 +97,56 @@ class AgentChatService:
         self.settings = settings
         self.supabase = supabase
         self.web_search_limiter = web_search_limiter
-        self.llm = ChatOpenAI(
-            model=settings.chat_model,
-            max_tokens=settings.chat_max_tokens,
-            openai_api_key=settings.openai_api_key,
-            streaming=True,
+        self.llm = get_clients().chat_model(
+            settings, settings.chat_model, settings.chat_max_tokens, streaming=True
         )
 
-    def _check_deep_memory(self, user_id: str) -> bool:
-        """Check if Deep Memory is enabled for this user."""
-        if not self.supabase:
-            return False
-        try:
-            result = self.supabase.table("deep_memory_settings").select(
-                "enabled"
-            ).eq("user_id", user_id).execute()
-            if result.data:
-                return result.data[0]["enabled"]
-        except Exception:
-            pass
-        return False
+    async def _check_deep_memory(self, user_id: str) -> bool:
+        """Check if Deep Memory is enabled for this user (cached, see user_settings)."""
+        user_settings = await get_user_settings_cache().aload(user_id, self.supabase)
+        return user_settings.deep_memory
+
+    @staticmethod
+    def _build_context(results: list[tuple]) -> tuple[str, list[str]]:
+        """Format (doc, score) results into a context block and unique source URLs."""
+        context_parts = []
+        sources = []
+        for i, (doc, score) in enumerate(results):
+            meta = doc.metadata or {}
+            title = meta.get("title", meta.get("page_title", "Unknown"))
+            source_url = meta.get("source", "")
+            context_parts.append(
+                f"[Source {i + 1}: {title} (relevance: {score:.2f})]\n{doc.page_content}"
+            )
+            if source_url and source_url not in sources:
+                sources.append(source_url)
+        return "\n\n".join(context_parts), sources
 
     async def _fast_path_check(
         self, query: str, user_id: str, deep_memory: bool
-    ) -> tuple[bool, str, list[str]]:
+    ) -> tuple[bool, list[tuple] | None]:
         """Check if KB has a high-confidence result to skip the agent loop.
 
-        Returns (should_fast_path, context, sources).
+        Runs a single top-k retrieval and decides on confidence from the top
+        score, so the fast path reuses the same result set for its context.
+
+        Returns (should_fast_path, results). Results are also returned on a
+        miss so they can seed the agent's first KB search; they are None when
+        the fast path is disabled and no retrieval ran.
         """
         threshold = self.settings.rag_confidence_threshold
         if threshold >= 1.0:
-            return False, "", []
+            return False, None
 
         vectorstore = get_user_vectorstore(user_id, self.settings)
-        results = await vectorstore.similarity_search(
-            query=query, k=1, score_threshold=threshold, deep_memory=deep_memory,
-        )
-        if not results:
-            return False, "", []
-
-        # Top result is above threshold — use fast path with full retrieval
         results = await vectorstore.similarity_search(
             query=query,
             k=self.settings.rag_retrieval_k,
             score_threshold=self.settings.rag_score_threshold,
             deep_memory=deep_memory,
         )
-        context_parts = []
-        sources = []
-        for i, (doc, score) in enumerate(results):
-            meta = doc.metadata or {}
-            title = meta.get("title", meta.get("page_title", "Unknown"))
-            source_url = meta.get("source", "")
-            context_parts.append(
-                f"[Source {i + 1}: {title} (relevance: {score:.2f})]\n{doc.page_content}"
-            )
-            if source_url and source_url not in sources:
-                sources.append(source_url)
-
-        context = "\n\n".join(context_parts)
-        return True, context, sources
+        top_score = max((score for _, score in results), default=0.0)
+        return top_score >= threshold, results
 
     async def _stream_fast_path(
         self, message: str, history: list[ChatMessage], context: str, sources: list[str]
@@ -166,30 +183,45 @@ class AgentChatService:
     async def _stream_kb_only(
         self, message: str, history: list[ChatMessage], user_id: str, deep_memory: bool
     ) -> AsyncGenerator[dict, None]:
-        """KB-only mode: search KB, pass as context, LLM answers strictly from context."""
-        search_query = await reformulate_query(message, self.settings)
+        """KB-only mode: search KB, pass as context, LLM answers strictly from context.
+
+        Answers to questions similar to an earlier one (same KB version, mode
+        and history) are replayed from the answer cache.
+        """
         vectorstore = get_user_vectorstore(user_id, self.settings)
-        results = await vectorstore.similarity_search(
-            query=search_query,
+        cache = get_answer_cache(self.settings)
+        kb_version = ""
+        if cache is not None:
+            user_settings = await get_user_settings_cache().aload(user_id, self.supabase)
+            kb_version = user_settings.kb_version
+        if kb_version:
+            scope = answer_scope("kb_only", deep_memory, history)
+            query_vector = await vectorstore.embeddings.aembed_query(message)
+            cached = cache.lookup(user_id, kb_version, scope, query_vector)
+            if cached is not None:
+                logger.info("KB-only answer served from cache for user %s", user_id)
+                for token in replay_tokens(cached.text):
+                    yield {"token": token}
+                yield {
+                    "done": True,
+                    "sources": list(cached.sources),
+                    "source_types": ["kb"] * len(cached.sources),
+                    "kb_relevant": cached.kb_relevant,
+                    "full_response": cached.text,
+                }
+                return
+
+        results = await search_with_reformulation(
+            message,
+            vectorstore,
+            self.settings,
             k=self.settings.rag_retrieval_k,
             score_threshold=self.settings.rag_score_threshold,
             deep_memory=deep_memory,
         )
 
-        context_parts = []
-        sources = []
-        top_score = 0.0
-        for i, (doc, score) in enumerate(results):
-            if i == 0:
-                top_score = score
-            meta = doc.metadata or {}
-            title = meta.get("title", meta.get("page_title", "Unknown"))
-            source_url = meta.get("source", "")
-            context_parts.append(
-                f"[Source {i + 1}: {title} (relevance: {score:.2f})]\n{doc.page_content}"
-            )
-            if source_url and source_url not in sources:
-                sources.append(source_url)
+        context, sources = self._build_context(results)
+        top_score = max((score for _, score in results), default=0.0)
 
         # Determine relevance from vectorstore scores
         if not results:
@@ -202,7 +234,6 @@ class AgentChatService:
             kb_relevant = False
             system_content = KB_ONLY_LOW_RELEVANCE_PROMPT
 
-        context = "\n\n".join(context_parts) if context_parts else ""
         if context:
             system_content += f"\n\nContext:\n{context}"
 
@@ -221,6 +252,11 @@ class AgentChatService:
                 full_response += token
                 yield {"token": token}
 
+        if kb_version and full_response:
+            cache.put(user_id, kb_version, scope, query_vector, CachedAnswer(
+                text=full_response, sources=tuple(sources), kb_relevant=kb_relevant,
+            ))
+
         yield {
             "done": True,
             "sources": sources,
@@ -237,7 +273,7 @@ class AgentChatService:
         extended_search: bool = False,
     ) -> AsyncGenerator[dict, None]:
         """Stream the agentic RAG response."""
-        deep_memory = self._check_deep_memory(user_id)
+        deep_memory = await self._check_deep_memory(user_id)
 
         # KB-only mode: no agent loop, strict KB context
         if not extended_search:
@@ -247,34 +283,34 @@ class AgentChatService:
             return
 
         # Fast path: skip agent loop for high-confidence KB hits
-        should_fast_path, context, sources = await self._fast_path_check(
+        should_fast_path, kb_results = await self._fast_path_check(
             message, user_id, deep_memory
         )
         if should_fast_path:
             logger.info("Fast path: high-confidence KB hit for user %s", user_id)
+            context, sources = self._build_context(kb_results)
             async for chunk in self._stream_fast_path(message, history, context, sources):
                 yield chunk
             return
 
-        # Build agent tools
-        vectorstore = get_user_vectorstore(user_id, self.settings)
-        tools = [make_kb_search_tool(vectorstore, deep_memory=deep_memory, settings=self.settings)]
-
         web_search_available = self.settings.serper_api_key is not None
         if web_search_available and self.web_search_limiter:
             if not self.web_search_limiter.is_allowed(user_id):
                 logger.info("Web search rate limit hit for user %s", user_id)
                 web_search_available = False
 
-        if web_search_available:
-            tools.append(make_web_search_tool(self.settings.serper_api_key))
-
-        # Create agent
-        agent = create_react_agent(
-            model=self.llm,
-            tools=tools,
-            prompt=EXTENDED_SYSTEM_PROMPT,
-        )
+        agent = get_agent_graph(self.llm, web_search_available)
+        # Per-request tool bindings — the fast-path retrieval seeds the first KB search
+        run_config = {"configurable": {
+            "kb_search": KBSearchContext(
+                vectorstore=get_user_vectorstore(user_id, self.settings),
+                deep_memory=deep_memory,
+                settings=self.settings,
+                seed_query=message,
+                seed_results=kb_results,
+            ),
+            "serper_api_key": self.settings.serper_api_key,
+        }}
 
         # Build input messages
         input_messages = []
@@ -291,7 +327,7 @@ class AgentChatService:
         web_sources: list[str] = []
 
         async for chunk, metadata in agent.astream(
-            {"messages": input_messages}, stream_mode="messages"
+            {"messages": input_messages}, config=run_config, stream_mode="messages"
         ):
             # Skip tool call messages and tool outputs
             if metadata.get("langgraph_node") == "tools":
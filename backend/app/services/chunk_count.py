@@ -1,13 +1,16 @@
 """Cached chunk count helpers.
 
 Keeps `deep_memory_settings.total_chunks` in sync whenever chunks are
-added to or removed from the DeepLake vector store.
+added to or removed from the DeepLake vector store, and updates the
+process-wide user settings cache to match.
 """
 
 from datetime import datetime, timezone
 
 from supabase import Client
 
+from app.services.user_settings import get_user_settings_cache
+
 
 def update_cached_chunk_count(supabase: Client, user_id: str, delta: int) -> None:
     """Increment (or decrement) the cached chunk count for a user.
@@ -36,12 +39,14 @@ def update_cached_chunk_count(supabase: Client, user_id: str, delta: int) -> Non
             "updated_at": now,
         }).eq("user_id", user_id).execute()
     else:
+        new_value = max(delta, 0)
         supabase.table("deep_memory_settings").insert({
             "user_id": user_id,
-            "total_chunks": max(delta, 0),
+            "total_chunks": new_value,
             "enabled": False,
             "updated_at": now,
         }).execute()
+    get_user_settings_cache().update(user_id, total_chunks=new_value, kb_version=now)
 
 
 def reset_cached_chunk_count(supabase: Client, user_id: str) -> None:
@@ -53,7 +58,9 @@ def reset_cached_chunk_count(supabase: Client, user_id: str) -> None:
         .execute()
     )
     if existing.data:
+        now = datetime.now(timezone.utc).isoformat()
         supabase.table("deep_memory_settings").update({
             "total_chunks": 0,
-            "updated_at": datetime.now(timezone.utc).isoformat(),
+            "updated_at": now,
         }).eq("user_id", user_id).execute()
+        get_user_settings_cache().update(user_id, total_chunks=0, kb_version=now)
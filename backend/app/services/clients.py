@@ -0,0 +1,134 @@
+"""Application-scoped API clients with pooled keep-alive connections.
+
+Services used to build a new ChatOpenAI, AsyncOpenAI or Serper wrapper per
+request (or per call), paying for connection setup and a TLS handshake on
+the chat hot path. The ClientRegistry is created at startup and closed at
+shutdown (see main.lifespan). All OpenAI clients share one sync and one
+async httpx connection pool, Serper calls share one aiohttp session, and
+clients are cached by configuration, so services just ask for the model
+they need.
+"""
+
+import logging
+import threading
+from collections.abc import Callable
+from typing import Any
+
+import aiohttp
+import httpx
+from langchain_community.utilities import GoogleSerperAPIWrapper
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from openai import AsyncOpenAI
+
+from app.config import Settings
+
+logger = logging.getLogger(__name__)
+
+# Per-request timeouts are set by the OpenAI SDK; these are the pool defaults
+HTTP_TIMEOUT = 600.0
+CONNECT_TIMEOUT = 10.0
+
+
+class ClientRegistry:
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        limits = httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_seconds,
+        )
+        timeout = httpx.Timeout(HTTP_TIMEOUT, connect=CONNECT_TIMEOUT)
+        self.http = httpx.Client(limits=limits, timeout=timeout)
+        self.async_http = httpx.AsyncClient(limits=limits, timeout=timeout)
+        self._aiohttp: aiohttp.ClientSession | None = None
+        self._clients: dict[tuple, Any] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key: tuple, factory: Callable[[], Any]) -> Any:
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = factory()
+                self._clients[key] = client
+            return client
+
+    def chat_model(
+        self,
+        settings: Settings,
+        model: str,
+        max_tokens: int,
+        streaming: bool = False,
+        temperature: float | None = None,
+    ) -> ChatOpenAI:
+        """Shared ChatOpenAI for this configuration (safe for concurrent use)."""
+        key = ("chat", settings.openai_api_key, model, max_tokens, streaming, temperature)
+        return self._get(key, lambda: ChatOpenAI(
+            model=model,
+            max_tokens=max_tokens,
+            openai_api_key=settings.openai_api_key,
+            streaming=streaming,
+            temperature=temperature,
+            http_client=self.http,
+            http_async_client=self.async_http,
+        ))
+
+    def openai(self, api_key: str) -> AsyncOpenAI:
+        return self._get(
+            ("openai", api_key), lambda: AsyncOpenAI(api_key=api_key, http_client=self.async_http)
+        )
+
+    def embeddings(self, model: str, api_key: str, chunk_size: int) -> OpenAIEmbeddings:
+        return self._get(("embeddings", model, api_key, chunk_size), lambda: OpenAIEmbeddings(
+            model=model,
+            openai_api_key=api_key,
+            chunk_size=chunk_size,
+            http_client=self.http,
+            http_async_client=self.async_http,
+        ))
+
+    def serper(self, api_key: str, k: int = 3) -> GoogleSerperAPIWrapper:
+        """Shared Serper wrapper; call from the event loop (it owns an aiohttp session)."""
+        with self._lock:
+            if self._aiohttp is None or self._aiohttp.closed:
+                self._aiohttp = aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(
+                        limit=self.settings.http_max_connections,
+                        keepalive_timeout=self.settings.http_keepalive_seconds,
+                    )
+                )
+            session = self._aiohttp
+        return self._get(
+            ("serper", api_key, k, id(session)),
+            lambda: GoogleSerperAPIWrapper(serper_api_key=api_key, k=k, aiosession=session),
+        )
+
+    async def aclose(self) -> None:
+        with self._lock:
+            self._clients.clear()
+            session, self._aiohttp = self._aiohttp, None
+        if session is not None:
+            await session.close()
+        await self.async_http.aclose()
+        self.http.close()
+
+
+_registry: ClientRegistry | None = None
+_registry_lock = threading.Lock()
+
+
+def get_clients() -> ClientRegistry:
+    """Return the application's client registry (created on first use if needed)."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            from app.config import settings
+            _registry = ClientRegistry(settings)
+        return _registry
+
+
+async def close_clients() -> None:
+    global _registry
+    with _registry_lock:
+        registry, _registry = _registry, None
+    if registry is not None:
+        await registry.aclose()
@@ -5,6 +5,8 @@ from urllib.parse import urlparse
 
 from supabase import Client
 
+from app.services import db
+
 logger = logging.getLogger(__name__)
 
 
@@ -64,17 +66,16 @@ async def get_cookies_for_domain(
         domains_to_try = [domain] + _get_parent_domains(domain)
 
         for d in domains_to_try:
-            result = (
+            result = await db.execute(
                 supabase.table("user_cookies")
                 .select("id, domain, file_path")
                 .eq("user_id", user_id)
                 .eq("domain", d)
-                .execute()
             )
             if result.data:
                 row = result.data[0]
-                file_bytes = supabase.storage.from_("cookie-files").download(
-                    row["file_path"]
+                file_bytes = await db.run(
+                    supabase.storage.from_("cookie-files").download, row["file_path"]
                 )
                 cookie_content = file_bytes.decode("utf-8")
                 logger.info(
@@ -0,0 +1,134 @@
+"""Process-wide pool of opened DeepLake vector stores.
+
+Opening a per-user dataset (especially on DeepLake Cloud) dominates the
+latency of a chat turn, so opened handles are kept and reused across
+requests. Read-only and writable handles are pooled separately; after a
+write, the read-only handle for the same dataset is refreshed on its next
+lease so readers see the new commit.
+"""
+
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from langchain_deeplake import DeeplakeVectorStore
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PoolEntry:
+    store: DeeplakeVectorStore
+    last_used: float
+    stale: bool = False
+
+
+class DatasetPool:
+    """LRU-bounded pool of opened DeeplakeVectorStore handles.
+
+    Entries are keyed by ``(dataset_path, read_only)``. Handles idle for
+    longer than *idle_seconds* are evicted on the next access, and the pool
+    never holds more than *max_size* handles.
+    """
+
+    def __init__(self, max_size: int = 32, idle_seconds: float = 900):
+        self.max_size = max_size
+        self.idle_seconds = idle_seconds
+        self._entries: OrderedDict[tuple[str, bool], _PoolEntry] = OrderedDict()
+        # Held by writers only for the duration of a write, so idle paths
+        # do not keep a lock each
+        self._write_locks: weakref.WeakValueDictionary[str, threading.Lock] = (
+            weakref.WeakValueDictionary()
+        )
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        dataset_path: str,
+        read_only: bool,
+        factory: Callable[[], DeeplakeVectorStore],
+    ) -> DeeplakeVectorStore:
+        """Return a pooled handle, opening it with *factory* on a miss.
+
+        Exceptions raised by *factory* (e.g. dataset does not exist) are
+        propagated and nothing is cached.
+        """
+        key = (dataset_path, read_only)
+        with self._lock:
+            self._evict_idle()
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                entry.last_used = time.monotonic()
+
+        if entry is not None and (not entry.stale or self._refresh(key, entry)):
+            return entry.store
+
+        store = factory()
+        with self._lock:
+            existing = self._entries.get(key)
+            if existing is not None:
+                # Another thread opened the same dataset concurrently — keep theirs
+                return existing.store
+            self._entries[key] = _PoolEntry(store=store, last_used=time.monotonic())
+            while len(self._entries) > self.max_size:
+                evicted_key, _ = self._entries.popitem(last=False)
+                logger.debug("Evicted LRU dataset handle %s", evicted_key)
+        return store
+
+    def write_lock(self, dataset_path: str) -> threading.Lock:
+        """Return the lock serializing writes to the dataset at *dataset_path*.
+
+        Keep the returned lock referenced while writing (``with
+        pool.write_lock(path):``); it is dropped once no caller holds it.
+        """
+        with self._lock:
+            lock = self._write_locks.get(dataset_path)
+            if lock is None:
+                lock = threading.Lock()
+                self._write_locks[dataset_path] = lock
+            return lock
+
+    def mark_written(self, dataset_path: str) -> None:
+        """Flag the read-only handle for *dataset_path* as needing a refresh."""
+        with self._lock:
+            entry = self._entries.get((dataset_path, True))
+            if entry is not None:
+                entry.stale = True
+
+    def invalidate(self, dataset_path: str) -> None:
+        """Drop both read-only and writable handles for *dataset_path*."""
+        with self._lock:
+            for read_only in (True, False):
+                self._entries.pop((dataset_path, read_only), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _refresh(self, key: tuple[str, bool], entry: _PoolEntry) -> bool:
+        """Pull the latest commit into a stale handle. Returns False if it must be reopened."""
+        try:
+            entry.store.dataset.refresh()
+            entry.stale = False
+            return True
+        except Exception as e:
+            logger.warning("Failed to refresh dataset %s, reopening: %s", key[0], e)
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            return False
+
+    def _evict_idle(self) -> None:
+        """Drop handles idle longer than idle_seconds. Caller holds the lock."""
+        cutoff = time.monotonic() - self.idle_seconds
+        for key in [k for k, e in self._entries.items() if e.last_used < cutoff]:
+            del self._entries[key]
+            logger.debug("Evicted idle dataset handle %s", key)
@@ -0,0 +1,68 @@
+"""Non-blocking access to the synchronous Supabase client.
+
+supabase-py's ``.execute()`` (and storage calls) do blocking HTTP. Called
+directly from ``async def`` routes and background coroutines, each query
+stalls the event loop, and with it every SSE stream and chat token on the
+worker. Async code goes through this module instead:
+
+- ``await db.execute(query)`` runs a built PostgREST query;
+- ``await db.run(fn, *args)`` runs a sync helper that issues several calls
+  (e.g. chunk_count.update_cached_chunk_count).
+
+Both use a dedicated thread pool bounded by ``supabase_max_workers``. It is
+separate from asyncio's default executor, so ingestion work offloaded with
+``asyncio.to_thread`` (embedding, DeepLake writes, transcription) cannot
+starve database calls, and a burst of queries cannot exhaust the pool the
+ingestion work needs. Sync code that already runs in a worker thread calls
+``.execute()`` directly.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            from app.config import settings
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.supabase_max_workers,
+                thread_name_prefix="supabase",
+            )
+        return _executor
+
+
+async def run(fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+    """Call ``fn(*args, **kwargs)`` on the Supabase thread pool."""
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, fn, *args, **kwargs)
+    return await loop.run_in_executor(_get_executor(), call)
+
+
+async def execute(query: Any) -> Any:
+    """Run ``query.execute()`` on the Supabase thread pool and return the response."""
+    return await run(query.execute)
+
+
+def shutdown() -> None:
+    """Stop the pool, waiting for in-flight queries (see main.lifespan)."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
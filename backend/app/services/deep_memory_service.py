@@ -8,7 +8,9 @@ from supabase import Client
 
 from app.config import Settings
 from app.models.knowledge import JobStatus
+from app.services import db
 from app.services.job_manager import JobManager
+from app.services.user_settings import get_user_settings_cache
 from app.services.vectorstore import get_user_vectorstore
 
 logger = logging.getLogger(__name__)
@@ -24,9 +26,9 @@ async def train_deep_memory(
     """Background task: train Deep Memory model with generated pairs."""
     try:
         # Update status to training
-        supabase.table("deep_memory_training_runs").update({
+        await db.execute(supabase.table("deep_memory_training_runs").update({
             "status": "training",
-        }).eq("id", training_run_id).execute()
+        }).eq("id", training_run_id))
 
         job_manager.update_job(
             job_id,
@@ -35,30 +37,30 @@ async def train_deep_memory(
         )
 
         # Load pairs for this run
-        pairs_result = supabase.table("deep_memory_training_pairs").select(
+        pairs_result = await db.execute(supabase.table("deep_memory_training_pairs").select(
             "question_text, chunk_id, relevance_score"
-        ).eq("training_run_id", training_run_id).execute()
+        ).eq("training_run_id", training_run_id))
 
         current_pairs = pairs_result.data or []
         if not current_pairs:
             raise ValueError("No training pairs found for this run")
 
         # Also load pairs from ALL previous completed runs (merge for full corpus training)
-        run_result = supabase.table("deep_memory_training_runs").select(
-            "user_id"
-        ).eq("id", training_run_id).execute()
+        run_result = await db.execute(
+            supabase.table("deep_memory_training_runs").select("user_id").eq("id", training_run_id)
+        )
         user_id = run_result.data[0]["user_id"]
 
-        completed_runs = supabase.table("deep_memory_training_runs").select(
+        completed_runs = await db.execute(supabase.table("deep_memory_training_runs").select(
             "id"
-        ).eq("user_id", user_id).eq("status", "completed").execute()
+        ).eq("user_id", user_id).eq("status", "completed"))
         completed_run_ids = [r["id"] for r in (completed_runs.data or [])]
 
         historical_pairs = []
         if completed_run_ids:
-            hist_result = supabase.table("deep_memory_training_pairs").select(
+            hist_result = await db.execute(supabase.table("deep_memory_training_pairs").select(
                 "question_text, chunk_id, relevance_score"
-            ).in_("training_run_id", completed_run_ids).execute()
+            ).in_("training_run_id", completed_run_ids))
             historical_pairs = hist_result.data or []
 
         pairs = current_pairs + historical_pairs
@@ -82,9 +84,9 @@ async def train_deep_memory(
             test_relevance = []
 
         # Update pair_count to reflect merged total
-        supabase.table("deep_memory_training_runs").update({
+        await db.execute(supabase.table("deep_memory_training_runs").update({
             "pair_count": len(all_queries),
-        }).eq("id", training_run_id).execute()
+        }).eq("id", training_run_id))
 
         job_manager.update_job(
             job_id,
@@ -105,9 +107,9 @@ async def train_deep_memory(
         )
 
         # Store deeplake job ID
-        supabase.table("deep_memory_training_runs").update({
+        await db.execute(supabase.table("deep_memory_training_runs").update({
             "deeplake_job_id": str(deeplake_job_id),
-        }).eq("id", training_run_id).execute()
+        }).eq("id", training_run_id))
 
         # Poll status with exponential backoff and overall timeout
         backoff = 5
@@ -173,25 +175,26 @@ async def train_deep_memory(
             logger.info("Skipping evaluation: too few pairs for meaningful held-out split")
 
         # Update training run as completed
-        supabase.table("deep_memory_training_runs").update({
+        await db.execute(supabase.table("deep_memory_training_runs").update({
             "status": "completed",
             "metrics": metrics,
             "completed_at": datetime.now(timezone.utc).isoformat(),
-        }).eq("id", training_run_id).execute()
+        }).eq("id", training_run_id))
 
         # Get user_id for settings update
-        run_result = supabase.table("deep_memory_training_runs").select(
-            "user_id"
-        ).eq("id", training_run_id).execute()
+        run_result = await db.execute(
+            supabase.table("deep_memory_training_runs").select("user_id").eq("id", training_run_id)
+        )
         user_id = run_result.data[0]["user_id"]
 
         # Upsert deep_memory_settings
-        supabase.table("deep_memory_settings").upsert({
+        await db.execute(supabase.table("deep_memory_settings").upsert({
             "user_id": user_id,
             "last_trained_at": datetime.now(timezone.utc).isoformat(),
             "last_training_run_id": training_run_id,
             "updated_at": datetime.now(timezone.utc).isoformat(),
-        }, on_conflict="user_id").execute()
+        }, on_conflict="user_id"))
+        get_user_settings_cache().invalidate(user_id)
 
         job_manager.update_job(
             job_id,
@@ -205,10 +208,10 @@ async def train_deep_memory(
 
     except Exception as e:
         logger.error(f"Deep Memory training failed: {traceback.format_exc()}")
-        supabase.table("deep_memory_training_runs").update({
+        await db.execute(supabase.table("deep_memory_training_runs").update({
             "status": "training_failed",
             "error_message": str(e)[:500],
-        }).eq("id", training_run_id).execute()
+        }).eq("id", training_run_id))
 
         job_manager.update_job(
             job_id,
@@ -1,12 +1,13 @@
-import json
 import logging
 import re
 from urllib.parse import urljoin, urlparse
 
-from openai import AsyncOpenAI
-from playwright.async_api import async_playwright, Page
+from playwright.async_api import Page
 
 from app.config import settings
+from app.services.browser_pool import get_browser_pool, parse_cookies
+from app.services.clients import get_clients
+from app.services.resource_blocker import block_heavy_resources
 
 logger = logging.getLogger(__name__)
 
@@ -143,7 +144,7 @@ async def _filter_links_with_llm(
     base_domain = urlparse(base_url).hostname
 
     try:
-        client = AsyncOpenAI(api_key=settings.openai_api_key)
+        client = get_clients().openai(settings.openai_api_key)
         response = await client.chat.completions.create(
             model=settings.doc_link_filter_model,
             messages=[
@@ -234,23 +235,10 @@ async def discover_pages(
     if not scope_path.endswith("/"):
         scope_path += "/"
 
-    browser = None
-    try:
-        pw = await async_playwright().start()
-        browser = await pw.chromium.launch(headless=True)
-        context = await browser.new_context()
-
-        has_cookies = False
-        if cookies_json:
-            try:
-                cookies = json.loads(cookies_json)
-                if cookies:
-                    await context.add_cookies(cookies)
-                    has_cookies = True
-            except (json.JSONDecodeError, Exception) as e:
-                logger.warning("Failed to parse/inject cookies: %s", e)
-
-        page = await context.new_page()
+    has_cookies = bool(parse_cookies(cookies_json))
+
+    async with get_browser_pool().page(cookies_json) as page:
+        await block_heavy_resources(page, url)
         await page.goto(url, timeout=15_000, wait_until="domcontentloaded")
 
         title = await page.title() or ""
@@ -274,24 +262,17 @@ async def discover_pages(
                 links, url, base_domain
             )
 
-        await page.close()
-        await context.close()
-
-        total_found = len(pages)
-        truncated = total_found > MAX_PAGES
-        original_count = total_found if truncated else None
-
-        return {
-            "entry_url": url,
-            "scope_path": scope_path,
-            "site_name": site_name or "Documentation",
-            "pages": pages[:MAX_PAGES],
-            "total_count": min(total_found, MAX_PAGES),
-            "truncated": truncated,
-            "original_count": original_count,
-            "has_cookies": has_cookies,
-        }
-
-    finally:
-        if browser:
-            await browser.close()
+    total_found = len(pages)
+    truncated = total_found > MAX_PAGES
+    original_count = total_found if truncated else None
+
+    return {
+        "entry_url": url,
+        "scope_path": scope_path,
+        "site_name": site_name or "Documentation",
+        "pages": pages[:MAX_PAGES],
+        "total_count": min(total_found, MAX_PAGES),
+        "truncated": truncated,
+        "original_count": original_count,
+        "has_cookies": has_cookies,
+    }
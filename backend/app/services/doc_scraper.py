@@ -6,11 +6,13 @@ from supabase import Client
 from app.config import Settings
 from app.models.documentation import DocScrapeJob
 from app.models.knowledge import JobStatus
+from app.services import db
 from app.services.article_scraper import scrape_article
 from app.services.chunk_count import update_cached_chunk_count
 from app.models.errors import AuthenticationError
 from app.services.cookie_service import clear_cookie_failure, get_cookies_for_domain, mark_cookie_failed
 from app.services.job_manager import JobManager
+from app.services.resource_blocker import BlockStats
 from app.services.vectorstore import get_user_vectorstore
 
 logger = logging.getLogger(__name__)
@@ -41,9 +43,9 @@ async def scrape_collection(
     job_manager._notify(job_id, doc_job)
 
     # Update collection status to scraping
-    supabase.table("doc_collections").update(
-        {"status": "scraping"}
-    ).eq("id", collection_id).execute()
+    await db.execute(
+        supabase.table("doc_collections").update({"status": "scraping"}).eq("id", collection_id)
+    )
 
     # Fetch cookies once for all pages
     cookie_result = None
@@ -53,6 +55,7 @@ async def scrape_collection(
     cookies_json = cookie_result.cookies_json if cookie_result else None
 
     semaphore = asyncio.Semaphore(MAX_CONCURRENT)
+    block_stats = BlockStats()
     successful_pages_data: list[dict] = []
     cookie_marked_failed = False
 
@@ -63,20 +66,22 @@ async def scrape_collection(
 
         async with semaphore:
             # Update page status to scraping
-            supabase.table("doc_pages").update(
-                {"status": "scraping"}
-            ).eq("id", page_id).execute()
+            await db.execute(
+                supabase.table("doc_pages").update({"status": "scraping"}).eq("id", page_id)
+            )
 
             try:
-                result = await scrape_article(page_url, cookies_json=cookies_json)
+                result = await scrape_article(
+                    page_url, cookies_json=cookies_json, block_stats=block_stats
+                )
 
                 # Update page with scraped content
-                supabase.table("doc_pages").update({
+                await db.execute(supabase.table("doc_pages").update({
                     "title": result["title"] or page_info.get("title"),
                     "content_markdown": result["content_markdown"],
                     "is_truncated": result["is_truncated"],
                     "status": "completed",
-                }).eq("id", page_id).execute()
+                }).eq("id", page_id))
 
                 doc_job.succeeded_pages.append(page_id)
                 successful_pages_data.append({
@@ -87,20 +92,20 @@ async def scrape_collection(
 
                 # Clear cookie failure on successful use
                 if cookie_result:
-                    clear_cookie_failure(cookie_result.cookie_id, supabase)
+                    await db.run(clear_cookie_failure, cookie_result.cookie_id, supabase)
 
             except AuthenticationError as e:
                 error_msg = str(e)[:500]
                 logger.warning("Auth failure scraping page %s: %s", page_url, error_msg)
 
                 if cookie_result and not cookie_marked_failed:
-                    mark_cookie_failed(cookie_result.cookie_id, str(e)[:200], supabase)
+                    await db.run(mark_cookie_failed, cookie_result.cookie_id, str(e)[:200], supabase)
                     cookie_marked_failed = True
 
-                supabase.table("doc_pages").update({
+                await db.execute(supabase.table("doc_pages").update({
                     "status": "failed",
                     "error_message": error_msg,
-                }).eq("id", page_id).execute()
+                }).eq("id", page_id))
 
                 doc_job.failed_pages.append(page_id)
 
@@ -108,15 +113,18 @@ async def scrape_collection(
                 error_msg = str(e)[:500]
                 logger.warning("Failed to scrape page %s: %s", page_url, error_msg)
 
-                supabase.table("doc_pages").update({
+                await db.execute(supabase.table("doc_pages").update({
                     "status": "failed",
                     "error_message": error_msg,
-                }).eq("id", page_id).execute()
+                }).eq("id", page_id))
 
                 doc_job.failed_pages.append(page_id)
 
             finally:
                 doc_job.processed_pages += 1
+                doc_job.blocked_requests = block_stats.blocked_requests
+                doc_job.blocked_by_kind = dict(block_stats.by_kind)
+                doc_job.estimated_bytes_saved = block_stats.estimated_bytes_saved
                 doc_job.message = f"Scraping page {doc_job.processed_pages} of {doc_job.total_pages}..."
                 job_manager._notify(job_id, doc_job)
 
@@ -146,18 +154,24 @@ async def scrape_collection(
             doc_job.status = JobStatus.COMPLETED
             doc_job.message = f"Completed: all {total} pages scraped successfully"
 
+        logger.info(
+            "Collection %s: blocked %d requests %s (estimated ~%d KB not downloaded)",
+            collection_id, block_stats.blocked_requests, block_stats.by_kind,
+            block_stats.estimated_bytes_saved // 1024,
+        )
+
         # Update collection status and counts
-        supabase.table("doc_collections").update({
+        await db.execute(supabase.table("doc_collections").update({
             "status": final_status,
             "successful_pages": succeeded,
-        }).eq("id", collection_id).execute()
+        }).eq("id", collection_id))
 
         # Index successful pages in vector store
         if successful_pages_data:
             try:
-                site_name_result = supabase.table("doc_collections").select(
-                    "site_name"
-                ).eq("id", collection_id).execute()
+                site_name_result = await db.execute(
+                    supabase.table("doc_collections").select("site_name").eq("id", collection_id)
+                )
                 site_name = site_name_result.data[0]["site_name"] if site_name_result.data else "Documentation"
 
                 vs = get_user_vectorstore(user_id, settings)
@@ -168,7 +182,7 @@ async def scrape_collection(
                     user_id=user_id,
                 )
                 if chunks_added > 0:
-                    update_cached_chunk_count(supabase, user_id, chunks_added)
+                    await db.run(update_cached_chunk_count, supabase, user_id, chunks_added)
                 logger.info(
                     "Indexed %d documentation pages (%d chunks) for collection %s",
                     len(successful_pages_data),
@@ -189,7 +203,7 @@ async def scrape_collection(
         doc_job.message = f"Scraping failed: {str(e)[:500]}"
         job_manager._notify(job_id, doc_job)
 
-        supabase.table("doc_collections").update({
+        await db.execute(supabase.table("doc_collections").update({
             "status": "failed",
             "error_message": str(e)[:500],
-        }).eq("id", collection_id).execute()
+        }).eq("id", collection_id))
@@ -0,0 +1,300 @@
+"""Embedding caches for ingestion and retrieval.
+
+Document embeddings: re-ingesting the same transcript, documentation page
+or article (channel re-add, collection retry, another user scraping the
+same URL) produces the exact same chunks. Embeddings are cached in SQLite
+keyed by ``(embedding model, sha256(chunk text))`` so only cache misses are
+sent to the embedding API.
+
+Query embeddings: a single chat turn can embed the same query several
+times (fast-path probe, KB-only retrieval, agent tool calls). They are kept
+in an in-process TTL cache keyed by ``(embedding model, normalized query)``,
+and concurrent requests for the same key share one API call.
+"""
+
+import asyncio
+import concurrent.futures
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """SQLite-backed embedding store with least-recently-used eviction.
+
+    Vectors are stored as packed float32 blobs. Once the cache holds more
+    than *max_entries* rows, the least recently used rows are deleted.
+    """
+
+    def __init__(self, path: str, max_entries: int = 500_000):
+        self.path = path
+        self.max_entries = max_entries
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS embeddings (
+                    model TEXT NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (model, text_hash)
+                )"""
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)"
+            )
+            self._conn.commit()
+
+    def get_many(self, model: str, hashes: list[str]) -> dict[str, list[float]]:
+        """Return cached vectors for the given text hashes (misses are omitted)."""
+        found: dict[str, list[float]] = {}
+        unique = list(dict.fromkeys(hashes))
+        now = time.time()
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(unique), 500):
+                batch = unique[start:start + 500]
+                placeholders = ", ".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch],
+                ).fetchall()
+                for h, blob in rows:
+                    found[h] = array("f", blob).tolist()
+            if found:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                    [(now, model, h) for h in found],
+                )
+                self._conn.commit()
+        return found
+
+    def put_many(self, model: str, items: dict[str, list[float]]) -> None:
+        """Store vectors keyed by text hash, then evict down to max_entries."""
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                [(model, h, array("f", vec).tobytes(), now) for h, vec in items.items()],
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+            overflow = count - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE rowid IN "
+                    "(SELECT rowid FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                    (overflow,),
+                )
+                logger.debug("Evicted %d embedding cache entries", overflow)
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        return count
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only calls the underlying model for cache misses.
+
+    Query embeddings pass straight through; only document (chunk)
+    embeddings are cached.
+    """
+
+    def __init__(self, underlying: Embeddings, cache: EmbeddingCache, model: str):
+        self.underlying = underlying
+        self.cache = cache
+        self.model = model
+
+    def _split(
+        self, texts: list[str]
+    ) -> tuple[list[str], dict[str, list[float]], list[tuple[str, str]]]:
+        hashes = [text_hash(t) for t in texts]
+        cached = self.cache.get_many(self.model, hashes)
+        missing: dict[str, str] = {}
+        for h, t in zip(hashes, texts):
+            if h not in cached and h not in missing:
+                missing[h] = t
+        return hashes, cached, list(missing.items())
+
+    def _merge(
+        self,
+        texts: list[str],
+        hashes: list[str],
+        cached: dict[str, list[float]],
+        missing: list[tuple[str, str]],
+        vectors: list[list[float]],
+    ) -> list[list[float]]:
+        fresh = {h: vec for (h, _), vec in zip(missing, vectors)}
+        self.cache.put_many(self.model, fresh)
+        logger.info(
+            "Embedding cache: %d hit(s), %d miss(es) for %d chunk(s)",
+            sum(1 for h in hashes if h in cached), len(fresh), len(texts),
+        )
+        return [cached[h] if h in cached else fresh[h] for h in hashes]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        hashes, cached, missing = self._split(texts)
+        vectors = self.underlying.embed_documents([t for _, t in missing]) if missing else []
+        return self._merge(texts, hashes, cached, missing, vectors)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        hashes, cached, missing = await asyncio.to_thread(self._split, texts)
+        vectors = (
+            await self.underlying.aembed_documents([t for _, t in missing]) if missing else []
+        )
+        return await asyncio.to_thread(self._merge, texts, hashes, cached, missing, vectors)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.underlying.embed_query(text)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return await self.underlying.aembed_query(text)
+
+
+def normalize_query(query: str) -> str:
+    """Case-fold and collapse whitespace so trivially different queries share a key."""
+    return " ".join(query.casefold().split())
+
+
+class QueryEmbeddingCache:
+    """In-process LRU cache of query embeddings with TTL and single-flight.
+
+    If a key is already being computed, other callers (threads or
+    coroutines) wait for that result instead of issuing their own request.
+    """
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[tuple[str, str], tuple[float, list[float]]] = OrderedDict()
+        self._inflight: dict[tuple[str, str], concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+
+    def _lookup(
+        self, key: tuple[str, str]
+    ) -> tuple[list[float] | None, concurrent.futures.Future | None, bool]:
+        """Return (cached vector, in-flight future, is_leader)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, vector = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    return vector, None, False
+                del self._entries[key]
+            future = self._inflight.get(key)
+            if future is not None:
+                return None, future, False
+            future = concurrent.futures.Future()
+            self._inflight[key] = future
+            return None, future, True
+
+    def _resolve(
+        self,
+        key: tuple[str, str],
+        future: concurrent.futures.Future,
+        vector: list[float] | None = None,
+        error: BaseException | None = None,
+    ) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+            if error is None:
+                self._entries[key] = (time.monotonic() + self.ttl_seconds, vector)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        if error is None:
+            future.set_result(vector)
+        else:
+            future.set_exception(error)
+
+    def get_or_compute(
+        self, key: tuple[str, str], compute: Callable[[], list[float]]
+    ) -> list[float]:
+        vector, future, is_leader = self._lookup(key)
+        if vector is not None:
+            return vector
+        if not is_leader:
+            return future.result()
+        try:
+            vector = compute()
+        except BaseException as e:
+            self._resolve(key, future, error=e)
+            raise
+        self._resolve(key, future, vector=vector)
+        return vector
+
+    async def aget_or_compute(
+        self, key: tuple[str, str], compute: Callable[[], Awaitable[list[float]]]
+    ) -> list[float]:
+        vector, future, is_leader = self._lookup(key)
+        if vector is not None:
+            return vector
+        if not is_leader:
+            return await asyncio.wrap_future(future)
+        try:
+            vector = await compute()
+        except BaseException as e:
+            self._resolve(key, future, error=e)
+            raise
+        self._resolve(key, future, vector=vector)
+        return vector
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class QueryCachedEmbeddings(Embeddings):
+    """Embeddings wrapper that serves query embeddings from a QueryEmbeddingCache.
+
+    Document embeddings pass straight through to the underlying model.
+    """
+
+    def __init__(self, underlying: Embeddings, cache: QueryEmbeddingCache, model: str):
+        self.underlying = underlying
+        self.cache = cache
+        self.model = model
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.underlying.embed_documents(texts)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self.underlying.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.cache.get_or_compute(
+            (self.model, normalize_query(text)),
+            lambda: self.underlying.embed_query(text),
+        )
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return await self.cache.aget_or_compute(
+            (self.model, normalize_query(text)),
+            lambda: self.underlying.aembed_query(text),
+        )
@@ -0,0 +1,181 @@
+"""Token-packed, concurrent document embedding under a shared rate budget.
+
+Chunks are packed into requests up to the provider's per-request token and
+input limits (counted with tiktoken), and the requests are issued
+concurrently. Every request first reserves its tokens from a process-wide
+TokenBudget, so ingestion throughput is bounded by the tokens-per-minute
+limit rather than by sequential round trips.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import tiktoken
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBudget:
+    """Thread-safe tokens-per-minute budget shared by all embedding calls.
+
+    Reservations are scheduled rather than polled: ``reserve`` books the
+    tokens and returns how long the caller must wait before sending, so it
+    works the same from threads and from any event loop.
+    """
+
+    def __init__(self, tokens_per_minute: int):
+        self.rate = tokens_per_minute / 60.0
+        self.capacity = float(tokens_per_minute)
+        self._available = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int) -> float:
+        """Book *tokens* and return the delay in seconds before they may be spent."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._available = min(
+                self.capacity, self._available + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._available -= tokens
+            if self._available >= 0:
+                return 0.0
+            return -self._available / self.rate
+
+    async def acquire(self, tokens: int) -> None:
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def acquire_sync(self, tokens: int) -> None:
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+
+# Fallback when the tokenizer files cannot be loaded (e.g. offline hosts)
+CHARS_PER_TOKEN = 4
+
+
+def get_encoding(model: str) -> tiktoken.Encoding | None:
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning("tiktoken unavailable (%s); estimating tokens from length", e)
+        return None
+
+
+def pack_batches(
+    token_counts: list[int], max_tokens: int, max_inputs: int
+) -> list[list[int]]:
+    """Greedily group text indices into batches within both request limits."""
+    batches: list[list[int]] = []
+    current: list[int] = []
+    current_tokens = 0
+    for i, count in enumerate(token_counts):
+        if current and (current_tokens + count > max_tokens or len(current) >= max_inputs):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += count
+    if current:
+        batches.append(current)
+    return batches
+
+
+class BatchedEmbeddings(Embeddings):
+    """Embeddings wrapper that packs documents into concurrent, budgeted requests.
+
+    Query embeddings pass straight through.
+    """
+
+    def __init__(
+        self,
+        underlying: Embeddings,
+        model: str,
+        budget: TokenBudget,
+        max_tokens_per_request: int = 250_000,
+        max_inputs_per_request: int = 2048,
+        concurrency: int = 4,
+    ):
+        self.underlying = underlying
+        self.budget = budget
+        self.max_tokens_per_request = max_tokens_per_request
+        self.max_inputs_per_request = max_inputs_per_request
+        self.concurrency = max(1, concurrency)
+        self.model = model
+        self._encoding: tiktoken.Encoding | None = None
+        self._encoding_loaded = False
+
+    def _count_tokens(self, texts: list[str]) -> list[int]:
+        if not self._encoding_loaded:
+            self._encoding = get_encoding(self.model)
+            self._encoding_loaded = True
+        if self._encoding is None:
+            return [len(t) // CHARS_PER_TOKEN + 1 for t in texts]
+        return [len(tokens) for tokens in self._encoding.encode_ordinary_batch(texts)]
+
+    def _plan(self, texts: list[str]) -> list[tuple[list[int], int]]:
+        counts = self._count_tokens(texts)
+        batches = pack_batches(counts, self.max_tokens_per_request, self.max_inputs_per_request)
+        plan = [(batch, sum(counts[i] for i in batch)) for batch in batches]
+        logger.info(
+            "Embedding %d text(s), %d token(s) in %d request(s)",
+            len(texts), sum(counts), len(plan),
+        )
+        return plan
+
+    @staticmethod
+    def _assemble(
+        size: int, plan: list[tuple[list[int], int]], results: list[list[list[float]]]
+    ) -> list[list[float]]:
+        vectors: list[list[float]] = [[] for _ in range(size)]
+        for (batch, _), batch_vectors in zip(plan, results):
+            for i, vector in zip(batch, batch_vectors):
+                vectors[i] = vector
+        return vectors
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        plan = self._plan(texts)
+
+        def _embed(batch: list[int], tokens: int) -> list[list[float]]:
+            self.budget.acquire_sync(tokens)
+            return self.underlying.embed_documents([texts[i] for i in batch])
+
+        if len(plan) == 1:
+            return self._assemble(len(texts), plan, [_embed(*plan[0])])
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(plan))) as executor:
+            results = list(executor.map(lambda item: _embed(*item), plan))
+        return self._assemble(len(texts), plan, results)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        plan = await asyncio.to_thread(self._plan, texts)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def _embed(batch: list[int], tokens: int) -> list[list[float]]:
+            async with semaphore:
+                await self.budget.acquire(tokens)
+                return await self.underlying.aembed_documents([texts[i] for i in batch])
+
+        results = await asyncio.gather(*(_embed(batch, tokens) for batch, tokens in plan))
+        return self._assemble(len(texts), plan, list(results))
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.underlying.embed_query(text)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return await self.underlying.aembed_query(text)
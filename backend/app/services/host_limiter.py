@@ -0,0 +1,111 @@
+"""Adaptive per-host concurrency and rate limiting for upstream scraping.
+
+Each host gets an additive-increase / multiplicative-decrease limiter. It
+starts at one request in flight and ramps up by one after every
+``RAMP_AFTER`` consecutive successes (up to ``max_concurrency``), while
+the spacing between request starts shrinks towards ``1 / max_rate``.
+A throttle signal (HTTP 429, "not a bot" checks, IP blocks) halves the
+concurrency, doubles the spacing and pauses new requests for that long.
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from app.config import Settings
+
+logger = logging.getLogger(__name__)
+
+RAMP_AFTER = 3
+MIN_BACKOFF_SECONDS = 2.0
+MAX_BACKOFF_SECONDS = 120.0
+
+
+class Lease:
+    """Handle for one limited request; set ``throttled`` if upstream pushed back."""
+
+    def __init__(self):
+        self.throttled = False
+
+
+class AdaptiveHostLimiter:
+    def __init__(self, max_concurrency: int = 4, max_rate: float = 1.0):
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_interval = 1.0 / max_rate if max_rate > 0 else 0.0
+        self.concurrency = 1
+        self.interval = self.min_interval
+        self._in_flight = 0
+        self._successes = 0
+        self._next_start = 0.0
+        self._cond = asyncio.Condition()
+
+    async def _acquire(self) -> None:
+        async with self._cond:
+            while True:
+                wait = self._next_start - time.monotonic()
+                if self._in_flight < self.concurrency and wait <= 0:
+                    self._in_flight += 1
+                    self._next_start = time.monotonic() + self.interval
+                    return
+                if self._in_flight >= self.concurrency:
+                    await self._cond.wait()
+                else:
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), wait)
+                    except TimeoutError:
+                        pass
+
+    async def _release(self, outcome: str) -> None:
+        async with self._cond:
+            self._in_flight -= 1
+            if outcome == "throttled":
+                self._successes = 0
+                self.concurrency = max(1, self.concurrency // 2)
+                self.interval = min(
+                    MAX_BACKOFF_SECONDS, max(self.interval * 2, MIN_BACKOFF_SECONDS)
+                )
+                self._next_start = max(self._next_start, time.monotonic() + self.interval)
+                logger.warning(
+                    "Upstream throttling: concurrency=%d, interval=%.1fs",
+                    self.concurrency, self.interval,
+                )
+            elif outcome == "success":
+                self._successes += 1
+                self.interval = max(self.min_interval, self.interval * 0.75)
+                if self._successes >= RAMP_AFTER and self.concurrency < self.max_concurrency:
+                    self._successes = 0
+                    self.concurrency += 1
+            self._cond.notify_all()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[Lease]:
+        """Wait for a request slot.
+
+        Exiting normally counts as a success, unless ``lease.throttled`` was
+        set. Exiting with an exception counts as neither.
+        """
+        await self._acquire()
+        lease = Lease()
+        outcome = "neutral"
+        try:
+            yield lease
+            outcome = "success"
+        finally:
+            await self._release("throttled" if lease.throttled else outcome)
+
+
+_limiters: dict[str, AdaptiveHostLimiter] = {}
+
+
+def get_host_limiter(host: str, settings: Settings) -> AdaptiveHostLimiter:
+    """Return the process-wide limiter for *host*, shared across jobs."""
+    limiter = _limiters.get(host)
+    if limiter is None:
+        limiter = AdaptiveHostLimiter(
+            max_concurrency=settings.transcription_max_concurrency,
+            max_rate=settings.transcription_max_rate,
+        )
+        _limiters[host] = limiter
+    return limiter
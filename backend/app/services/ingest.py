@@ -0,0 +1,112 @@
+"""Streaming ingestion into a user's vector store.
+
+Long-running jobs feed documents to a StreamingIngestor as they become
+available. Buffered documents are chunked, embedded and committed in
+micro-batches once ``ingest_batch_tokens`` (estimated) accumulate or the
+oldest buffered document is ``ingest_batch_seconds`` old. Committed
+batches are searchable immediately and survive a later failure in the
+job.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+
+from app.services.vectorstore import VectorStoreService
+
+logger = logging.getLogger(__name__)
+
+# Rough size estimate; exact token counts are not needed to size a batch
+CHARS_PER_TOKEN = 4
+
+
+class StreamingIngestor:
+    """Micro-batching front end for ``VectorStoreService.aadd_documents``.
+
+    Use as an async context manager; leaving the block flushes what is
+    still buffered. A failed batch is logged and recorded in
+    ``failed_metadatas`` without affecting earlier or later batches.
+    """
+
+    def __init__(
+        self,
+        vectorstore: VectorStoreService,
+        max_tokens: int,
+        max_seconds: float,
+        on_batch: Callable[[int], Awaitable[None]] | None = None,
+    ):
+        self.vectorstore = vectorstore
+        self.max_tokens = max_tokens
+        self.max_seconds = max_seconds
+        self.on_batch = on_batch
+        self.chunks_added = 0
+        self.batches = 0
+        self.failed_metadatas: list[dict] = []
+        self._texts: list[str] = []
+        self._metadatas: list[dict] = []
+        self._tokens = 0
+        self._oldest: float | None = None
+        self._lock = asyncio.Lock()
+        self._ticker: asyncio.Task | None = None
+
+    async def __aenter__(self) -> "StreamingIngestor":
+        if self.max_seconds > 0:
+            self._ticker = asyncio.create_task(self._tick())
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        if self._ticker is not None:
+            self._ticker.cancel()
+            try:
+                await self._ticker
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+    async def _tick(self) -> None:
+        while True:
+            await asyncio.sleep(self.max_seconds / 2)
+            if self._oldest is not None and time.monotonic() - self._oldest >= self.max_seconds:
+                await self.flush()
+
+    async def add(self, text: str, metadata: dict) -> None:
+        """Buffer one document, flushing if the batch is full."""
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+        self._texts.append(text)
+        self._metadatas.append(metadata)
+        self._tokens += len(text) // CHARS_PER_TOKEN
+        if self._tokens >= self.max_tokens:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Commit everything buffered so far as one batch."""
+        async with self._lock:
+            if not self._texts:
+                return
+            texts, metadatas = self._texts, self._metadatas
+            self._texts, self._metadatas = [], []
+            self._tokens = 0
+            self._oldest = None
+
+            try:
+                chunks = await self.vectorstore.aadd_documents(texts, metadatas)
+            except Exception as e:
+                logger.error(
+                    "Failed to vectorize batch of %d document(s): %s", len(texts), e
+                )
+                self.failed_metadatas.extend(metadatas)
+                return
+
+            self.batches += 1
+            self.chunks_added += chunks
+            logger.info(
+                "Committed batch %d: %d document(s), %d chunk(s)",
+                self.batches, len(texts), chunks,
+            )
+            if self.on_batch and chunks > 0:
+                try:
+                    await self.on_batch(chunks)
+                except Exception as e:
+                    logger.warning("Batch callback failed: %s", e)
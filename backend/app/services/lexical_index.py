@@ -0,0 +1,160 @@
+"""Per-user BM25 inverted index over chunk text.
+
+Dense retrieval misses or mis-ranks queries built around exact terms:
+tickers, names and phrases such as "3 bar play", "VWAP" or "$NVDA". This
+SQLite FTS5 index, stored under ``lexical_index_dir``, ranks chunks by
+BM25 over their text and titles. It is updated alongside the vector store
+on every add and delete, and similarity_search fuses it with dense
+results in hybrid mode.
+
+Like the metadata index, it is only used once *complete*: created with an
+empty dataset, or rebuilt from an existing one.
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable
+from pathlib import Path
+
+from app.config import Settings
+
+logger = logging.getLogger(__name__)
+
+TITLE_FIELDS = ("title", "page_title")
+TITLE_WEIGHT = 2.0
+MAX_QUERY_TERMS = 32
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def build_match_query(query: str) -> str | None:
+    """Turn free text into an FTS5 OR-query of its terms.
+
+    Quoted phrases, and the whole query when it has several terms, are
+    added as phrase clauses so exact phrase matches rank above scattered
+    terms. "$NVDA" matches "NVDA" (the tokenizer drops punctuation).
+    """
+    terms = _TERM_RE.findall(query.lower())[:MAX_QUERY_TERMS]
+    if not terms:
+        return None
+    clauses = [" ".join(_TERM_RE.findall(p.lower())) for p in re.findall(r'"([^"]+)"', query)]
+    if len(terms) > 1:
+        clauses.append(" ".join(terms))
+    clauses.extend(dict.fromkeys(terms))
+    return " OR ".join(f'"{clause}"' for clause in clauses if clause)
+
+
+class LexicalIndex:
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.building = False
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks (rowid INTEGER PRIMARY KEY, chunk_id TEXT NOT NULL UNIQUE)"
+            )
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(text, title)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+            self._conn.commit()
+
+    @property
+    def complete(self) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM state WHERE key = 'complete'").fetchone()
+        return bool(row and row[0] == "1")
+
+    def _insert(self, ids: list[str], texts: list[str], metadatas: list[dict]) -> None:
+        for chunk_id, text, meta in zip(ids, texts, metadatas):
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO chunks (chunk_id) VALUES (?)", (chunk_id,)
+            )
+            if cursor.rowcount:
+                title = " ".join(str(meta[f]) for f in TITLE_FIELDS if meta.get(f))
+                self._conn.execute(
+                    "INSERT INTO chunks_fts (rowid, text, title) VALUES (?, ?, ?)",
+                    (cursor.lastrowid, text, title),
+                )
+
+    def add(self, ids: list[str], texts: list[str], metadatas: list[dict]) -> None:
+        with self._lock:
+            self._insert(ids, texts, metadatas)
+            self._conn.commit()
+
+    def remove(self, ids: list[str]) -> None:
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                placeholders = ", ".join("?" * len(batch))
+                rowids = [
+                    (rowid,) for (rowid,) in self._conn.execute(
+                        f"SELECT rowid FROM chunks WHERE chunk_id IN ({placeholders})", batch
+                    )
+                ]
+                self._conn.executemany("DELETE FROM chunks_fts WHERE rowid = ?", rowids)
+                self._conn.executemany("DELETE FROM chunks WHERE rowid = ?", rowids)
+            self._conn.commit()
+
+    def replace_all(self, pages: Iterable[dict[str, list]]) -> int:
+        """Rebuild from ``{"ids", "documents", "metadata"}`` pages and mark complete."""
+        count = 0
+        with self._lock:
+            self._conn.execute("DELETE FROM chunks")
+            self._conn.execute("DELETE FROM chunks_fts")
+            for page in pages:
+                self._insert(page["ids"], page["documents"], page["metadata"])
+                count += len(page["ids"])
+            self._conn.execute(
+                "INSERT OR REPLACE INTO state (key, value) VALUES ('complete', '1')"
+            )
+            self._conn.commit()
+        return count
+
+    def clear(self) -> None:
+        """Empty the index (the dataset was emptied too, so it stays complete)."""
+        self.replace_all([])
+
+    def search(self, query: str, limit: int) -> list[tuple[str, float]]:
+        """Return up to *limit* (chunk_id, bm25 score) pairs, best first."""
+        match = build_match_query(query)
+        if match is None:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                f"""SELECT c.chunk_id, -bm25(chunks_fts, 1.0, {TITLE_WEIGHT}) AS score
+                    FROM chunks_fts JOIN chunks c ON c.rowid = chunks_fts.rowid
+                    WHERE chunks_fts MATCH ? ORDER BY score DESC LIMIT ?""",
+                (match, limit),
+            ).fetchall()
+        return [(chunk_id, score) for chunk_id, score in rows]
+
+
+_indexes: OrderedDict[str, LexicalIndex] = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_lexical_index(dataset_path: str, settings: Settings) -> LexicalIndex:
+    """Return the (LRU-cached) lexical index for a per-user dataset path."""
+    name = dataset_path.rstrip("/").rsplit("/", 1)[-1]
+    key = str(Path(settings.lexical_index_dir) / f"{name}.db")
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            return index
+        index = LexicalIndex(key)
+        _indexes[key] = index
+        while len(_indexes) > settings.vectorstore_pool_size:
+            _indexes.popitem(last=False)
+        return index
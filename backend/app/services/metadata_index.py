@@ -0,0 +1,301 @@
+"""Secondary index from source keys to chunk ids for per-user datasets.
+
+Deleting a video, documentation collection or article used to scan every
+row's metadata with TQL. This index maps ``(field, value)`` for the
+fields in INDEXED_FIELDS to chunk ids. It is stored in SQLite under
+``metadata_index_dir`` and updated after every add and delete, so a delete
+only touches the matching chunks.
+
+It also keeps a row map for DeepLake deletes, which are by row offset:
+each chunk gets an increasing sequence number when appended, and a
+chunk's offset is the number of live chunks with a smaller one. Callers
+verify the offsets against the dataset's ``ids`` before deleting and
+rebuild the map from the ``ids`` column when they do not match.
+
+The index is trusted only once it is *complete*: created alongside an
+empty dataset, or rebuilt from an existing one. Until then, callers fall
+back to the TQL scan. Rebuild or verify existing datasets with:
+
+    python -m app.services.metadata_index verify --user-id <id>
+    python -m app.services.metadata_index rebuild --all-local
+"""
+
+import argparse
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+from app.config import Settings
+
+logger = logging.getLogger(__name__)
+
+INDEXED_FIELDS = ("video_id", "collection_id", "article_id", "source_type")
+
+
+class MetadataIndex:
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._seqs: np.ndarray | None = None  # sorted live sequence numbers, loaded lazily
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS chunk_keys (
+                    field TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    chunk_id TEXT NOT NULL,
+                    PRIMARY KEY (field, value, chunk_id)
+                )"""
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_chunk_keys_chunk ON chunk_keys (chunk_id)"
+            )
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS chunk_rows (
+                    chunk_id TEXT PRIMARY KEY,
+                    seq INTEGER NOT NULL
+                )"""
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def _rows(ids: list[str], metadatas: list[dict]) -> list[tuple[str, str, str]]:
+        rows = []
+        for chunk_id, meta in zip(ids, metadatas):
+            for field in INDEXED_FIELDS:
+                value = meta.get(field)
+                if value:
+                    rows.append((field, str(value), str(chunk_id)))
+        return rows
+
+    @property
+    def complete(self) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM state WHERE key = 'complete'").fetchone()
+        return bool(row and row[0] == "1")
+
+    def _set_complete(self, complete: bool) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO state (key, value) VALUES ('complete', ?)",
+                ("1" if complete else "0",),
+            )
+            self._conn.commit()
+
+    def mark_complete(self) -> None:
+        self._set_complete(True)
+
+    @contextmanager
+    def updating(self):
+        """Mark the index incomplete while the dataset is written.
+
+        Wrap the dataset write and the matching add/remove: if the process
+        dies in between, the index stays incomplete and is not trusted
+        until rebuilt.
+        """
+        was_complete = self.complete
+        if was_complete:
+            self._set_complete(False)
+        yield
+        if was_complete:
+            self._set_complete(True)
+
+    def _live_seqs_locked(self) -> np.ndarray:
+        if self._seqs is None:
+            self._seqs = np.fromiter(
+                (seq for (seq,) in self._conn.execute("SELECT seq FROM chunk_rows ORDER BY seq")),
+                dtype=np.int64,
+            )
+        return self._seqs
+
+    def _set_rows_locked(self, ids: list[str]) -> None:
+        self._conn.execute("DELETE FROM chunk_rows")
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO chunk_rows (chunk_id, seq) VALUES (?, ?)",
+            ((str(chunk_id), seq) for seq, chunk_id in enumerate(ids)),
+        )
+        self._seqs = np.arange(len(ids), dtype=np.int64)
+
+    def add(self, ids: list[str], metadatas: list[dict]) -> None:
+        """Index chunks appended (in this order) to the end of the dataset."""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO chunk_keys (field, value, chunk_id) VALUES (?, ?, ?)",
+                self._rows(ids, metadatas),
+            )
+            if self._seqs is None:
+                (last,) = self._conn.execute("SELECT MAX(seq) FROM chunk_rows").fetchone()
+            else:
+                last = int(self._seqs[-1]) if len(self._seqs) else None
+            start = 0 if last is None else last + 1
+            seqs = np.arange(start, start + len(ids), dtype=np.int64)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunk_rows (chunk_id, seq) VALUES (?, ?)",
+                ((str(chunk_id), int(seq)) for chunk_id, seq in zip(ids, seqs)),
+            )
+            self._conn.commit()
+            if self._seqs is not None:
+                self._seqs = np.concatenate([self._seqs, seqs])
+
+    def lookup(self, field: str, values: list[str]) -> list[str]:
+        """Return chunk ids whose *field* equals any of *values*."""
+        found: list[str] = []
+        with self._lock:
+            for start in range(0, len(values), 500):
+                batch = values[start:start + 500]
+                placeholders = ", ".join("?" * len(batch))
+                found.extend(
+                    chunk_id for (chunk_id,) in self._conn.execute(
+                        f"SELECT DISTINCT chunk_id FROM chunk_keys "
+                        f"WHERE field = ? AND value IN ({placeholders})",
+                        [field, *batch],
+                    )
+                )
+        return found
+
+    def _seqs_of_locked(self, ids: list[str]) -> dict[str, int]:
+        seqs: dict[str, int] = {}
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            placeholders = ", ".join("?" * len(batch))
+            seqs.update(
+                self._conn.execute(
+                    f"SELECT chunk_id, seq FROM chunk_rows WHERE chunk_id IN ({placeholders})",
+                    batch,
+                )
+            )
+        return seqs
+
+    def row_positions(self, ids: list[str]) -> list[int] | None:
+        """Dataset row offsets of *ids* per the row map, or None if any is unmapped."""
+        with self._lock:
+            seqs = self._seqs_of_locked(ids)
+            if len(seqs) != len(set(ids)):
+                return None
+            wanted = np.asarray([seqs[chunk_id] for chunk_id in ids], dtype=np.int64)
+            return np.searchsorted(self._live_seqs_locked(), wanted).tolist()
+
+    def set_rows(self, ids: list[str]) -> None:
+        """Rebuild the row map from the dataset's ``ids`` column, in row order."""
+        with self._lock:
+            self._set_rows_locked(ids)
+            self._conn.commit()
+
+    def remove(self, ids: list[str]) -> None:
+        with self._lock:
+            seqs = self._seqs_of_locked(ids)
+            self._conn.executemany(
+                "DELETE FROM chunk_keys WHERE chunk_id = ?", [(i,) for i in ids]
+            )
+            self._conn.executemany(
+                "DELETE FROM chunk_rows WHERE chunk_id = ?", [(i,) for i in ids]
+            )
+            self._conn.commit()
+            if self._seqs is not None and seqs:
+                self._seqs = self._seqs[~np.isin(self._seqs, list(seqs.values()))]
+
+    def replace_all(self, ids: list[str], metadatas: list[dict]) -> None:
+        """Replace the whole index with the given chunks and mark it complete.
+
+        *ids* must be in dataset row order.
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM chunk_keys")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO chunk_keys (field, value, chunk_id) VALUES (?, ?, ?)",
+                self._rows(ids, metadatas),
+            )
+            self._set_rows_locked(ids)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO state (key, value) VALUES ('complete', '1')"
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """Empty the index (the dataset was emptied too, so it stays complete)."""
+        self.replace_all([], [])
+
+    def pairs(self) -> set[tuple[str, str, str]]:
+        with self._lock:
+            return set(self._conn.execute("SELECT field, value, chunk_id FROM chunk_keys"))
+
+    def diff(self, ids: list[str], metadatas: list[dict]) -> tuple[int, int]:
+        """Compare against the dataset: (entries missing from index, stale entries)."""
+        expected = set(self._rows(ids, metadatas))
+        actual = self.pairs()
+        return len(expected - actual), len(actual - expected)
+
+
+_indexes: OrderedDict[str, MetadataIndex] = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_metadata_index(dataset_path: str, settings: Settings) -> MetadataIndex:
+    """Return the (LRU-cached) metadata index for a per-user dataset path."""
+    name = dataset_path.rstrip("/").rsplit("/", 1)[-1]
+    key = str(Path(settings.metadata_index_dir) / f"{name}.db")
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            return index
+        index = MetadataIndex(key)
+        _indexes[key] = index
+        while len(_indexes) > settings.vectorstore_pool_size:
+            _indexes.popitem(last=False)
+        return index
+
+
+def main(argv: list[str] | None = None) -> int:
+    from app.config import settings
+    from app.services.vectorstore import get_user_vectorstore
+
+    parser = argparse.ArgumentParser(description="Verify or rebuild per-user metadata indexes")
+    parser.add_argument("command", choices=["verify", "rebuild"])
+    parser.add_argument("--user-id", action="append", default=[], help="repeatable")
+    parser.add_argument(
+        "--all-local", action="store_true",
+        help="every user-* dataset under a local deeplake_path",
+    )
+    args = parser.parse_args(argv)
+
+    user_ids = list(args.user_id)
+    if args.all_local and settings.deeplake_path and not settings.deeplake_path.startswith("hub://"):
+        base = Path(settings.deeplake_path)
+        if base.is_dir():
+            user_ids += [p.name[len("user-"):] for p in base.glob("user-*") if p.is_dir()]
+    if not user_ids:
+        parser.error("no datasets selected (use --user-id or --all-local)")
+
+    inconsistent = 0
+    for user_id in user_ids:
+        vectorstore = get_user_vectorstore(user_id, settings)
+        if args.command == "rebuild":
+            count = vectorstore.rebuild_metadata_index()
+            print(f"user-{user_id}: rebuilt index for {count} chunk(s)")
+        else:
+            missing, stale, complete = vectorstore.verify_metadata_index()
+            ok = complete and not missing and not stale
+            inconsistent += 0 if ok else 1
+            print(
+                f"user-{user_id}: {'ok' if ok else 'INCONSISTENT'} "
+                f"(complete={complete}, missing={missing}, stale={stale})"
+            )
+    return 1 if inconsistent else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(main())
@@ -0,0 +1,389 @@
+"""Local NumPy vector backend: exact cosine search over a memory-mapped matrix.
+
+For small per-user knowledge bases an exact scan of a float32 matrix
+takes well under a millisecond, so the DeepLake round trip is pure
+overhead. Selected with ``vectorstore_backend = "numpy"``. It is also the
+fast offline backend for tests and benchmarks.
+
+Each dataset directory holds:
+
+- ``vectors.<generation>.bin``: an append-only matrix of L2-normalised
+  embeddings (float32 or float16). It is memory-mapped read-only.
+- ``chunks.db``: a SQLite sidecar mapping matrix rows to chunk id,
+  document and metadata, plus the matrix dimension, dtype and generation.
+
+Deleted rows stay in the matrix as dead rows until they make up more
+than COMPACT_DEAD_RATIO of it. Then the live rows are copied into the
+next generation's file, and the new row numbers and generation are
+committed in one SQLite transaction.
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import weakref
+from collections.abc import Iterator
+from pathlib import Path
+
+import numpy as np
+from langchain_core.documents import Document
+
+from app.config import Settings
+from app.services.vectorstore import CHUNK_PAGE_SIZE, VectorStoreService
+
+logger = logging.getLogger(__name__)
+
+COMPACT_DEAD_RATIO = 0.3
+COMPACT_MIN_DEAD_ROWS = 256
+_SQL_BATCH = 500
+
+
+class VectorFileStore:
+    """Memory-mapped embedding matrix with a SQLite id/document/metadata sidecar."""
+
+    def __init__(self, path: str, dtype: str = "float32"):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.RLock()
+        self._conn = sqlite3.connect(self.path / "chunks.db", check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS chunks (
+                row INTEGER PRIMARY KEY,
+                id TEXT NOT NULL UNIQUE,
+                document TEXT NOT NULL,
+                metadata TEXT NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        self._conn.commit()
+        state = dict(self._conn.execute("SELECT key, value FROM state"))
+        # An existing matrix keeps the dtype it was written with
+        self.dtype = np.dtype(state.get("dtype", dtype))
+        self.dim: int | None = int(state["dim"]) if "dim" in state else None
+        self.generation = int(state.get("generation", 0))
+        self._load()
+
+    @property
+    def _vectors_path(self) -> Path:
+        return self.path / f"vectors.{self.generation}.bin"
+
+    def _load(self) -> None:
+        """Map the current matrix and rebuild the live-row mask from the sidecar."""
+        rows = 0
+        if self.dim and self._vectors_path.exists():
+            size = self._vectors_path.stat().st_size
+            rows = size // self._row_bytes
+            if size != rows * self._row_bytes:
+                # A crash mid-append left a partial trailing row
+                self._truncate(rows)
+        self._map(rows)
+        # Sidecar rows past the end of the matrix lost their vectors in a crash
+        self._conn.execute("DELETE FROM chunks WHERE row >= ?", (rows,))
+        self._conn.commit()
+        self._live = np.zeros(rows, dtype=bool)
+        live_rows = [row for (row,) in self._conn.execute("SELECT row FROM chunks")]
+        self._live[live_rows] = True
+        self._live_count = len(live_rows)
+        for stale in self.path.glob("vectors.*.bin"):
+            if stale != self._vectors_path:
+                stale.unlink(missing_ok=True)
+
+    @property
+    def _row_bytes(self) -> int:
+        return self.dim * self.dtype.itemsize
+
+    def _truncate(self, rows: int) -> None:
+        with open(self._vectors_path, "r+b") as f:
+            f.truncate(rows * self._row_bytes)
+
+    def _map(self, rows: int) -> None:
+        self._matrix = (
+            np.memmap(self._vectors_path, dtype=self.dtype, mode="r", shape=(rows, self.dim))
+            if rows else np.empty((0, self.dim or 0), dtype=self.dtype)
+        )
+
+    def _set_state(self, **values) -> None:
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)",
+            [(k, str(v)) for k, v in values.items()],
+        )
+
+    def count(self) -> int:
+        return self._live_count
+
+    def add(
+        self, ids: list[str], documents: list[str], metadatas: list[dict], vectors: list[list[float]]
+    ) -> None:
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = (matrix / np.where(norms == 0, 1, norms)).astype(self.dtype)
+        with self.lock:
+            if self.dim is None:
+                self.dim = matrix.shape[1]
+                self._set_state(dim=self.dim, dtype=self.dtype.name, generation=self.generation)
+                self._conn.commit()
+            elif matrix.shape[1] != self.dim:
+                raise ValueError(f"Expected {self.dim}-dimensional vectors, got {matrix.shape[1]}")
+
+            start = len(self._live)
+            # Vectors first, at the row offset the sidecar will record: a crash
+            # before the sidecar commit only leaves dead rows
+            mode = "r+b" if self._vectors_path.exists() else "wb"
+            with open(self._vectors_path, mode) as f:
+                f.seek(start * self._row_bytes)
+                f.write(matrix.tobytes())
+                f.truncate()
+            try:
+                self._conn.executemany(
+                    "INSERT INTO chunks (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+                    [
+                        (start + i, chunk_id, doc, json.dumps(meta))
+                        for i, (chunk_id, doc, meta) in enumerate(zip(ids, documents, metadatas))
+                    ],
+                )
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                self._truncate(start)
+                raise
+            self._map(start + len(matrix))
+            self._live = np.concatenate([self._live, np.ones(len(matrix), dtype=bool)])
+            self._live_count += len(matrix)
+
+    def ids_where(self, field: str, values: list[str]) -> list[str]:
+        """Chunk ids whose metadata *field* is one of *values* (full scan)."""
+        found: list[str] = []
+        with self.lock:
+            for start in range(0, len(values), _SQL_BATCH):
+                batch = values[start:start + _SQL_BATCH]
+                found.extend(
+                    chunk_id for (chunk_id,) in self._conn.execute(
+                        f"SELECT id FROM chunks WHERE json_extract(metadata, ?) "
+                        f"IN ({', '.join('?' * len(batch))})",
+                        [f"$.{field}", *batch],
+                    )
+                )
+        return found
+
+    def delete(self, ids: list[str]) -> int:
+        with self.lock:
+            rows: list[int] = []
+            for start in range(0, len(ids), _SQL_BATCH):
+                batch = ids[start:start + _SQL_BATCH]
+                placeholders = ", ".join("?" * len(batch))
+                rows.extend(
+                    row for (row,) in self._conn.execute(
+                        f"SELECT row FROM chunks WHERE id IN ({placeholders})", batch
+                    )
+                )
+                self._conn.execute(f"DELETE FROM chunks WHERE id IN ({placeholders})", batch)
+            self._conn.commit()
+            self._live[rows] = False
+            self._live_count -= len(rows)
+
+            dead = len(self._live) - self._live_count
+            if dead >= COMPACT_MIN_DEAD_ROWS and dead > COMPACT_DEAD_RATIO * len(self._live):
+                self._compact()
+            return len(rows)
+
+    def _compact(self) -> None:
+        live_rows = np.flatnonzero(self._live)
+        next_path = self.path / f"vectors.{self.generation + 1}.bin"
+        with open(next_path, "wb") as f:
+            for start in range(0, len(live_rows), 65536):
+                f.write(np.ascontiguousarray(self._matrix[live_rows[start:start + 65536]]).tobytes())
+        # Ascending order never collides: every live row moves down or stays
+        self._conn.executemany(
+            "UPDATE chunks SET row = ? WHERE row = ?",
+            [(new, int(old)) for new, old in enumerate(live_rows)],
+        )
+        self.generation += 1
+        self._set_state(generation=self.generation)
+        self._conn.commit()
+        logger.info(
+            "Compacted %s: %d -> %d rows", self.path, len(self._live), len(live_rows)
+        )
+        self._load()
+
+    def clear(self) -> None:
+        with self.lock:
+            self._conn.execute("DELETE FROM chunks")
+            self.generation += 1
+            self._set_state(generation=self.generation)
+            self._conn.commit()
+            self._load()
+
+    def search(
+        self, query_vector: list[float], k: int, score_threshold: float = 0.0
+    ) -> list[tuple[Document, float]]:
+        """Exact cosine top-k: one matrix-vector product and an argpartition."""
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query /= norm
+        with self.lock:
+            k = min(k, self._live_count)
+            if k <= 0:
+                return []
+            scores = self._matrix @ query
+            scores[~self._live] = -np.inf
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            top = [int(row) for row in top if scores[row] >= score_threshold]
+            if not top:
+                return []
+            placeholders = ", ".join("?" * len(top))
+            found = {
+                row: (doc, meta) for row, doc, meta in self._conn.execute(
+                    f"SELECT row, document, metadata FROM chunks WHERE row IN ({placeholders})", top
+                )
+            }
+        return [
+            (Document(page_content=found[row][0], metadata=json.loads(found[row][1])), float(scores[row]))
+            for row in top
+        ]
+
+    def documents(self, ids: list[str]) -> dict[str, Document]:
+        found: dict[str, Document] = {}
+        with self.lock:
+            for start in range(0, len(ids), _SQL_BATCH):
+                batch = ids[start:start + _SQL_BATCH]
+                for chunk_id, doc, meta in self._conn.execute(
+                    f"SELECT id, document, metadata FROM chunks "
+                    f"WHERE id IN ({', '.join('?' * len(batch))})",
+                    batch,
+                ):
+                    found[chunk_id] = Document(page_content=doc, metadata=json.loads(meta))
+        return found
+
+    def embeddings(self, ids: list[str]) -> dict[str, np.ndarray]:
+        found: dict[str, np.ndarray] = {}
+        with self.lock:
+            for start in range(0, len(ids), _SQL_BATCH):
+                batch = ids[start:start + _SQL_BATCH]
+                rows = self._conn.execute(
+                    f"SELECT id, row FROM chunks WHERE id IN ({', '.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for chunk_id, row in rows:
+                    found[chunk_id] = np.asarray(self._matrix[row], dtype=np.float32)
+        return found
+
+    def iter_pages(
+        self, columns: tuple[str, ...], batch_size: int
+    ) -> Iterator[dict[str, list]]:
+        """Yield live chunks in row order, a page of projected columns at a time."""
+        select = {"ids": "id", "documents": "document", "metadata": "metadata"}
+        sql_columns = [c for c in columns if c in select]
+        fields = ", ".join(["row", *(select[c] for c in sql_columns)])
+        last_row = -1
+        while True:
+            with self.lock:
+                rows = self._conn.execute(
+                    f"SELECT {fields} FROM chunks WHERE row > ? ORDER BY row LIMIT ?",
+                    (last_row, batch_size),
+                ).fetchall()
+                if not rows:
+                    return
+                embeddings = (
+                    np.asarray(self._matrix[[r[0] for r in rows]], dtype=np.float32)
+                    if "embeddings" in columns else None
+                )
+            last_row = rows[-1][0]
+            page: dict[str, list] = {}
+            for i, column in enumerate(sql_columns, start=1):
+                values = [r[i] for r in rows]
+                page[column] = [json.loads(v) for v in values] if column == "metadata" else values
+            if embeddings is not None:
+                page["embeddings"] = embeddings
+            yield page
+
+
+_stores: "weakref.WeakValueDictionary[str, VectorFileStore]" = weakref.WeakValueDictionary()
+_stores_lock = threading.Lock()
+
+
+def get_vector_file_store(path: str, dtype: str) -> VectorFileStore:
+    """Return the store for *path*, shared by every service using it."""
+    key = str(Path(path).resolve())
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = VectorFileStore(path, dtype)
+            _stores[key] = store
+        return store
+
+
+class NumpyVectorStoreService(VectorStoreService):
+    """VectorStoreService backed by a local VectorFileStore instead of DeepLake."""
+
+    def __init__(self, settings: Settings):
+        super().__init__(settings)
+        if self._is_cloud:
+            raise RuntimeError("The numpy vector backend requires a local DEEPLAKE_PATH")
+        self._store = get_vector_file_store(self.deeplake_path, settings.numpy_vector_dtype)
+
+    def _write_lock(self) -> threading.RLock:
+        return self._store.lock
+
+    def _after_write(self) -> None:
+        pass
+
+    def _row_count_locked(self) -> int:
+        return self._store.count()
+
+    def _append_rows_locked(self, ids, chunks, metadatas, vectors) -> None:
+        self._store.add(ids, chunks, metadatas, vectors)
+
+    def _scan_ids_locked(self, field: str, values: list[str]) -> list[str]:
+        return self._store.ids_where(field, values)
+
+    def _delete_rows_locked(self, ids: list[str]) -> None:
+        self._store.delete(ids)
+
+    def _dataset_exists(self) -> bool:
+        return True
+
+    def _read_ids_and_metadata(self) -> tuple[list[str], list[dict]]:
+        ids: list[str] = []
+        metadatas: list[dict] = []
+        for page in self._store.iter_pages(("ids", "metadata"), CHUNK_PAGE_SIZE):
+            ids.extend(page["ids"])
+            metadatas.extend(page["metadata"])
+        return ids, metadatas
+
+    def _fetch_documents(self, ids: list[str]) -> dict[str, Document]:
+        return self._store.documents(ids)
+
+    def _fetch_embeddings(self, ids: list[str]) -> dict[str, np.ndarray]:
+        return self._store.embeddings(ids)
+
+    async def _exact_search(
+        self, query: str, k: int, score_threshold: float, deep_memory: bool
+    ) -> list[tuple]:
+        """Exact cosine search; ``deep_memory`` is ignored (DeepLake only)."""
+        if self._store.count() == 0:
+            return []
+        vector = await self.embeddings.aembed_query(query)
+        return await asyncio.to_thread(self._store.search, vector, k, score_threshold)
+
+    def get_chunk_count(self) -> int:
+        return self._store.count()
+
+    def iter_chunk_batches(
+        self,
+        columns: tuple[str, ...] = ("ids", "documents"),
+        batch_size: int = CHUNK_PAGE_SIZE,
+    ) -> Iterator[dict[str, list]]:
+        return self._store.iter_pages(columns, batch_size)
+
+    def get_deep_memory_api(self):
+        raise RuntimeError("Deep Memory requires the DeepLake vector backend")
+
+    def clear(self) -> None:
+        self._store.clear()
@@ -1,9 +1,11 @@
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
 from supabase import Client
 
 from app.config import Settings
 from app.models.chat import ChatMessage
+from app.services.answer_cache import CachedAnswer, answer_scope, get_answer_cache
+from app.services.clients import get_clients
+from app.services.user_settings import get_user_settings_cache
 from app.services.vectorstore import get_user_vectorstore
 
 SYSTEM_PROMPT = """You are a helpful AI assistant for AlphaBase knowledge base.
@@ -30,25 +32,14 @@ class PublicChatService:
     def __init__(self, settings: Settings, supabase: Client | None = None):
         self.settings = settings
         self.supabase = supabase
-        self.llm = ChatOpenAI(
-            model=settings.chat_model,
-            max_tokens=settings.chat_max_tokens,
-            openai_api_key=settings.openai_api_key,
-            streaming=True,
+        self.llm = get_clients().chat_model(
+            settings, settings.chat_model, settings.chat_max_tokens, streaming=True
         )
 
     async def _retrieve_context(self, query: str, user_id: str) -> tuple[str, list[str]]:
         """Retrieve relevant context from the user's vector store with score filtering."""
-        deep_memory = False
-        if self.supabase:
-            try:
-                settings_result = self.supabase.table("deep_memory_settings").select(
-                    "enabled"
-                ).eq("user_id", user_id).execute()
-                if settings_result.data:
-                    deep_memory = settings_result.data[0]["enabled"]
-            except Exception:
-                pass
+        user_settings = await get_user_settings_cache().aload(user_id, self.supabase)
+        deep_memory = user_settings.deep_memory
 
         vectorstore = get_user_vectorstore(user_id, self.settings)
         results = await vectorstore.similarity_search(
@@ -76,6 +67,41 @@ class PublicChatService:
 
         return "\n\n".join(context_parts), sources
 
+    async def answer(
+        self, question: str, history: list[ChatMessage], user_id: str
+    ) -> tuple[str, list[str]]:
+        """Answer *question* from the user's KB.
+
+        Returns (answer, sources). Questions similar to an earlier one
+        (same KB version, mode and history) are answered from the answer
+        cache without retrieval or an LLM call.
+        """
+        cache = get_answer_cache(self.settings)
+        user_settings = await get_user_settings_cache().aload(user_id, self.supabase)
+        kb_version = user_settings.kb_version if cache is not None else ""
+        if kb_version:
+            scope = answer_scope("public", user_settings.deep_memory, history)
+            vectorstore = get_user_vectorstore(user_id, self.settings)
+            query_vector = await vectorstore.embeddings.aembed_query(question)
+            cached = cache.lookup(user_id, kb_version, scope, query_vector)
+            if cached is not None:
+                return cached.text, list(cached.sources)
+
+        context, sources = await self._retrieve_context(question, user_id=user_id)
+        messages = self._build_messages(context, history, question)
+
+        full_response = ""
+        async for chunk in self.llm.astream(messages):
+            token = chunk.content
+            if token:
+                full_response += token
+
+        if kb_version and full_response:
+            cache.put(user_id, kb_version, scope, query_vector, CachedAnswer(
+                text=full_response, sources=tuple(sources),
+            ))
+        return full_response, sources
+
     def _build_messages(
         self,
         context: str,
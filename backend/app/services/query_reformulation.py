@@ -1,10 +1,11 @@
 import asyncio
 import logging
 
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
 
 from app.config import Settings
+from app.services.clients import get_clients
+from app.services.typo_corrector import KBVocabulary
 
 logger = logging.getLogger(__name__)
 
@@ -19,17 +20,28 @@ Rules:
 - Do not add quotes, explanations, or formatting — just the corrected query text"""
 
 
-async def reformulate_query(query: str, settings: Settings) -> str:
+async def reformulate_query(
+    query: str, settings: Settings, vocabulary: KBVocabulary | None = None
+) -> str:
     """Reformulate a user query to correct typos and expand abbreviations.
 
+    If the user's KB *vocabulary* is complete and every query token is
+    either known or correctable locally, the locally corrected query is
+    returned without an LLM call.
+
     Returns the corrected query, or the original query on any failure.
     """
+    if vocabulary is not None and vocabulary.complete and settings.local_query_correction:
+        corrected, resolved = vocabulary.correct(query)
+        if resolved:
+            if corrected != query:
+                logger.info("Query corrected locally: '%s' → '%s'", query, corrected)
+            return corrected
+        logger.debug("Out-of-vocabulary tokens in '%s', falling back to LLM", query)
+
     try:
-        llm = ChatOpenAI(
-            model=settings.query_reformulation_model,
-            max_tokens=256,
-            openai_api_key=settings.openai_api_key,
-            temperature=0,
+        llm = get_clients().chat_model(
+            settings, settings.query_reformulation_model, max_tokens=256, temperature=0
         )
         messages = [
             SystemMessage(content=REFORMULATION_PROMPT),
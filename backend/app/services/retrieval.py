@@ -0,0 +1,136 @@
+"""Retrieval helpers shared by the chat paths and agent tools."""
+
+import asyncio
+import logging
+
+from app.config import Settings
+from app.services.embedding_cache import normalize_query
+from app.services.query_reformulation import reformulate_query
+from app.services.typo_corrector import KBVocabulary, get_vocabulary
+from app.services.vectorstore import VectorStoreService
+
+logger = logging.getLogger(__name__)
+
+RRF_K = 60
+
+_background_tasks: set[asyncio.Task] = set()
+
+
+def _doc_key(doc) -> tuple[str, str]:
+    meta = doc.metadata or {}
+    return meta.get("source", ""), doc.page_content
+
+
+def reciprocal_rank_fusion(
+    result_lists: list[list[tuple]], limit: int, rrf_k: int = RRF_K
+) -> list[tuple]:
+    """Fuse ranked (doc, score) lists with reciprocal-rank fusion.
+
+    Documents are ordered by their summed ``1 / (rrf_k + rank)``; each keeps
+    its best relevance score from the input lists so score thresholds and
+    the "relevance" shown in context stay meaningful.
+    """
+    fused: dict[tuple[str, str], float] = {}
+    best: dict[tuple[str, str], tuple] = {}
+    for results in result_lists:
+        for rank, (doc, score) in enumerate(results):
+            key = _doc_key(doc)
+            fused[key] = fused.get(key, 0.0) + 1.0 / (rrf_k + rank + 1)
+            if key not in best or score > best[key][1]:
+                best[key] = (doc, score)
+    ordered = sorted(fused, key=fused.get, reverse=True)
+    return [best[key] for key in ordered[:limit]]
+
+
+async def _load_vocabulary(
+    vectorstore: VectorStoreService, settings: Settings
+) -> KBVocabulary | None:
+    """Return the user's KB vocabulary, bootstrapping it in the background if incomplete.
+
+    Datasets ingested before the vocabulary existed have no vocabulary, or
+    one holding only chunks added since; it is rebuilt once from the stored
+    chunks while queries fall back to the LLM.
+    """
+    if not settings.local_query_correction:
+        return None
+    vocabulary = await asyncio.to_thread(get_vocabulary, vectorstore.deeplake_path, settings)
+    if not vocabulary.complete and not vocabulary.building:
+        vocabulary.building = True
+
+        async def _rebuild() -> None:
+            try:
+                async for page in vectorstore.aiter_chunk_batches(
+                    columns=("documents", "metadata")
+                ):
+                    await asyncio.to_thread(
+                        vocabulary.add_texts, page["documents"], page["metadata"], persist=False
+                    )
+                await asyncio.to_thread(vocabulary.mark_complete)
+                logger.info(
+                    "Built KB vocabulary for %s (%d words)",
+                    vectorstore.deeplake_path, len(vocabulary.index),
+                )
+            except Exception as e:
+                logger.warning(
+                    "Failed to build KB vocabulary for %s: %s", vectorstore.deeplake_path, e
+                )
+            finally:
+                vocabulary.building = False
+
+        task = asyncio.create_task(_rebuild())
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+    return vocabulary
+
+
+async def search_with_reformulation(
+    query: str,
+    vectorstore: VectorStoreService,
+    settings: Settings,
+    *,
+    k: int,
+    score_threshold: float,
+    deep_memory: bool = False,
+    raw_results: list[tuple] | None = None,
+) -> list[tuple]:
+    """Reformulate *query* and search the user's vector store.
+
+    With ``speculative_retrieval`` enabled, retrieval on the raw query starts
+    while reformulation runs. If the reformulated query is unchanged, the
+    speculative results are returned directly; otherwise results for both
+    queries are fused with reciprocal-rank fusion.
+
+    *raw_results*, when the caller already searched the raw query (e.g. the
+    extended-search fast-path check), stand in for the speculative search.
+    """
+    vocabulary = await _load_vocabulary(vectorstore, settings)
+
+    speculative: asyncio.Future | None = None
+    if raw_results is not None:
+        speculative = asyncio.get_running_loop().create_future()
+        speculative.set_result(
+            [(doc, score) for doc, score in raw_results if score >= score_threshold][:k]
+        )
+    elif settings.speculative_retrieval:
+        speculative = asyncio.create_task(
+            vectorstore.similarity_search(
+                query=query, k=k, score_threshold=score_threshold, deep_memory=deep_memory,
+            )
+        )
+    try:
+        search_query = await reformulate_query(query, settings, vocabulary)
+        if speculative is not None and normalize_query(search_query) == normalize_query(query):
+            return await speculative
+
+        corrected = await vectorstore.similarity_search(
+            query=search_query, k=k, score_threshold=score_threshold, deep_memory=deep_memory,
+        )
+        if speculative is None:
+            return corrected
+        raw = await speculative
+    finally:
+        if speculative is not None and not speculative.done():
+            speculative.cancel()
+
+    logger.info("Fusing results for raw and reformulated query: '%s'", search_query)
+    return reciprocal_rank_fusion([corrected, raw], limit=k)
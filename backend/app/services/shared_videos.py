@@ -0,0 +1,133 @@
+"""Cross-user store of YouTube transcripts and their chunk embeddings.
+
+Popular channels are ingested by many users, and each ingest used to
+re-transcribe every video and re-embed every chunk into that user's own
+dataset. This SQLite store, at ``shared_video_store_path``, keeps both once:
+
+- transcripts keyed by video_id, only for transcripts fetched without the
+  user's cookies (so members-only videos never leak to other users);
+- chunk sets keyed by ``(video_id, sha256(transcript), chunk_size,
+  chunk_overlap, embedding model)``, holding the chunk texts and their
+  vectors. A lookup needs the transcript text itself, so it reveals nothing
+  the caller does not already have.
+
+Per-user datasets still receive their own copy of every chunk; the store
+only saves the YouTube and embedding API calls that produce them.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from app.config import Settings
+
+logger = logging.getLogger(__name__)
+
+
+class SharedVideoStore:
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS transcripts (
+                    video_id TEXT PRIMARY KEY,
+                    text TEXT NOT NULL,
+                    fetched_at REAL NOT NULL
+                )"""
+            )
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS chunk_sets (
+                    video_id TEXT NOT NULL,
+                    transcript_hash TEXT NOT NULL,
+                    chunk_size INTEGER NOT NULL,
+                    chunk_overlap INTEGER NOT NULL,
+                    model TEXT NOT NULL,
+                    chunks TEXT NOT NULL,
+                    vectors BLOB NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (video_id, transcript_hash, chunk_size, chunk_overlap, model)
+                )"""
+            )
+            self._conn.commit()
+
+    def get_transcript(self, video_id: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text FROM transcripts WHERE video_id = ?", (video_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put_transcript(self, video_id: str, text: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO transcripts (video_id, text, fetched_at) VALUES (?, ?, ?)",
+                (video_id, text, time.time()),
+            )
+            self._conn.commit()
+
+    def get_chunks(
+        self, video_id: str, transcript_hash: str, chunk_size: int, chunk_overlap: int, model: str
+    ) -> tuple[list[str], list[list[float]]] | None:
+        """Return (chunks, vectors) for a transcript, or None if not stored yet."""
+        with self._lock:
+            row = self._conn.execute(
+                """SELECT chunks, vectors FROM chunk_sets WHERE video_id = ?
+                   AND transcript_hash = ? AND chunk_size = ? AND chunk_overlap = ? AND model = ?""",
+                (video_id, transcript_hash, chunk_size, chunk_overlap, model),
+            ).fetchone()
+        if row is None:
+            return None
+        chunks = json.loads(row[0])
+        vectors = np.frombuffer(row[1], dtype=np.float32)
+        if not chunks:
+            return [], []
+        return chunks, vectors.reshape(len(chunks), -1).tolist()
+
+    def put_chunks(
+        self,
+        video_id: str,
+        transcript_hash: str,
+        chunk_size: int,
+        chunk_overlap: int,
+        model: str,
+        chunks: list[str],
+        vectors: list[list[float]],
+    ) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chunk_sets (video_id, transcript_hash, chunk_size, "
+                "chunk_overlap, model, chunks, vectors, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    video_id, transcript_hash, chunk_size, chunk_overlap, model,
+                    json.dumps(chunks), np.asarray(vectors, dtype=np.float32).tobytes(),
+                    time.time(),
+                ),
+            )
+            self._conn.commit()
+
+
+_stores: dict[str, SharedVideoStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_shared_video_store(settings: Settings) -> SharedVideoStore | None:
+    """Return the process-wide shared store, or None when it is disabled."""
+    path = settings.shared_video_store_path
+    if not path:
+        return None
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = SharedVideoStore(path)
+            _stores[path] = store
+        return store
@@ -2,6 +2,7 @@ import asyncio
 import json
 import logging
 import traceback
+from collections.abc import AsyncIterator
 from datetime import datetime, timezone
 
 from openai import AsyncOpenAI
@@ -9,8 +10,10 @@ from supabase import Client
 
 from app.config import Settings
 from app.models.knowledge import JobStatus
+from app.services import db
+from app.services.clients import get_clients
 from app.services.job_manager import JobManager
-from app.services.vectorstore import get_user_vectorstore
+from app.services.vectorstore import VectorStoreService, get_user_vectorstore
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +41,25 @@ Return a JSON object with a single key "questions" containing an array of questi
 Example: {{"questions": ["What is an iron condor?", "How do you profit from an iron condor strategy?"]}}"""
 
 
+async def _unprocessed_chunks(
+    vectorstore: VectorStoreService, skip_ids: set[str], limit: int
+) -> AsyncIterator[tuple[dict, int]]:
+    """Stream (chunk, position) for chunks not in *skip_ids*, at most *limit*.
+
+    The limit keeps progress consistent with the counted total if chunks
+    are added while the run is generating.
+    """
+    position = 0
+    async for page in vectorstore.aiter_chunk_batches(columns=("ids", "documents")):
+        for chunk_id, text in zip(page["ids"], page["documents"]):
+            if chunk_id in skip_ids:
+                continue
+            if position >= limit:
+                return
+            yield {"id": chunk_id, "text": text}, position
+            position += 1
+
+
 async def generate_training_data(
     training_run_id: str,
     job_id: str,
@@ -46,66 +68,69 @@ async def generate_training_data(
     supabase: Client,
 ) -> None:
     """Background task: generate question-chunk training pairs using LLM."""
-    openai_client = AsyncOpenAI(api_key=settings.openai_api_key)
+    openai_client = get_clients().openai(settings.openai_api_key)
 
     try:
         # Get user_id from the training run record
-        run_result = supabase.table("deep_memory_training_runs").select(
-            "user_id"
-        ).eq("id", training_run_id).execute()
+        run_result = await db.execute(
+            supabase.table("deep_memory_training_runs").select("user_id").eq("id", training_run_id)
+        )
         user_id = run_result.data[0]["user_id"]
 
-        # Create user-scoped vectorstore and fetch chunks
+        # Create user-scoped vectorstore; chunks are streamed page by page below
         vectorstore = get_user_vectorstore(user_id, settings)
-        chunks = await asyncio.to_thread(vectorstore.get_all_chunk_ids_and_texts)
+        chunk_count = await asyncio.to_thread(vectorstore.get_chunk_count)
 
         # Warn if user has fewer than 50 chunks — training quality may be poor
-        if len(chunks) < 50:
+        if chunk_count < 50:
             logger.warning(
                 "User %s has only %d chunks (< 50). Deep Memory training results may be poor.",
-                user_id, len(chunks),
+                user_id, chunk_count,
             )
-            supabase.table("deep_memory_training_runs").update({
-                "error_message": f"Warning: Only {len(chunks)} chunks in knowledge base (< 50). Training results may be poor.",
-            }).eq("id", training_run_id).execute()
+            await db.execute(supabase.table("deep_memory_training_runs").update({
+                "error_message": f"Warning: Only {chunk_count} chunks in knowledge base (< 50). Training results may be poor.",
+            }).eq("id", training_run_id))
 
         # Check for already-processed chunks in THIS run (resumability)
-        existing_result = supabase.table("deep_memory_training_pairs").select(
+        existing_result = await db.execute(supabase.table("deep_memory_training_pairs").select(
             "chunk_id"
-        ).eq("training_run_id", training_run_id).execute()
+        ).eq("training_run_id", training_run_id))
         current_run_chunk_ids = {row["chunk_id"] for row in (existing_result.data or [])}
 
-        completed_runs = supabase.table("deep_memory_training_runs").select(
+        completed_runs = await db.execute(supabase.table("deep_memory_training_runs").select(
             "id"
-        ).eq("user_id", user_id).eq("status", "completed").execute()
+        ).eq("user_id", user_id).eq("status", "completed"))
         completed_run_ids = [r["id"] for r in (completed_runs.data or [])]
 
         previously_trained_chunk_ids: set[str] = set()
         if completed_run_ids:
-            hist_pairs = supabase.table("deep_memory_training_pairs").select(
+            hist_pairs = await db.execute(supabase.table("deep_memory_training_pairs").select(
                 "chunk_id"
-            ).in_("training_run_id", completed_run_ids).execute()
+            ).in_("training_run_id", completed_run_ids))
             previously_trained_chunk_ids = {
                 row["chunk_id"] for row in (hist_pairs.data or [])
             }
 
-        # Skip chunks already in this run OR from previous completed runs
+        # Skip chunks already in this run OR from previous completed runs.
+        # Count the rest from an ids-only pass; texts are read in the second pass.
         skip_ids = current_run_chunk_ids | previously_trained_chunk_ids
-        unprocessed = [c for c in chunks if c["id"] not in skip_ids]
+        unprocessed_count = 0
+        async for page in vectorstore.aiter_chunk_batches(columns=("ids",)):
+            unprocessed_count += sum(1 for chunk_id in page["ids"] if chunk_id not in skip_ids)
 
         already_processed = len(current_run_chunk_ids)
-        total_chunks = len(unprocessed) + already_processed  # Full run total for correct progress labels
+        total_chunks = unprocessed_count + already_processed  # Full run total for correct progress labels
 
         # Update run with total count
-        supabase.table("deep_memory_training_runs").update({
+        await db.execute(supabase.table("deep_memory_training_runs").update({
             "total_chunks": total_chunks,
             "processed_chunks": already_processed,
-        }).eq("id", training_run_id).execute()
+        }).eq("id", training_run_id))
 
         # Get current pair count
-        pair_count_result = supabase.table("deep_memory_training_pairs").select(
+        pair_count_result = await db.execute(supabase.table("deep_memory_training_pairs").select(
             "id", count="exact"
-        ).eq("training_run_id", training_run_id).execute()
+        ).eq("training_run_id", training_run_id))
         pair_count = pair_count_result.count or 0
 
         job_manager.update_job(
@@ -120,7 +145,7 @@ async def generate_training_data(
             },
         )
 
-        for i, chunk in enumerate(unprocessed):
+        async for chunk, i in _unprocessed_chunks(vectorstore, skip_ids, unprocessed_count):
             # Check pair cap
             if pair_count >= settings.deep_memory_max_pairs:
                 logger.info(f"Reached max pairs cap ({settings.deep_memory_max_pairs}), stopping generation")
@@ -146,7 +171,7 @@ async def generate_training_data(
                     for q in questions
                 ]
                 if rows:
-                    supabase.table("deep_memory_training_pairs").insert(rows).execute()
+                    await db.execute(supabase.table("deep_memory_training_pairs").insert(rows))
                     pair_count += len(rows)
 
             except Exception as e:
@@ -156,10 +181,10 @@ async def generate_training_data(
             processed = already_processed + i + 1
             progress = int((processed / total_chunks) * 100) if total_chunks > 0 else 0
 
-            supabase.table("deep_memory_training_runs").update({
+            await db.execute(supabase.table("deep_memory_training_runs").update({
                 "processed_chunks": processed,
                 "pair_count": pair_count,
-            }).eq("id", training_run_id).execute()
+            }).eq("id", training_run_id))
 
             job_manager.update_job(
                 job_id,
@@ -173,16 +198,16 @@ async def generate_training_data(
             )
 
             # Rate limiting
-            if i < len(unprocessed) - 1:
+            if i < unprocessed_count - 1:
                 await asyncio.sleep(settings.deep_memory_generation_delay)
 
         # Complete
-        supabase.table("deep_memory_training_runs").update({
+        await db.execute(supabase.table("deep_memory_training_runs").update({
             "status": "generated",
             "pair_count": pair_count,
             "processed_chunks": total_chunks,
             "completed_at": datetime.now(timezone.utc).isoformat(),
-        }).eq("id", training_run_id).execute()
+        }).eq("id", training_run_id))
 
         job_manager.update_job(
             job_id,
@@ -198,10 +223,10 @@ async def generate_training_data(
 
     except Exception as e:
         logger.error(f"Training data generation failed: {traceback.format_exc()}")
-        supabase.table("deep_memory_training_runs").update({
+        await db.execute(supabase.table("deep_memory_training_runs").update({
             "status": "generating_failed",
             "error_message": str(e)[:500],
-        }).eq("id", training_run_id).execute()
+        }).eq("id", training_run_id))
 
         job_manager.update_job(
             job_id,
@@ -1,6 +1,7 @@
 import json
 import logging
 import tempfile
+from collections.abc import Callable
 from pathlib import Path
 
 import yt_dlp
@@ -13,8 +14,9 @@ from supabase import Client
 
 from app.config import Settings
 from app.models.errors import AuthenticationError
-from app.services.auth_detection import is_auth_error
-from app.utils.text import parse_vtt, sanitize_filename
+from app.services.auth_detection import is_auth_error, is_rate_limited
+from app.services.transcript_store import TranscriptEntry, get_transcript_store
+from app.utils.text import parse_vtt
 
 logger = logging.getLogger(__name__)
 
@@ -23,13 +25,13 @@ class TranscriptionError(Exception):
     pass
 
 
-def get_transcript_content(
+def get_transcript_entry(
     video_id: str, user_id: str, settings: Settings, supabase: Client
-) -> dict:
-    """Retrieve transcript file content for a video owned by the user.
+) -> tuple[dict, TranscriptEntry]:
+    """Look up a transcribed video owned by the user and its stored transcript.
 
-    Returns dict with video_id, title, url, and content (transcript body).
-    Raises HTTPException 404 if video not found, not transcribed, or file missing.
+    Returns the video record (video_id, title, url) and the store entry.
+    Raises HTTPException 404 if video not found, not transcribed, or transcript missing.
     """
     # Look up video record scoped to user
     result = (
@@ -46,40 +48,25 @@ def get_transcript_content(
     if not video.get("is_transcribed"):
         raise HTTPException(status_code=404, detail="Video has not been transcribed")
 
-    # Reconstruct filename from title
-    filename = sanitize_filename(video["title"]) + ".md"
-    file_path = Path(settings.transcripts_dir) / filename
-
-    if not file_path.exists():
+    store = get_transcript_store(settings.transcripts_dir)
+    # Not yet migrated title-named files are served read-only
+    entry = store.entry(video_id) or store.legacy_entry(video_id, video["title"])
+    if entry is None:
         raise HTTPException(
             status_code=404,
             detail="Transcript file not found. Try re-transcribing the video.",
         )
-
-    raw_content = file_path.read_text(encoding="utf-8")
-    if not raw_content.strip():
+    if entry.size == 0:
         raise HTTPException(
             status_code=404,
             detail="Transcript file is empty. Try re-transcribing the video.",
         )
-
-    # Parse content: extract body after "---" separator
-    separator = "\n---\n"
-    if separator in raw_content:
-        content = raw_content.split(separator, 1)[1].strip()
-    else:
-        # Fallback: return entire content if no separator found
-        content = raw_content.strip()
-
-    return {
-        "video_id": video["video_id"],
-        "title": video["title"],
-        "url": video["url"],
-        "content": content,
-    }
+    return video, entry
 
 
-def get_transcript_via_api(video_id: str, settings: Settings) -> str | None:
+def get_transcript_via_api(
+    video_id: str, settings: Settings, on_rate_limited: Callable[[], None] | None = None
+) -> str | None:
     """Attempt to get transcript via youtube-transcript-api (fast, free)."""
     try:
         if settings.proxy_user and settings.proxy_pass:
@@ -95,10 +82,16 @@ def get_transcript_via_api(video_id: str, settings: Settings) -> str | None:
         return " ".join(snippet.text for snippet in transcript.snippets)
     except Exception as e:
         logger.warning("youtube-transcript-api failed for %s: %s", video_id, e)
+        if on_rate_limited and is_rate_limited(e):
+            on_rate_limited()
         return None
 
 
-def get_transcript_via_ytdlp(video_id: str, cookie: str | None = None) -> str | None:
+def get_transcript_via_ytdlp(
+    video_id: str,
+    cookie: str | None = None,
+    on_rate_limited: Callable[[], None] | None = None,
+) -> str | None:
     """Fallback: download auto-generated subtitles via yt-dlp Python API."""
     url = f"https://www.youtube.com/watch?v={video_id}"
 
@@ -167,6 +160,8 @@ def get_transcript_via_ytdlp(video_id: str, cookie: str | None = None) -> str |
         return parse_vtt(vtt_content)
 
     except DownloadError as e:
+        if on_rate_limited and is_rate_limited(e):
+            on_rate_limited()
         if is_auth_error(e):
             raise AuthenticationError(
                 message=str(e),
@@ -175,59 +170,80 @@ def get_transcript_via_ytdlp(video_id: str, cookie: str | None = None) -> str |
             ) from e
         logger.warning("yt-dlp non-auth error for %s: %s", video_id, e)
         return None
-    except Exception:
+    except Exception as e:
+        if on_rate_limited and is_rate_limited(e):
+            on_rate_limited()
         return None
     finally:
         if cookie_file_path:
             Path(cookie_file_path).unlink(missing_ok=True)
 
 
-def get_transcript(video_id: str, title: str, cookie: str | None = None, settings: Settings | None = None) -> str:
-    """Get transcript, trying youtube-transcript-api first, then yt-dlp."""
+def fetch_transcript(
+    video_id: str,
+    title: str,
+    cookie: str | None = None,
+    settings: Settings | None = None,
+    on_rate_limited: Callable[[], None] | None = None,
+) -> tuple[str, bool]:
+    """Get a transcript like get_transcript, and report whether it is public.
+
+    A transcript is public when it was fetched without the user's cookies,
+    so it may be shared with other users (see shared_videos).
+    """
     if settings is None:
         from app.config import settings as default_settings
         settings = default_settings
 
-    text = get_transcript_via_api(video_id, settings)
+    text = get_transcript_via_api(video_id, settings, on_rate_limited)
     if text:
-        return text
+        return text, True
 
-    text = get_transcript_via_ytdlp(video_id, cookie=cookie)
+    text = get_transcript_via_ytdlp(video_id, cookie=cookie, on_rate_limited=on_rate_limited)
     if text:
-        return text
+        return text, not cookie
 
     raise TranscriptionError(f"No transcript available for {video_id}: {title}")
 
 
+def get_transcript(
+    video_id: str,
+    title: str,
+    cookie: str | None = None,
+    settings: Settings | None = None,
+    on_rate_limited: Callable[[], None] | None = None,
+) -> str:
+    """Get transcript, trying youtube-transcript-api first, then yt-dlp.
+
+    ``on_rate_limited`` is called (from the worker thread) whenever either
+    backend reports throttling, even if the other one then succeeds.
+    """
+    return fetch_transcript(video_id, title, cookie, settings, on_rate_limited)[0]
+
+
 def delete_transcripts(videos: list[dict], transcripts_dir: str) -> int:
-    """Delete transcript markdown files for the given videos.
+    """Delete stored transcripts for the given videos.
 
     Args:
-        videos: List of dicts with 'title' and 'is_transcribed' keys.
+        videos: List of dicts with 'video_id', 'title' and 'is_transcribed' keys.
         transcripts_dir: Path to the transcripts directory.
 
     Returns:
-        Number of files actually deleted.
+        Number of transcripts actually deleted.
     """
     deleted = 0
-    dir_path = Path(transcripts_dir)
+    store = get_transcript_store(transcripts_dir)
     for video in videos:
         if not video.get("is_transcribed"):
             continue
-        filename = sanitize_filename(video["title"]) + ".md"
-        file_path = dir_path / filename
-        if file_path.exists():
-            file_path.unlink()
+        if store.entry(video["video_id"]) is None:
+            # Pick up a not yet migrated title-named file for this video
+            store.migrate_legacy(video["video_id"], video["title"])
+        if store.delete(video["video_id"]):
             deleted += 1
     return deleted
 
 
-def save_transcript_md(video_id: str, title: str, text: str, output_dir: Path) -> Path:
-    """Save transcript as markdown file in the PoC format."""
-
-    output_dir.mkdir(parents=True, exist_ok=True)
-    filename = sanitize_filename(title)
-    output_path = output_dir / f"{filename}.md"
-    content = f"# {title}\n\n**Video:** https://youtube.com/watch?v={video_id}\n\n---\n\n{text}"
-    output_path.write_text(content, encoding="utf-8")
-    return output_path
+def save_transcript(video_id: str, title: str, text: str, transcripts_dir: str) -> TranscriptEntry:
+    """Store a transcript under its video_id (see transcript_store)."""
+    return get_transcript_store(transcripts_dir).put(video_id, title, text)
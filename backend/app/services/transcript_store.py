@@ -0,0 +1,295 @@
+"""Video-ID-keyed, compressed transcript storage.
+
+Transcripts used to be written to ``transcripts_dir/<sanitized title>.md``:
+videos whose titles sanitize to the same name overwrote each other, and
+readers had to rebuild paths from titles. Each transcript is now stored in
+its own file named after the video_id, as independently compressed blocks
+of BLOCK_SIZE bytes (zstd when the zstandard package is available, gzip
+otherwise), so a byte-range read only decodes the blocks it overlaps.
+
+An SQLite index (``index.db``) records each transcript's title, codec,
+size, block lengths, file name and ETag. A new version is written to a new
+file and only becomes visible when its index row is committed; the old
+file is removed afterwards, so readers never see a partial transcript.
+
+Transcripts in the old title-based layout are served in place, read-only
+(see legacy_entry), until they are migrated on delete or all at once with:
+
+    python -m app.services.transcript_store migrate
+"""
+
+import argparse
+import gzip
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from app.utils.text import sanitize_filename
+
+try:
+    import zstandard
+except ImportError:  # only a transitive dependency; gzip is always available
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+BLOCK_SIZE = 64 * 1024
+INDEX_FILE = "index.db"
+
+_VIDEO_ID_RE = re.compile(r"^[A-Za-z0-9_-]+$")
+_LEGACY_SEPARATOR = "\n---\n"
+LEGACY_CODEC = "legacy"  # an unmigrated title-named .md file, read whole
+
+
+@dataclass
+class TranscriptEntry:
+    video_id: str
+    title: str
+    size: int             # uncompressed UTF-8 bytes
+    etag: str
+    codec: str
+    filename: str
+    blocks: list[int]     # compressed length of each block
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read this transcript")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+class TranscriptStore:
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.codec = "zstd" if zstandard is not None else "gzip"
+        self._conn = sqlite3.connect(str(self.root / INDEX_FILE), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS transcripts (
+                    video_id TEXT PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    etag TEXT NOT NULL,
+                    codec TEXT NOT NULL,
+                    filename TEXT NOT NULL,
+                    blocks TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )"""
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def _check_id(video_id: str) -> None:
+        if not _VIDEO_ID_RE.match(video_id):
+            raise ValueError(f"Invalid video id: {video_id!r}")
+
+    def entry(self, video_id: str) -> TranscriptEntry | None:
+        self._check_id(video_id)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT title, size, etag, codec, filename, blocks FROM transcripts WHERE video_id = ?",
+                (video_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        title, size, etag, codec, filename, blocks = row
+        return TranscriptEntry(
+            video_id, title, size, etag, codec, filename,
+            [int(b) for b in blocks.split(",") if b],
+        )
+
+    def put(self, video_id: str, title: str, text: str) -> TranscriptEntry:
+        """Store (or replace) a transcript atomically."""
+        self._check_id(video_id)
+        data = text.encode("utf-8")
+        etag = hashlib.sha256(data).hexdigest()[:32]
+        compressed = [
+            _compress(data[start:start + BLOCK_SIZE], self.codec)
+            for start in range(0, len(data), BLOCK_SIZE)
+        ]
+        suffix = ".zst" if self.codec == "zstd" else ".gz"
+        filename = f"{video_id}.{etag[:12]}{suffix}"
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=f".{video_id}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for block in compressed:
+                    f.write(block)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.root / filename)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+        entry = TranscriptEntry(
+            video_id, title, len(data), etag, self.codec, filename, [len(b) for b in compressed]
+        )
+        with self._lock:
+            previous = self._conn.execute(
+                "SELECT filename FROM transcripts WHERE video_id = ?", (video_id,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO transcripts "
+                "(video_id, title, size, etag, codec, filename, blocks, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    video_id, title, entry.size, etag, entry.codec, filename,
+                    ",".join(str(b) for b in entry.blocks), time.time(),
+                ),
+            )
+            self._conn.commit()
+        if previous is not None and previous[0] != filename:
+            (self.root / previous[0]).unlink(missing_ok=True)
+        return entry
+
+    def read(self, entry: TranscriptEntry, start: int = 0, end: int | None = None) -> bytes:
+        """Return bytes ``[start, end)`` of the transcript, decoding only the blocks needed."""
+        end = entry.size if end is None else min(end, entry.size)
+        if start >= end:
+            return b""
+        if entry.codec == LEGACY_CODEC:
+            found = self._legacy_body(entry.video_id, entry.title)
+            if found is None:
+                raise FileNotFoundError(self.root / entry.filename)
+            return found[1][start:end]
+        first, last = start // BLOCK_SIZE, (end - 1) // BLOCK_SIZE
+        offset = sum(entry.blocks[:first])
+        with open(self.root / entry.filename, "rb") as f:
+            f.seek(offset)
+            data = b"".join(
+                _decompress(f.read(entry.blocks[i]), entry.codec) for i in range(first, last + 1)
+            )
+        base = first * BLOCK_SIZE
+        return data[start - base:end - base]
+
+    def read_latest(
+        self, entry: TranscriptEntry, start: int = 0, end: int | None = None
+    ) -> tuple[TranscriptEntry, bytes]:
+        """read(), retried once with the current entry if a concurrent put or
+        delete removed the file; returns the entry that was read."""
+        try:
+            return entry, self.read(entry, start, end)
+        except FileNotFoundError:
+            current = self.entry(entry.video_id)
+            if current is None:
+                raise
+            return current, self.read(current, start, end)
+
+    def read_text(self, video_id: str) -> str | None:
+        entry = self.entry(video_id)
+        if entry is None:
+            return None
+        return self.read(entry).decode("utf-8")
+
+    def delete(self, video_id: str) -> bool:
+        entry = self.entry(video_id)
+        if entry is None:
+            return False
+        with self._lock:
+            self._conn.execute("DELETE FROM transcripts WHERE video_id = ?", (video_id,))
+            self._conn.commit()
+        (self.root / entry.filename).unlink(missing_ok=True)
+        return True
+
+    def _legacy_body(self, video_id: str, title: str) -> tuple[Path, bytes] | None:
+        """``<sanitized title>.md`` and its body, if the file holds this video's transcript."""
+        legacy = self.root / f"{sanitize_filename(title)}.md"
+        try:
+            raw = legacy.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+        header, sep, body = raw.partition(_LEGACY_SEPARATOR)
+        if not sep or f"watch?v={video_id}" not in header:
+            # Another video with the same sanitized title overwrote it
+            return None
+        return legacy, body.strip().encode("utf-8")
+
+    def legacy_entry(self, video_id: str, title: str) -> TranscriptEntry | None:
+        """Entry for a not yet migrated title-named file, served without writing."""
+        found = self._legacy_body(video_id, title)
+        if found is None:
+            return None
+        legacy, data = found
+        etag = hashlib.sha256(data).hexdigest()[:32]
+        return TranscriptEntry(video_id, title, len(data), etag, LEGACY_CODEC, legacy.name, [])
+
+    def migrate_legacy(self, video_id: str, title: str) -> TranscriptEntry | None:
+        """Import ``<sanitized title>.md`` if it holds this video's transcript."""
+        found = self._legacy_body(video_id, title)
+        if found is None:
+            return None
+        legacy, data = found
+        entry = self.put(video_id, title, data.decode("utf-8"))
+        legacy.unlink(missing_ok=True)
+        logger.info("Migrated legacy transcript file for %s", video_id)
+        return entry
+
+
+_stores: dict[str, TranscriptStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_transcript_store(transcripts_dir: str) -> TranscriptStore:
+    """Return the process-wide store rooted at *transcripts_dir*."""
+    with _stores_lock:
+        store = _stores.get(transcripts_dir)
+        if store is None:
+            store = TranscriptStore(transcripts_dir)
+            _stores[transcripts_dir] = store
+        return store
+
+
+def main(argv: list[str] | None = None) -> int:
+    from app.config import settings
+    from app.dependencies import get_supabase
+
+    parser = argparse.ArgumentParser(description="Migrate title-named transcript files")
+    parser.add_argument("command", choices=["migrate"])
+    parser.parse_args(argv)
+
+    store = get_transcript_store(settings.transcripts_dir)
+    supabase = get_supabase()
+    migrated = 0
+    page_size = 1000
+    offset = 0
+    while True:
+        videos = (
+            supabase.table("videos")
+            .select("video_id, title")
+            .eq("is_transcribed", True)
+            .range(offset, offset + page_size - 1)
+            .execute()
+        ).data
+        for video in videos:
+            if store.entry(video["video_id"]) is None:
+                if store.migrate_legacy(video["video_id"], video["title"]) is not None:
+                    migrated += 1
+        if len(videos) < page_size:
+            break
+        offset += page_size
+    print(f"Migrated {migrated} transcript(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(main())
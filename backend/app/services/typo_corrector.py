@@ -0,0 +1,355 @@
+"""Local, per-user query typo correction from knowledge-base vocabulary.
+
+Each user's vocabulary (words from ingested chunks plus metadata titles,
+channel and site names, tickers) is indexed with the symmetric-delete
+algorithm (SymSpell). Query tokens are corrected against it in
+microseconds, but only when the token is clearly a typo of a KB word (see
+SymSpellIndex.lookup): a valid word the KB happens not to contain ("gold"
+next to a KB "hold") must not be rewritten. Every other unknown token, and
+every acronym (which the LLM may expand, e.g. "CPI"), leaves the query to
+the LLM reformulation call.
+
+The vocabulary is additive: deletes do not remove words (a stale word only
+means a correction toward content that is gone), and cleanup_user_vectorstore
+resets it. It is persisted under ``vocabulary_dir`` (see KBVocabulary).
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+from app.config import Settings
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"\$?[^\W_][\w'-]*")
+
+# Metadata fields whose values are added to the vocabulary with extra weight
+TITLE_FIELDS = ("title", "page_title", "channel", "site_name")
+TITLE_WEIGHT = 5
+
+MAX_EDIT_DISTANCE = 2
+PREFIX_LENGTH = 5
+MIN_TOKEN_LENGTH = 3
+# Shortest tokens corrected at edit distance 1 and 2; shorter typos are too
+# often valid words ("gold" -> "hold")
+MIN_LENGTH_DISTANCE_1 = 5
+MIN_LENGTH_DISTANCE_2 = 7
+# A correction target must occur at least this often (titles count TITLE_WEIGHT)
+MIN_CORRECTION_COUNT = 3
+# Tickers and acronyms: never corrected, left to the LLM to expand
+ACRONYM_RE = re.compile(r"^\$?[A-Z]{2,5}$")
+
+# Fold the log into the snapshot once it is larger than this and the snapshot
+COMPACT_MIN_LOG_BYTES = 64 * 1024
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_RE.findall(text)
+
+
+def _deletes(word: str, max_distance: int) -> set[str]:
+    """All strings reachable from *word* by up to *max_distance* deletions."""
+    result = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for w in frontier:
+            for i in range(len(w)):
+                next_frontier.add(w[:i] + w[i + 1:])
+        next_frontier -= result
+        result |= next_frontier
+        frontier = next_frontier
+    return result
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int | None:
+    """Optimal-string-alignment distance, or None if it exceeds *max_distance*."""
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    prev_prev: list[int] = []
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(prev[j] + 1, current[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], prev_prev[j - 2] + 1)
+        if min(current) > max_distance:
+            return None
+        prev_prev, prev = prev, current
+    return prev[-1] if prev[-1] <= max_distance else None
+
+
+class SymSpellIndex:
+    """Symmetric-delete spelling index over a weighted word list."""
+
+    def __init__(self, max_distance: int = MAX_EDIT_DISTANCE, prefix_length: int = PREFIX_LENGTH):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.counts: dict[str, int] = {}
+        self.display: dict[str, str] = {}
+        self._deletes: dict[str, set[str]] = {}
+
+    def add(self, token: str, count: int = 1) -> None:
+        word = token.casefold()
+        if word not in self.counts:
+            self.counts[word] = 0
+            self.display[word] = token
+            for d in _deletes(word[:self.prefix_length], self.max_distance):
+                self._deletes.setdefault(d, set()).add(word)
+        elif self.display[word].islower() and not token.islower():
+            # Prefer the cased form ("Pelosi", "NVDA") for corrections
+            self.display[word] = token
+        self.counts[word] += count
+
+    def __contains__(self, token: str) -> bool:
+        return token.casefold() in self.counts
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def lookup(self, token: str) -> str | None:
+        """Return the known word *token* is clearly a typo of (display form), or None.
+
+        The allowed edit distance grows with the token's length, the target
+        must be a frequent KB word, and the closest match must be unique.
+        """
+        word = token.casefold()
+        if len(word) >= MIN_LENGTH_DISTANCE_2:
+            max_distance = min(2, self.max_distance)
+        elif len(word) >= MIN_LENGTH_DISTANCE_1:
+            max_distance = 1
+        else:
+            return None
+        candidates: set[str] = set()
+        for d in _deletes(word[:self.prefix_length], max_distance):
+            candidates |= self._deletes.get(d, set())
+
+        by_distance: dict[int, list[str]] = {}
+        for candidate in candidates:
+            distance = edit_distance(word, candidate, max_distance)
+            if distance is not None:
+                by_distance.setdefault(distance, []).append(candidate)
+        if not by_distance:
+            return None
+        closest = by_distance[min(by_distance)]
+        if len(closest) != 1 or self.counts[closest[0]] < MIN_CORRECTION_COUNT:
+            return None
+        return self.display[closest[0]]
+
+    def is_acronym(self, token: str) -> bool:
+        """True for all-caps 2-5 letter tokens, or tokens the KB writes that way."""
+        display = self.display.get(token.casefold(), token)
+        return bool(ACRONYM_RE.match(token) or ACRONYM_RE.match(display))
+
+
+class KBVocabulary:
+    """A user's persisted vocabulary plus its in-memory SymSpell index.
+
+    Persisted as a JSON snapshot plus an append-only log of per-batch word
+    counts, so an ingest batch only appends its own words. The log is folded
+    into the snapshot once it outgrows it. A log belongs to the snapshot
+    whose ``log_id`` it starts with, so a crash mid-compaction cannot apply
+    it twice.
+
+    ``complete`` is set (and persisted) once the vocabulary covers the whole
+    dataset: after a bootstrap rebuild from the stored chunks, or when it
+    was started on an empty dataset. Only a complete vocabulary is used for
+    correction (see query_reformulation).
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.log_path = path.with_suffix(".log")
+        self.index = SymSpellIndex()
+        self._lock = threading.Lock()
+        self.building = False
+        self.complete = False
+        self._log_id = uuid.uuid4().hex
+        self._log_bytes = 0
+        self._snapshot_bytes = 0
+        self._load()
+
+    def _apply(self, words: dict) -> None:
+        for count, display in words.values():
+            self.index.add(display, count)
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        try:
+            raw = self.path.read_text(encoding="utf-8")
+            data = json.loads(raw)
+            self._apply(data.get("words", {}))
+            self.complete = bool(data.get("complete"))
+            self._log_id = data.get("log_id") or self._log_id
+            self._snapshot_bytes = len(raw)
+        except Exception as e:
+            logger.warning("Failed to load vocabulary %s: %s", self.path, e)
+            self.index = SymSpellIndex()
+            self.complete = False
+            return
+        if not self.log_path.exists():
+            return
+        torn = False
+        try:
+            with open(self.log_path, encoding="utf-8") as f:
+                header = f.readline()
+                if json.loads(header).get("log_id") == self._log_id:
+                    for line in f:
+                        try:
+                            self._apply(json.loads(line)["words"])
+                        except (ValueError, KeyError):
+                            # Trailing line torn by a crash; fold what was read
+                            torn = True
+                            break
+                else:
+                    torn = True  # left over from before the last compaction
+        except (OSError, ValueError) as e:
+            logger.warning("Failed to read vocabulary log %s: %s", self.log_path, e)
+            torn = True
+        if torn:
+            self._compact()
+        else:
+            self._log_bytes = self.log_path.stat().st_size
+
+    def _compact(self) -> None:
+        """Write a snapshot of the whole vocabulary and start a new log."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        words = {
+            word: [count, self.index.display[word]]
+            for word, count in self.index.counts.items()
+        }
+        self._log_id = uuid.uuid4().hex
+        raw = json.dumps(
+            {"version": 2, "complete": self.complete, "log_id": self._log_id, "words": words}
+        )
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(raw, encoding="utf-8")
+        os.replace(tmp_path, self.path)
+        self.log_path.unlink(missing_ok=True)
+        self._snapshot_bytes = len(raw)
+        self._log_bytes = 0
+
+    def _append(self, words: dict) -> None:
+        """Append one batch of word counts to the log, compacting if it is too long."""
+        lines = []
+        if self._log_bytes == 0:
+            lines.append(json.dumps({"log_id": self._log_id}))
+        lines.append(json.dumps({"words": words}))
+        data = "".join(line + "\n" for line in lines)
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(data)
+        self._log_bytes += len(data.encode("utf-8"))
+        if self._log_bytes > max(self._snapshot_bytes, COMPACT_MIN_LOG_BYTES):
+            self._compact()
+
+    def add_texts(
+        self, texts: list[str], metadatas: list[dict] | None = None, persist: bool = True
+    ) -> None:
+        """Index words from chunk texts and title-like metadata, then persist.
+
+        With ``persist=False`` the words are only indexed in memory, for bulk
+        rebuilds that persist once at the end (see mark_complete).
+        """
+        counts: dict[str, int] = {}
+        display: dict[str, str] = {}
+
+        def _count(token: str, weight: int) -> None:
+            word = token.casefold()
+            counts[word] = counts.get(word, 0) + weight
+            if word not in display or (display[word].islower() and not token.islower()):
+                display[word] = token
+
+        for text in texts:
+            for token in tokenize(text):
+                if len(token) >= MIN_TOKEN_LENGTH:
+                    _count(token, 1)
+        seen_titles: set[str] = set()
+        for meta in metadatas or []:
+            for field in TITLE_FIELDS:
+                value = meta.get(field)
+                if value and value not in seen_titles:
+                    seen_titles.add(value)
+                    for token in tokenize(value):
+                        _count(token, TITLE_WEIGHT)
+
+        with self._lock:
+            for word, count in counts.items():
+                self.index.add(display[word], count)
+            if not persist or not counts:
+                return
+            if self.path.exists():
+                self._append({
+                    word: [count, self.index.display[word]] for word, count in counts.items()
+                })
+            else:
+                self._compact()
+
+    def mark_complete(self) -> None:
+        """Record that the vocabulary now covers the whole dataset."""
+        with self._lock:
+            self.complete = True
+            self._compact()
+
+    def clear(self) -> None:
+        """Empty the vocabulary (the dataset was emptied too, so it is complete)."""
+        with self._lock:
+            self.index = SymSpellIndex()
+            self.complete = True
+            self._compact()
+
+    def correct(self, query: str) -> tuple[str, bool]:
+        """Correct query tokens against the vocabulary.
+
+        Returns (corrected_query, fully_resolved). ``fully_resolved`` is False
+        when some token is an acronym or neither known nor clearly a typo, in
+        which case the caller should fall back to LLM reformulation.
+        """
+        resolved = True
+
+        def _fix(match: re.Match) -> str:
+            nonlocal resolved
+            token = match.group(0)
+            if self.index.is_acronym(token):
+                resolved = False
+                return token
+            if len(token) < MIN_TOKEN_LENGTH or token.isdigit() or token in self.index:
+                return token
+            suggestion = self.index.lookup(token)
+            if suggestion is None:
+                resolved = False
+                return token
+            return suggestion
+
+        with self._lock:
+            corrected = TOKEN_RE.sub(_fix, query)
+        return corrected, resolved
+
+
+_vocabularies: OrderedDict[str, KBVocabulary] = OrderedDict()
+_vocabularies_lock = threading.Lock()
+
+
+def get_vocabulary(dataset_path: str, settings: Settings) -> KBVocabulary:
+    """Return the (LRU-cached) vocabulary for a per-user dataset path."""
+    name = dataset_path.rstrip("/").rsplit("/", 1)[-1]
+    path = Path(settings.vocabulary_dir) / f"{name}.json"
+    key = str(path)
+    with _vocabularies_lock:
+        vocabulary = _vocabularies.get(key)
+        if vocabulary is not None:
+            _vocabularies.move_to_end(key)
+            return vocabulary
+        vocabulary = KBVocabulary(path)
+        _vocabularies[key] = vocabulary
+        while len(_vocabularies) > settings.vectorstore_pool_size:
+            _vocabularies.popitem(last=False)
+        return vocabulary
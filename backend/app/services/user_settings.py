@@ -0,0 +1,127 @@
+"""Per-user settings cache for the chat hot path.
+
+Every chat turn and public query used to read ``deep_memory_settings``
+from Supabase to decide the retrieval mode. This in-process TTL cache
+holds, per user:
+
+- ``deep_memory``: whether Deep Memory search is enabled;
+- ``total_chunks``: the cached chunk count (see chunk_count);
+- ``kb_version``: the settings row's ``updated_at``, which changes whenever
+  the knowledge base (or the Deep Memory toggle) changes, so caches derived
+  from a user's KB can key on it.
+
+Entries are refreshed after ``user_settings_ttl`` seconds. The chunk count
+helpers update entries in place, and the Deep Memory toggle and training
+invalidate them, so this process sees its own changes immediately.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+
+from supabase import Client
+
+from app.config import Settings
+from app.services import db
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class UserSettings:
+    deep_memory: bool = False
+    total_chunks: int = 0
+    kb_version: str = ""
+
+
+class UserSettingsCache:
+    def __init__(self, ttl_seconds: float, max_entries: int = 10_000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, UserSettings]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def peek(self, user_id: str) -> UserSettings | None:
+        """Return the cached settings if still fresh, without loading."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires, value = entry
+            if time.monotonic() >= expires:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return value
+
+    def put(self, user_id: str, value: UserSettings) -> None:
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def update(self, user_id: str, **changes) -> None:
+        """Apply *changes* to a cached entry (no-op if the user is not cached)."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                self._entries[user_id] = (entry[0], replace(entry[1], **changes))
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def load(self, user_id: str, supabase: Client | None) -> UserSettings:
+        """Return cached settings, reading them from Supabase on a miss."""
+        cached = self.peek(user_id)
+        if cached is not None:
+            return cached
+        if supabase is None:
+            return UserSettings()
+        try:
+            result = supabase.table("deep_memory_settings").select(
+                "enabled, total_chunks, updated_at"
+            ).eq("user_id", user_id).execute()
+        except Exception as e:
+            # Not cached, so the next request retries
+            logger.warning("Failed to load settings for user %s: %s", user_id, e)
+            return UserSettings()
+        value = UserSettings()
+        if result.data:
+            row = result.data[0]
+            value = UserSettings(
+                deep_memory=bool(row.get("enabled")),
+                total_chunks=row.get("total_chunks") or 0,
+                kb_version=row.get("updated_at") or "",
+            )
+        self.put(user_id, value)
+        return value
+
+    async def aload(self, user_id: str, supabase: Client | None) -> UserSettings:
+        """Async load: cache hits return immediately, misses read via db.run."""
+        cached = self.peek(user_id)
+        if cached is not None:
+            return cached
+        return await db.run(self.load, user_id, supabase)
+
+
+_cache: UserSettingsCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_user_settings_cache(settings: Settings | None = None) -> UserSettingsCache:
+    """Return the process-wide user settings cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            if settings is None:
+                from app.config import settings
+            _cache = UserSettingsCache(ttl_seconds=settings.user_settings_ttl)
+        return _cache
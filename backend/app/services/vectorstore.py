@@ -2,22 +2,128 @@
 import asyncio
 import logging
 import os
+import threading
+import uuid
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterator
 
+import numpy as np
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from langchain_deeplake import DeeplakeVectorStore
-from langchain_openai import OpenAIEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 from app.config import Settings
+from app.services.clients import get_clients
+from app.services.dataset_pool import DatasetPool
+from app.services.embedding_engine import BatchedEmbeddings, TokenBudget
+from app.services.ann_index import ANNIndex, get_ann_index
+from app.services.lexical_index import LexicalIndex, get_lexical_index
+from app.services.metadata_index import MetadataIndex, get_metadata_index
+from app.services.shared_videos import get_shared_video_store
+from app.services.typo_corrector import get_vocabulary
+from app.services.embedding_cache import (
+    CachedEmbeddings,
+    EmbeddingCache,
+    QueryCachedEmbeddings,
+    QueryEmbeddingCache,
+    text_hash,
+)
 
 logger = logging.getLogger(__name__)
 
+# Rows per dataset.append call when writing precomputed embeddings
+APPEND_BATCH_ROWS = 4096
+# Rows per page when enumerating a dataset
+CHUNK_PAGE_SIZE = 1000
+# Hybrid search fuses this many times k candidates from each retriever
+HYBRID_CANDIDATE_FACTOR = 2
+
+_dataset_pool: DatasetPool | None = None
+_embeddings_clients: dict[tuple[str, str], Embeddings] = {}
+_embedding_caches: dict[str, EmbeddingCache] = {}
+_query_embedding_cache: QueryEmbeddingCache | None = None
+_token_budget: TokenBudget | None = None
+_user_services: OrderedDict[str, "VectorStoreService"] = OrderedDict()
+_registry_lock = threading.Lock()
+_background_tasks: set[asyncio.Task] = set()
+
+
+def get_dataset_pool(settings: Settings) -> DatasetPool:
+    """Return the process-wide pool of opened DeepLake datasets."""
+    global _dataset_pool
+    with _registry_lock:
+        if _dataset_pool is None:
+            _dataset_pool = DatasetPool(
+                max_size=settings.vectorstore_pool_size,
+                idle_seconds=settings.vectorstore_pool_idle_seconds,
+            )
+        return _dataset_pool
+
+
+def _get_token_budget(settings: Settings) -> TokenBudget:
+    """Return the process-wide embedding TPM budget (caller holds _registry_lock)."""
+    global _token_budget
+    if _token_budget is None:
+        _token_budget = TokenBudget(settings.embedding_tokens_per_minute)
+    return _token_budget
+
+
+def _get_embeddings(settings: Settings) -> Embeddings:
+    """Return a shared embeddings client for the configured model.
+
+    Document embedding requests are token-packed and sent concurrently under
+    the shared tokens-per-minute budget (BatchedEmbeddings).
+    When ``embedding_cache_path`` is set, document embeddings go through the
+    persistent content-addressed cache so re-ingested chunks are not re-embedded.
+    Query embeddings go through the process-wide QueryEmbeddingCache, so every
+    similarity_search caller shares cached and in-flight query embeddings.
+    """
+    global _query_embedding_cache
+    key = (settings.embedding_model, settings.openai_api_key)
+    with _registry_lock:
+        client = _embeddings_clients.get(key)
+        if client is None:
+            client = get_clients().embeddings(
+                settings.embedding_model,
+                settings.openai_api_key,
+                settings.embedding_max_inputs_per_request,
+            )
+            client = BatchedEmbeddings(
+                client,
+                model=settings.embedding_model,
+                budget=_get_token_budget(settings),
+                max_tokens_per_request=settings.embedding_max_tokens_per_request,
+                max_inputs_per_request=settings.embedding_max_inputs_per_request,
+                concurrency=settings.embedding_concurrency,
+            )
+            if settings.embedding_cache_path:
+                cache = _embedding_caches.get(settings.embedding_cache_path)
+                if cache is None:
+                    cache = EmbeddingCache(
+                        settings.embedding_cache_path,
+                        max_entries=settings.embedding_cache_max_entries,
+                    )
+                    _embedding_caches[settings.embedding_cache_path] = cache
+                client = CachedEmbeddings(client, cache, model=settings.embedding_model)
+            if settings.query_embedding_cache_size > 0:
+                if _query_embedding_cache is None:
+                    _query_embedding_cache = QueryEmbeddingCache(
+                        max_entries=settings.query_embedding_cache_size,
+                        ttl_seconds=settings.query_embedding_cache_ttl,
+                    )
+                client = QueryCachedEmbeddings(
+                    client, _query_embedding_cache, model=settings.embedding_model
+                )
+            _embeddings_clients[key] = client
+        return client
+
 
 class VectorStoreService:
     def __init__(self, settings: Settings):
-        self.embeddings = OpenAIEmbeddings(
-            model=settings.embedding_model,
-            openai_api_key=settings.openai_api_key,
-        )
+        self.settings = settings
+        self.embeddings = _get_embeddings(settings)
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=settings.chunk_size,
             chunk_overlap=settings.chunk_overlap,
@@ -29,6 +135,7 @@ class VectorStoreService:
         self.deeplake_path = settings.deeplake_path
         self._is_cloud = settings.deeplake_path.startswith("hub://")
         self._activeloop_token = settings.activeloop_token if self._is_cloud else None
+        self._pool = get_dataset_pool(settings)
 
     def _get_db_kwargs(self, **extra) -> dict:
         """Build common kwargs for DeeplakeVectorStore instantiation."""
@@ -41,29 +148,367 @@ class VectorStoreService:
             kwargs["token"] = self._activeloop_token
         return kwargs
 
-    def add_documents(self, texts: list[str], metadatas: list[dict]) -> int:
-        """Batch add documents to DeepLake. Splits texts into chunks first.
+    def _open(self, read_only: bool) -> DeeplakeVectorStore:
+        """Lease a pooled DeeplakeVectorStore for this dataset.
 
-        Returns the number of chunks added.
+        Writable handles are opened with overwrite=False, which creates the
+        dataset on first use.
+        """
+        extra = {"read_only": True} if read_only else {"overwrite": False}
+        return self._pool.get(
+            self.deeplake_path,
+            read_only,
+            lambda: DeeplakeVectorStore(**self._get_db_kwargs(**extra)),
+        )
+
+    def _metadata_index(self) -> MetadataIndex:
+        return get_metadata_index(self.deeplake_path, self.settings)
+
+    @property
+    def _ann_enabled(self) -> bool:
+        return self.settings.ann_min_chunks > 0
+
+    def _ann_index(self) -> ANNIndex:
+        return get_ann_index(self.deeplake_path, self.settings)
+
+    def _refresh_ann_index(self) -> None:
+        """Build the ANN index if missing, then reconcile it with the dataset.
+
+        The expensive build reads a snapshot without holding the write lock;
+        chunks added or deleted meanwhile are caught up under the lock.
+        """
+        ann = self._ann_index()
+        try:
+            if not ann.ready:
+                count = ann.build(self.iter_chunk_batches(columns=("ids", "embeddings")))
+                logger.info("Built ANN index for %s (%d chunks)", self.deeplake_path, count)
+            with self._write_lock():
+                dataset_ids: set[str] = set()
+                for page in self.iter_chunk_batches(columns=("ids",)):
+                    dataset_ids.update(page["ids"])
+                indexed = ann.labels()
+                ann.remove(list(indexed - dataset_ids))
+                missing = dataset_ids - indexed
+                if missing:
+                    for page in self.iter_chunk_batches(columns=("ids", "embeddings")):
+                        rows = [i for i, chunk_id in enumerate(page["ids"]) if chunk_id in missing]
+                        if rows:
+                            ann.add(
+                                [page["ids"][i] for i in rows],
+                                [page["embeddings"][i] for i in rows],
+                            )
+            ann.flush()
+        except Exception as e:
+            logger.warning("Failed to refresh ANN index for %s: %s", self.deeplake_path, e)
+        finally:
+            ann.building = False
+
+    async def _ann_search(
+        self, query: str, k: int, score_threshold: float
+    ) -> list[tuple] | None:
+        """Search the ANN index, or return None to fall back to exact search.
+
+        Only used above ``ann_min_chunks``. A missing or out-of-date index is
+        (re)built in the background while queries keep using exact search.
         """
+        if not self._ann_enabled:
+            return None
+        count = await asyncio.to_thread(self.get_chunk_count)
+        if count < self.settings.ann_min_chunks:
+            return None
+        ann = await asyncio.to_thread(self._ann_index)
+        if not ann.ready or ann.live_count != count:
+            if not ann.building:
+                ann.building = True
+                task = asyncio.create_task(asyncio.to_thread(self._refresh_ann_index))
+                _background_tasks.add(task)
+                task.add_done_callback(_background_tasks.discard)
+            return None
+
+        vector = await self.embeddings.aembed_query(query)
+        hits = await asyncio.to_thread(ann.search, vector, k, self.settings.ann_ef_search)
+        hits = [(chunk_id, score) for chunk_id, score in hits or [] if score >= score_threshold]
+        if not hits:
+            return []
+        documents = await asyncio.to_thread(self._fetch_documents, [i for i, _ in hits])
+        return [(documents[i], score) for i, score in hits if i in documents]
+
+    def _lexical_index(self) -> LexicalIndex:
+        return get_lexical_index(self.deeplake_path, self.settings)
+
+    def _rebuild_lexical_index(self) -> None:
+        lexical = self._lexical_index()
+        try:
+            with self._write_lock():
+                count = lexical.replace_all(
+                    self.iter_chunk_batches(columns=("ids", "documents", "metadata"))
+                )
+            logger.info("Built lexical index for %s (%d chunks)", self.deeplake_path, count)
+        except Exception as e:
+            logger.warning("Failed to build lexical index for %s: %s", self.deeplake_path, e)
+        finally:
+            lexical.building = False
+
+    async def _lexical_search(
+        self, query: str, k: int, score_threshold: float
+    ) -> list[tuple] | None:
+        """BM25 candidates as (doc, cosine relevance) tuples, in BM25 order.
+
+        Returns None while the index is being backfilled. Each hit carries
+        its embedding's cosine similarity to the query, so score thresholds
+        mean the same thing as for dense results.
+        """
+        lexical = await asyncio.to_thread(self._lexical_index)
+        if not lexical.complete:
+            if not lexical.building:
+                lexical.building = True
+                task = asyncio.create_task(asyncio.to_thread(self._rebuild_lexical_index))
+                _background_tasks.add(task)
+                task.add_done_callback(_background_tasks.discard)
+            return None
+
+        hits = await asyncio.to_thread(lexical.search, query, k)
+        if not hits:
+            return []
+        ids = [chunk_id for chunk_id, _ in hits]
+        query_vector = np.asarray(await self.embeddings.aembed_query(query), dtype=np.float32)
+        query_vector /= np.linalg.norm(query_vector) or 1.0
+        documents = await asyncio.to_thread(self._fetch_documents, ids)
+        vectors = await asyncio.to_thread(self._fetch_embeddings, ids)
+        results = []
+        for chunk_id in ids:
+            if chunk_id not in documents or chunk_id not in vectors:
+                continue
+            vector = vectors[chunk_id]
+            score = float(vector @ query_vector / (np.linalg.norm(vector) or 1.0))
+            if score >= score_threshold:
+                results.append((documents[chunk_id], score))
+        return results
+
+    # Storage primitives. Subclasses implementing another backend override
+    # these; the *_locked ones are called with _write_lock() held.
+
+    def _write_lock(self) -> threading.Lock:
+        return self._pool.write_lock(self.deeplake_path)
+
+    def _after_write(self) -> None:
+        self._pool.mark_written(self.deeplake_path)
+
+    def _row_count_locked(self) -> int:
+        return len(self._open(read_only=False).dataset)
+
+    def _append_rows_locked(
+        self, ids: list[str], chunks: list[str], metadatas: list[dict], vectors: list[list[float]]
+    ) -> None:
+        """Append rows in large columnar batches and commit once."""
+        embeddings = np.asarray(vectors, dtype=np.float32)
+        db = self._open(read_only=False)
+        for start in range(0, len(chunks), APPEND_BATCH_ROWS):
+            end = start + APPEND_BATCH_ROWS
+            db.dataset.append({
+                "ids": ids[start:end],
+                "embeddings": embeddings[start:end],
+                "metadata": metadatas[start:end],
+                "documents": chunks[start:end],
+            })
+        db.dataset.commit()
+
+    def _scan_ids_locked(self, field: str, values: list[str]) -> list[str]:
+        """Find chunk ids by scanning every row's metadata with TQL."""
+        values_str = ", ".join(f"'{v}'" for v in values)
+        query = f"SELECT ids FROM (SELECT * WHERE metadata['{field}'] IN ({values_str}))"
+        db = self._open(read_only=False)
+        return [str(i) for i in db.dataset.query(query)["ids"][:]]
+
+    def _fetch_documents(self, ids: list[str]) -> dict[str, Document]:
+        ids_str = ", ".join(f"'{i}'" for i in ids)
+        results = self._open(read_only=True).dataset.query(
+            f"SELECT ids, documents, metadata WHERE ids IN ({ids_str})"
+        )
+        return {
+            str(chunk_id): Document(
+                page_content=str(document),
+                metadata=metadata.to_dict(convert_numpy_to_list=True),
+            )
+            for chunk_id, document, metadata in zip(
+                results["ids"][:], results["documents"][:], results["metadata"][:]
+            )
+        }
+
+    def _fetch_embeddings(self, ids: list[str]) -> dict[str, np.ndarray]:
+        ids_str = ", ".join(f"'{i}'" for i in ids)
+        results = self._open(read_only=True).dataset.query(
+            f"SELECT ids, embeddings WHERE ids IN ({ids_str})"
+        )
+        return {
+            str(chunk_id): np.asarray(vector, dtype=np.float32)
+            for chunk_id, vector in zip(results["ids"][:], results["embeddings"][:])
+        }
+
+    def _delete_rows_locked(self, ids: list[str]) -> None:
+        """Delete rows by offset, located with the metadata index's row map.
+
+        DeepLake's delete-by-ids filters with TQL, which scans every row (no
+        index on ``ids`` is used by the planner). Offsets from the row map
+        are checked against the ``ids`` column first; when they do not match
+        (e.g. an index that predates the row map), the map is rebuilt from
+        the ``ids`` column.
+        """
+        dataset = self._open(read_only=False).dataset
+        index = self._metadata_index()
+        positions = index.row_positions(ids)
+        if positions is None or [str(i) for i in dataset["ids"][positions]] != ids:
+            all_ids = [str(i) for i in dataset["ids"][:]]
+            index.set_rows(all_ids)
+            logger.info("Rebuilt row map for %s (%d rows)", self.deeplake_path, len(all_ids))
+            wanted = set(ids)
+            positions = [p for p, chunk_id in enumerate(all_ids) if chunk_id in wanted]
+        for position in sorted(positions, reverse=True):
+            dataset.delete(position)
+        dataset.commit()
+
+    def _delete_by_key(self, field: str, values: list[str]) -> int:
+        """Delete all chunks whose metadata *field* is one of *values*.
+
+        Chunk ids come from the metadata index when it is complete, so only
+        matching rows are touched; otherwise every row's metadata is scanned.
+        """
+        index = self._metadata_index()
+        with self._write_lock():
+            if index.complete:
+                matching_ids = index.lookup(field, values)
+            else:
+                matching_ids = self._scan_ids_locked(field, values)
+            if not matching_ids:
+                return 0
+            with index.updating():
+                self._delete_rows_locked(matching_ids)
+                self._after_write()
+                index.remove(matching_ids)
+            if self._ann_enabled:
+                self._ann_index().remove(matching_ids)
+            self._lexical_index().remove(matching_ids)
+        return len(matching_ids)
+
+    def _split_documents(
+        self, texts: list[str], metadatas: list[dict]
+    ) -> tuple[list[str], list[dict], list[list[float] | None], list[tuple[str, str, int, int]]]:
+        """Split documents into chunks, reusing shared YouTube transcript chunk sets.
+
+        Returns the chunks, their metadata, their vectors (None where the
+        chunk still needs embedding) and the ``(video_id, transcript hash,
+        start, end)`` spans of transcripts to add to the shared store once
+        embedded.
+        """
+        shared = get_shared_video_store(self.settings)
         all_chunks: list[str] = []
         all_metas: list[dict] = []
+        all_vectors: list[list[float] | None] = []
+        to_share: list[tuple[str, str, int, int]] = []
 
         for text, meta in zip(texts, metadatas):
+            key = None
+            if shared is not None and meta.get("source_type") == "youtube" and meta.get("video_id"):
+                key = (str(meta["video_id"]), text_hash(text))
+                stored = shared.get_chunks(*key, *self._chunking_key())
+                if stored is not None:
+                    chunks, vectors = stored
+                    all_chunks.extend(chunks)
+                    all_metas.extend([meta] * len(chunks))
+                    all_vectors.extend(vectors)
+                    continue
             chunks = self.text_splitter.split_text(text)
+            if key is not None:
+                to_share.append((*key, len(all_chunks), len(all_chunks) + len(chunks)))
             all_chunks.extend(chunks)
             all_metas.extend([meta] * len(chunks))
+            all_vectors.extend([None] * len(chunks))
+        return all_chunks, all_metas, all_vectors, to_share
 
+    def _chunking_key(self) -> tuple[int, int, str]:
+        return self.settings.chunk_size, self.settings.chunk_overlap, self.settings.embedding_model
+
+    def _share_chunk_sets(
+        self,
+        to_share: list[tuple[str, str, int, int]],
+        chunks: list[str],
+        vectors: list[list[float]],
+    ) -> None:
+        shared = get_shared_video_store(self.settings)
+        if shared is None:
+            return
+        for video_id, transcript_hash, start, end in to_share:
+            try:
+                shared.put_chunks(
+                    video_id, transcript_hash, *self._chunking_key(),
+                    chunks[start:end], vectors[start:end],
+                )
+            except Exception as e:
+                logger.warning("Failed to share chunk set for video %s: %s", video_id, e)
+
+    def _write_chunks(
+        self, chunks: list[str], metadatas: list[dict], vectors: list[list[float]]
+    ) -> None:
+        """Store pre-embedded chunks and update the metadata index and vocabulary."""
+        ids = [str(uuid.uuid4()) for _ in chunks]
+        index = self._metadata_index()
+        lexical = self._lexical_index()
+        vocabulary = get_vocabulary(self.deeplake_path, self.settings)
+        with self._write_lock():
+            if (
+                not (index.complete and lexical.complete and vocabulary.complete)
+                and self._row_count_locked() == 0
+            ):
+                # Nothing to backfill: the indexes cover this dataset from here on
+                index.clear()
+                lexical.clear()
+                vocabulary.clear()
+            with index.updating():
+                self._append_rows_locked(ids, chunks, metadatas, vectors)
+                self._after_write()
+                index.add(ids, metadatas)
+            if self._ann_enabled:
+                self._ann_index().add(ids, vectors)
+            lexical.add(ids, chunks, metadatas)
+
+        try:
+            vocabulary.add_texts(chunks, metadatas)
+        except Exception as e:
+            logger.warning("Failed to update KB vocabulary for %s: %s", self.deeplake_path, e)
+
+    def add_documents(self, texts: list[str], metadatas: list[dict]) -> int:
+        """Batch add documents to DeepLake. Splits texts into chunks first.
+
+        Returns the number of chunks added.
+        """
+        all_chunks, all_metas, vectors, to_share = self._split_documents(texts, metadatas)
         if not all_chunks:
             return 0
 
-        db = DeeplakeVectorStore(**self._get_db_kwargs(overwrite=False))
-        db.add_texts(
-            texts=all_chunks,
-            metadatas=all_metas,
-            embedding=self.embeddings,
-            dataset_path=self.deeplake_path,
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            embedded = self.embeddings.embed_documents([all_chunks[i] for i in missing])
+            for i, vector in zip(missing, embedded):
+                vectors[i] = vector
+            self._share_chunk_sets(to_share, all_chunks, vectors)
+        self._write_chunks(all_chunks, all_metas, vectors)
+        return len(all_chunks)
+
+    async def aadd_documents(self, texts: list[str], metadatas: list[dict]) -> int:
+        """Async add_documents: embeds with concurrent requests, writes in a thread."""
+        all_chunks, all_metas, vectors, to_share = await asyncio.to_thread(
+            self._split_documents, texts, metadatas
         )
+        if not all_chunks:
+            return 0
+
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            embedded = await self.embeddings.aembed_documents([all_chunks[i] for i in missing])
+            for i, vector in zip(missing, embedded):
+                vectors[i] = vector
+            await asyncio.to_thread(self._share_chunk_sets, to_share, all_chunks, vectors)
+        await asyncio.to_thread(self._write_chunks, all_chunks, all_metas, vectors)
         return len(all_chunks)
 
     def delete_by_video_ids(self, video_ids: list[str]) -> int:
@@ -71,18 +516,7 @@ class VectorStoreService:
         if not video_ids:
             return 0
 
-        db = DeeplakeVectorStore(**self._get_db_kwargs(overwrite=False))
-
-        ids_str = ", ".join(f"'{vid}'" for vid in video_ids)
-        query = f"SELECT ids FROM (SELECT * WHERE metadata['video_id'] IN ({ids_str}))"
-        results = db.dataset.query(query)
-
-        matching_ids = results["ids"][:]
-        if len(matching_ids) == 0:
-            return 0
-
-        db.delete(ids=list(matching_ids))
-        return len(matching_ids)
+        return self._delete_by_key("video_id", video_ids)
 
     def add_documentation_pages(
         self,
@@ -152,35 +586,14 @@ class VectorStoreService:
         if not collection_id:
             return 0
 
-        db = DeeplakeVectorStore(**self._get_db_kwargs(overwrite=False))
-
-        query = f"SELECT ids FROM (SELECT * WHERE metadata['collection_id'] == '{collection_id}')"
-        results = db.dataset.query(query)
-
-        matching_ids = results["ids"][:]
-        if len(matching_ids) == 0:
-            return 0
-
-        db.delete(ids=list(matching_ids))
-        return len(matching_ids)
+        return self._delete_by_key("collection_id", [collection_id])
 
     def delete_by_article_ids(self, article_ids: list[str]) -> int:
         """Delete all vector chunks matching the given article_ids from DeepLake."""
         if not article_ids:
             return 0
 
-        db = DeeplakeVectorStore(**self._get_db_kwargs(overwrite=False))
-
-        ids_str = ", ".join(f"'{aid}'" for aid in article_ids)
-        query = f"SELECT ids FROM (SELECT * WHERE metadata['article_id'] IN ({ids_str}))"
-        results = db.dataset.query(query)
-
-        matching_ids = results["ids"][:]
-        if len(matching_ids) == 0:
-            return 0
-
-        db.delete(ids=list(matching_ids))
-        return len(matching_ids)
+        return self._delete_by_key("article_id", article_ids)
 
     def _dataset_exists(self) -> bool:
         """Check if the dataset exists (local directory or cloud dataset)."""
@@ -190,7 +603,12 @@ class VectorStoreService:
         return os.path.exists(self.deeplake_path)
 
     async def similarity_search(
-        self, query: str, k: int = 5, score_threshold: float = 0.0, deep_memory: bool = False
+        self,
+        query: str,
+        k: int = 5,
+        score_threshold: float = 0.0,
+        deep_memory: bool = False,
+        hybrid: bool | None = None,
     ) -> list[tuple]:
         """Search the vector store and return (doc, score) tuples.
 
@@ -199,13 +617,41 @@ class VectorStoreService:
             k: Maximum number of results.
             score_threshold: Minimum relevance score (0-1) to include a result.
             deep_memory: If True, use Deep Memory enhanced search (requires cloud DeepLake).
+            hybrid: Fuse BM25 and dense candidates with reciprocal-rank fusion;
+                defaults to ``settings.hybrid_retrieval``.
 
+        Large datasets are searched through the ANN index (see _ann_search).
         Returns empty list if the dataset doesn't exist yet (new user).
         """
         if not self._dataset_exists():
             return []
+        if isinstance(self.embeddings, QueryCachedEmbeddings):
+            # Embed on the event loop so concurrent identical queries coalesce
+            # here; the search thread then hits the query-embedding cache.
+            await self.embeddings.aembed_query(query)
+        if hybrid is None:
+            hybrid = self.settings.hybrid_retrieval
+        candidates = k * HYBRID_CANDIDATE_FACTOR if hybrid else k
+
+        dense = None
+        if not deep_memory:
+            dense = await self._ann_search(query, candidates, score_threshold)
+        if dense is None:
+            dense = await self._exact_search(query, candidates, score_threshold, deep_memory)
+        if not hybrid:
+            return dense
+
+        lexical = await self._lexical_search(query, candidates, score_threshold)
+        if lexical is None:
+            return dense[:k]
+        from app.services.retrieval import reciprocal_rank_fusion
+        return reciprocal_rank_fusion([dense, lexical], limit=k)
+
+    async def _exact_search(
+        self, query: str, k: int, score_threshold: float, deep_memory: bool
+    ) -> list[tuple]:
         try:
-            db = DeeplakeVectorStore(**self._get_db_kwargs(read_only=True))
+            db = self._open(read_only=True)
             return await db.asimilarity_search_with_relevance_scores(
                 query=query, k=k, score_threshold=score_threshold, deep_memory=deep_memory
             )
@@ -223,7 +669,7 @@ class VectorStoreService:
         if not self._dataset_exists():
             return 0
         try:
-            db = DeeplakeVectorStore(**self._get_db_kwargs(read_only=True))
+            db = self._open(read_only=True)
             return len(db.dataset)
         except Exception as e:
             if "does not exist" in str(e).lower() or "not found" in str(e).lower():
@@ -231,51 +677,125 @@ class VectorStoreService:
                 return 0
             raise
 
-    def get_all_chunk_ids_and_texts(self) -> list[dict]:
-        """Enumerate all documents in the DeepLake dataset.
-
-        Returns list of dicts: [{"id": chunk_id, "text": page_content, "metadata": {...}}]
-        Returns empty list if the dataset doesn't exist yet (new user).
+    def iter_chunk_batches(
+        self,
+        columns: tuple[str, ...] = ("ids", "documents"),
+        batch_size: int = CHUNK_PAGE_SIZE,
+    ) -> Iterator[dict[str, list]]:
+        """Yield the dataset in pages of at most *batch_size* rows.
+
+        Each page maps the requested columns (a subset of ``ids``,
+        ``documents``, ``metadata`` and ``embeddings``) to lists of str / str /
+        dict, or a float32 matrix for embeddings, so only
+        one page of the projected columns is in memory at a time. Yields
+        nothing if the dataset doesn't exist yet (new user).
         """
         if not self._dataset_exists():
-            return []
+            return
         try:
-            db = DeeplakeVectorStore(**self._get_db_kwargs(read_only=True))
-            dataset = db.dataset
-
-            ids = dataset["ids"][:]
-            texts = dataset["documents"][:]
-            metadatas = dataset["metadata"][:]
-
-            return [
-                {"id": str(ids[i]), "text": str(texts[i]), "metadata": metadatas[i]}
-                for i in range(len(ids))
-            ]
+            dataset = self._open(read_only=True).dataset
+            total = len(dataset)
         except Exception as e:
             if "does not exist" in str(e).lower() or "not found" in str(e).lower():
-                logger.info("Dataset not found at %s, returning empty list", self.deeplake_path)
-                return []
+                logger.info("Dataset not found at %s, nothing to enumerate", self.deeplake_path)
+                return
             raise
 
+        for start in range(0, total, batch_size):
+            end = min(start + batch_size, total)
+            page: dict[str, list] = {}
+            for column in columns:
+                values = dataset[column][start:end]
+                if column == "metadata":
+                    page[column] = [
+                        m.to_dict() if hasattr(m, "to_dict") else dict(m or {}) for m in values
+                    ]
+                elif column == "embeddings":
+                    page[column] = np.asarray(values, dtype=np.float32)
+                else:
+                    page[column] = [str(v) for v in values]
+            yield page
+
+    async def aiter_chunk_batches(
+        self,
+        columns: tuple[str, ...] = ("ids", "documents"),
+        batch_size: int = CHUNK_PAGE_SIZE,
+    ) -> AsyncIterator[dict[str, list]]:
+        """Async iter_chunk_batches; each page is read in a worker thread."""
+        pages = self.iter_chunk_batches(columns, batch_size)
+        while True:
+            page = await asyncio.to_thread(next, pages, None)
+            if page is None:
+                return
+            yield page
+
     def get_deep_memory_api(self):
         """Return the deep_memory sub-API from the DeepLake vectorstore.
 
         Used for .train(), .status(), .evaluate() calls.
         """
-        db = DeeplakeVectorStore(**self._get_db_kwargs(read_only=False))
+        db = self._open(read_only=False)
         return db.vectorstore.deep_memory
 
+    def _read_ids_and_metadata(self) -> tuple[list[str], list[dict]]:
+        if not self._dataset_exists():
+            return [], []
+        db = self._open(read_only=False)
+        dataset = db.dataset
+        ids = [str(i) for i in dataset["ids"][:]]
+        metadatas = [
+            m.to_dict() if hasattr(m, "to_dict") else dict(m or {})
+            for m in dataset["metadata"][:]
+        ]
+        return ids, metadatas
+
+    def rebuild_metadata_index(self) -> int:
+        """Rebuild the metadata index from the dataset; returns the chunks indexed."""
+        index = self._metadata_index()
+        with self._write_lock():
+            ids, metadatas = self._read_ids_and_metadata()
+            index.replace_all(ids, metadatas)
+        logger.info("Rebuilt metadata index for %s (%d chunks)", self.deeplake_path, len(ids))
+        return len(ids)
+
+    def verify_metadata_index(self) -> tuple[int, int, bool]:
+        """Compare the index with the dataset: (missing, stale, complete)."""
+        index = self._metadata_index()
+        with self._write_lock():
+            ids, metadatas = self._read_ids_and_metadata()
+            missing, stale = index.diff(ids, metadatas)
+        return missing, stale, index.complete
+
 
 def get_user_vectorstore(user_id: str, settings: Settings) -> VectorStoreService:
-    """Create a VectorStoreService scoped to a specific user's dataset.
+    """Return the VectorStoreService scoped to a specific user's dataset.
 
     Derives the per-user dataset path from the base deeplake_path:
     - Local: ./knowledge_base/user-<user_id>
     - Cloud: hub://<org>/user-<user_id>
+
+    Services are cached per dataset path (LRU-bounded by
+    ``vectorstore_pool_size``) so hot users reuse the same instance.
+    ``vectorstore_backend = "numpy"`` selects NumpyVectorStoreService.
     """
     user_path = f"{settings.deeplake_path}/user-{user_id}"
+    with _registry_lock:
+        service = _user_services.get(user_path)
+        if service is not None:
+            _user_services.move_to_end(user_path)
+            return service
+
     user_settings = settings.model_copy(update={"deeplake_path": user_path})
-    return VectorStoreService(user_settings)
+    if settings.vectorstore_backend == "numpy":
+        from app.services.numpy_vectorstore import NumpyVectorStoreService
+        service = NumpyVectorStoreService(user_settings)
+    else:
+        service = VectorStoreService(user_settings)
+    with _registry_lock:
+        service = _user_services.setdefault(user_path, service)
+        while len(_user_services) > settings.vectorstore_pool_size:
+            _user_services.popitem(last=False)
+    return service
 
 
 async def cleanup_user_vectorstore(user_id: str, settings: Settings) -> None:
@@ -285,19 +805,39 @@ async def cleanup_user_vectorstore(user_id: str, settings: Settings) -> None:
     (hard-deleting a cloud dataset permanently burns the name).
     """
     user_path = f"{settings.deeplake_path}/user-{user_id}"
+    if settings.vectorstore_backend == "numpy":
+        service = get_user_vectorstore(user_id, settings)
+        await asyncio.to_thread(service.clear)
+        await asyncio.to_thread(get_vocabulary(user_path, settings).clear)
+        await asyncio.to_thread(get_metadata_index(user_path, settings).clear)
+        await asyncio.to_thread(get_ann_index(user_path, settings).reset)
+        await asyncio.to_thread(get_lexical_index(user_path, settings).clear)
+        logger.info("Cleared numpy vector store for user %s at %s", user_id, user_path)
+        return
+
     is_cloud = user_path.startswith("hub://")
 
-    embeddings = OpenAIEmbeddings(
-        model=settings.embedding_model,
-        openai_api_key=settings.openai_api_key,
-    )
     kwargs = {
         "dataset_path": user_path,
-        "embedding_function": embeddings,
+        "embedding_function": _get_embeddings(settings),
         "overwrite": True,
     }
     if is_cloud:
         kwargs["token"] = settings.activeloop_token
 
-    await asyncio.to_thread(DeeplakeVectorStore, **kwargs)
+    pool = get_dataset_pool(settings)
+
+    def _overwrite() -> None:
+        with pool.write_lock(user_path):
+            pool.invalidate(user_path)
+            DeeplakeVectorStore(**kwargs)
+            pool.invalidate(user_path)
+
+    await asyncio.to_thread(_overwrite)
+    await asyncio.to_thread(get_vocabulary(user_path, settings).clear)
+    await asyncio.to_thread(get_metadata_index(user_path, settings).clear)
+    await asyncio.to_thread(get_ann_index(user_path, settings).reset)
+    await asyncio.to_thread(get_lexical_index(user_path, settings).clear)
+    with _registry_lock:
+        _user_services.pop(user_path, None)
     logger.info("Cleared vector store for user %s at %s", user_id, user_path)
@@ -0,0 +1,52 @@
+"""Benchmark: per-turn agent graph compilation vs the cached graph.
+
+Every extended-search turn used to call create_react_agent; it now reuses
+the graph compiled for its tool configuration (chat.get_agent_graph).
+No API calls are made. Run from backend/ with the usual environment:
+
+    python -m benchmarks.agent_graph [--turns 200]
+"""
+
+import argparse
+import time
+import warnings
+
+warnings.filterwarnings("ignore")
+
+from langchain_openai import ChatOpenAI  # noqa: E402
+from langgraph.prebuilt import create_react_agent  # noqa: E402
+
+from app.services.agent_tools import search_knowledge_base, web_search  # noqa: E402
+from app.services.chat import EXTENDED_SYSTEM_PROMPT, get_agent_graph  # noqa: E402
+
+
+def _per_turn_ms(fn, turns: int) -> float:
+    start = time.perf_counter()
+    for _ in range(turns):
+        fn()
+    return (time.perf_counter() - start) * 1000 / turns
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    llm = ChatOpenAI(model="gpt-4o", openai_api_key="sk-benchmark", streaming=True)
+    for web in (False, True):
+        tools = [search_knowledge_base, web_search] if web else [search_knowledge_base]
+        rebuild = _per_turn_ms(
+            lambda: create_react_agent(model=llm, tools=tools, prompt=EXTENDED_SYSTEM_PROMPT),
+            args.turns,
+        )
+        get_agent_graph(llm, web)  # first turn compiles
+        cached = _per_turn_ms(lambda: get_agent_graph(llm, web), args.turns)
+        label = "kb+web" if web else "kb-only"
+        print(
+            f"{label:8s} compile per turn: {rebuild:8.3f} ms   cached: {cached:8.4f} ms   "
+            f"saved: {rebuild - cached:8.3f} ms/turn"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Load test: SSE and chat latency under concurrent ingestion.
+
+Simulates one worker serving chat streams while ingestion jobs run. Each
+Supabase query is a fake that blocks its thread for ``--query-ms`` (like
+supabase-py's synchronous HTTP call). Ingestion jobs issue status updates
+between chunks of threaded work (embedding, DeepLake writes); chat
+requests look up the chat, then stream tokens and store the messages.
+
+Two modes are compared:
+
+- ``inline``: ``query.execute()`` called directly in the coroutine (before);
+- ``db``: ``await db.execute(query)`` on the bounded Supabase pool (after).
+
+Reported per mode and ingestion level: p50/p99/max gap between streamed
+tokens and chat time-to-first-token. No network is used. Run from
+backend/ with the usual environment:
+
+    python -m benchmarks.supabase_load [--ingest-jobs 0 8 32] [--query-ms 20]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.services import db
+
+TOKENS_PER_REPLY = 20
+TOKEN_INTERVAL = 0.01   # model streaming cadence
+WORK_SECONDS = 0.02     # threaded ingestion work between status updates
+
+
+class _FakeQuery:
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def execute(self):
+        time.sleep(self.seconds)
+        return None
+
+
+async def _query(mode: str, seconds: float) -> None:
+    if mode == "inline":
+        _FakeQuery(seconds).execute()
+    else:
+        await db.execute(_FakeQuery(seconds))
+
+
+async def _ingest(mode: str, query_s: float, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        await asyncio.to_thread(time.sleep, WORK_SECONDS)
+        await _query(mode, query_s)
+
+
+async def _chat(mode: str, query_s: float, gaps: list[float], ttft: list[float]) -> None:
+    start = time.perf_counter()
+    await _query(mode, query_s)  # resolve chat owner
+    last = None
+    for _ in range(TOKENS_PER_REPLY):
+        await asyncio.sleep(TOKEN_INTERVAL)
+        now = time.perf_counter()
+        if last is None:
+            ttft.append(now - start)
+        else:
+            gaps.append(now - last)
+        last = now
+    await _query(mode, query_s)  # store messages
+
+
+async def _scenario(mode: str, ingest_jobs: int, chats: int, query_s: float) -> dict:
+    stop = asyncio.Event()
+    ingest = [asyncio.create_task(_ingest(mode, query_s, stop)) for _ in range(ingest_jobs)]
+    gaps: list[float] = []
+    ttft: list[float] = []
+    await asyncio.gather(*(_chat(mode, query_s, gaps, ttft) for _ in range(chats)))
+    stop.set()
+    await asyncio.gather(*ingest)
+    gaps.sort()
+    return {
+        "gap_p50": statistics.median(gaps) * 1000,
+        "gap_p99": gaps[int(len(gaps) * 0.99) - 1] * 1000,
+        "gap_max": gaps[-1] * 1000,
+        "ttft_p50": statistics.median(ttft) * 1000,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ingest-jobs", type=int, nargs="+", default=[0, 8, 32])
+    parser.add_argument("--chats", type=int, default=8)
+    parser.add_argument("--query-ms", type=float, default=20.0)
+    args = parser.parse_args(argv)
+
+    print(f"{'mode':<7} {'ingest':>6} {'gap p50':>9} {'gap p99':>9} {'gap max':>9} {'ttft p50':>9}  (ms)")
+    for mode in ("inline", "db"):
+        for jobs in args.ingest_jobs:
+            r = asyncio.run(_scenario(mode, jobs, args.chats, args.query_ms / 1000))
+            print(
+                f"{mode:<7} {jobs:>6} {r['gap_p50']:>9.1f} {r['gap_p99']:>9.1f}"
+                f" {r['gap_max']:>9.1f} {r['ttft_p50']:>9.1f}"
+            )
+    db.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,20 @@
+import asyncio
+import hashlib
 import time
 from unittest.mock import MagicMock, patch
 
 import jwt
+import numpy as np
 import pytest
 from cryptography.hazmat.primitives.asymmetric import ec
 from cryptography.hazmat.primitives import serialization
 from fastapi.testclient import TestClient
+from langchain_core.embeddings import Embeddings
 
+from app.config import Settings
 from app.dependencies import get_current_user, get_settings
 from app.main import app
+from app.services.vectorstore import VectorStoreService
 
 TEST_USER_ID = "test-user-00000000-0000-0000-0000-000000000001"
 
@@ -109,3 +115,79 @@ def valid_token() -> str:
 @pytest.fixture
 def expired_token() -> str:
     return make_expired_token()
+
+
+class RecordingEmbeddings(Embeddings):
+    """Cheap 3-d embeddings that record every embed_documents request."""
+
+    def __init__(self):
+        self.requests: list[list[str]] = []
+
+    def embed_documents(self, texts):
+        self.requests.append(list(texts))
+        return [[float(len(t)), 0.0, 1.0] for t in texts]
+
+    async def aembed_documents(self, texts):
+        await asyncio.sleep(0)
+        return self.embed_documents(texts)
+
+    def embed_query(self, text):
+        return [0.0, 0.0, 1.0]
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic pseudo-random 16-d embeddings keyed by text."""
+
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+    def embed_query(self, text):
+        seed = int(hashlib.sha256(text.encode()).hexdigest()[:8], 16)
+        return np.random.default_rng(seed).normal(size=16).tolist()
+
+
+@pytest.fixture
+def tmp_settings(tmp_path):
+    """Build Settings whose datasets, indexes and stores all live under tmp_path.
+
+    Call with ``subdir=`` to give each simulated user its own tree, and
+    keyword overrides for any other field.
+    """
+
+    def make(subdir: str = "", **overrides) -> Settings:
+        root = tmp_path / subdir
+        values = {
+            "deeplake_path": str(root / "kb"),
+            "transcripts_dir": str(root / "transcripts"),
+            "vocabulary_dir": str(root / "vocab"),
+            "metadata_index_dir": str(root / "index"),
+            "ann_index_dir": str(root / "ann"),
+            "lexical_index_dir": str(root / "lexical"),
+            "embedding_cache_path": "",
+            "shared_video_store_path": "",
+            "chunk_size": 50,
+            "chunk_overlap": 0,
+        }
+        values.update(overrides)
+        return Settings(**values)
+
+    return make
+
+
+@pytest.fixture
+def make_vectorstore(tmp_settings):
+    """Build a vector store service on tmp_settings with fake embeddings."""
+
+    def make(
+        cls: type[VectorStoreService] = VectorStoreService,
+        embeddings: Embeddings | None = None,
+        **overrides,
+    ) -> VectorStoreService:
+        settings = tmp_settings(**overrides)
+        with patch(
+            "app.services.vectorstore._get_embeddings",
+            return_value=embeddings or RecordingEmbeddings(),
+        ):
+            return cls(settings)
+
+    return make
@@ -0,0 +1,134 @@
+"""Tests for the cached extended-search agent graph."""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from langchain_core.documents import Document
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import AIMessage
+
+from app.services import agent_tools, chat as chat_module
+from app.services.agent_tools import KBSearchContext, search_knowledge_base
+from app.services.chat import AgentChatService, get_agent_graph
+
+
+class _ToolCallingFake(FakeMessagesListChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+def _fake_llm(query: str = "hi") -> _ToolCallingFake:
+    tool_call = {"name": "search_knowledge_base", "args": {"query": query}, "id": "call-1"}
+    return _ToolCallingFake(responses=[
+        AIMessage(content="", tool_calls=[tool_call]),
+        AIMessage(content="answer"),
+    ])
+
+
+def test_graph_is_cached_per_tool_configuration():
+    llm = _fake_llm()
+    with patch.object(chat_module, "_agent_graphs", {}):
+        kb_only = get_agent_graph(llm, web_search_enabled=False)
+        assert get_agent_graph(llm, web_search_enabled=False) is kb_only
+        assert get_agent_graph(llm, web_search_enabled=True) is not kb_only
+
+
+def test_cached_graph_uses_per_request_bindings():
+    llm = _fake_llm()
+    settings = SimpleNamespace(chat_model="gpt-4o", chat_max_tokens=256, serper_api_key=None)
+    clients = MagicMock()
+    clients.chat_model.return_value = llm
+
+    async def turn(service, url):
+        seed = [(Document(page_content="text", metadata={"title": "T", "source": url}), 0.5)]
+        service._fast_path_check = AsyncMock(return_value=(False, seed))
+        return [c async for c in service.stream("hi", [], user_id="u", extended_search=True)]
+
+    async def search(query, vectorstore, settings, **kwargs):
+        return kwargs["raw_results"]
+
+    async def run():
+        with patch.object(chat_module, "get_clients", return_value=clients), \
+             patch.object(chat_module, "get_user_vectorstore"), \
+             patch.object(agent_tools, "search_with_reformulation", AsyncMock(side_effect=search)), \
+             patch.object(chat_module, "_agent_graphs", {}), \
+             patch.object(chat_module, "create_react_agent", wraps=chat_module.create_react_agent) as build:
+            first = await turn(AgentChatService(settings), "https://a.example/1")
+            second = await turn(AgentChatService(settings), "https://b.example/2")
+        return first, second, build.call_count
+
+    first, second, builds = asyncio.run(run())
+
+    assert builds == 1
+    assert first[-1]["sources"] == ["https://a.example/1"]
+    assert second[-1]["sources"] == ["https://b.example/2"]
+    assert second[-1]["full_response"] == "answer"
+
+
+def _doc(source: str, score: float) -> tuple:
+    return Document(page_content=source, metadata={"title": "T", "source": source}), score
+
+
+def test_fast_path_check_decides_on_top_score():
+    settings = SimpleNamespace(
+        chat_model="gpt-4o", chat_max_tokens=256,
+        rag_confidence_threshold=0.8, rag_retrieval_k=5, rag_score_threshold=0.3,
+    )
+    results = [_doc("a", 0.6), _doc("b", 0.85)]
+    vectorstore = MagicMock()
+    vectorstore.similarity_search = AsyncMock(return_value=results)
+
+    async def run():
+        with patch.object(chat_module, "get_clients"), \
+             patch.object(chat_module, "get_user_vectorstore", return_value=vectorstore):
+            service = AgentChatService(settings)
+            hit = await service._fast_path_check("q", "u", deep_memory=False)
+            vectorstore.similarity_search.return_value = results[:1]
+            miss = await service._fast_path_check("q", "u", deep_memory=False)
+            settings.rag_confidence_threshold = 1.0
+            disabled = await service._fast_path_check("q", "u", deep_memory=False)
+        return hit, miss, disabled
+
+    hit, miss, disabled = asyncio.run(run())
+    assert hit == (True, results)
+    assert miss == (False, results[:1])
+    assert disabled == (False, None)
+    assert vectorstore.similarity_search.await_count == 2
+
+
+def test_seed_only_reused_for_the_same_query():
+    seed = [_doc("https://seed", 0.5)]
+    ctx = KBSearchContext(vectorstore=MagicMock(), seed_query="Nenci  Pilossi", seed_results=seed)
+    assert ctx.take_seed("something else") is None
+    assert ctx.take_seed("nenci pilossi") == seed
+    assert ctx.take_seed("nenci pilossi") is None  # only once
+    assert KBSearchContext(MagicMock(), seed_query="q", seed_results=[]).take_seed("q") is None
+
+
+def test_tool_corrects_seeded_query_and_searches_others():
+    seed = [_doc("https://seed", 0.5)]
+    corrected = [_doc("https://pelosi", 0.9)]
+    vectorstore = MagicMock()
+    vectorstore.similarity_search = AsyncMock(return_value=corrected)
+    settings = SimpleNamespace(speculative_retrieval=True, local_query_correction=False)
+
+    async def run(query, seed_results):
+        ctx = KBSearchContext(
+            vectorstore=vectorstore, settings=settings,
+            seed_query="nenci pilossi", seed_results=seed_results,
+        )
+        config = {"configurable": {"kb_search": ctx}}
+        with patch(
+            "app.services.retrieval.reformulate_query", AsyncMock(return_value="Nancy Pelosi")
+        ):
+            return await search_knowledge_base.ainvoke({"query": query}, config=config)
+
+    # Seeded: the corrected query is searched and fused with the seed
+    output = asyncio.run(run("nenci pilossi", seed))
+    assert "https://pelosi" in output and "https://seed" in output
+    assert vectorstore.similarity_search.await_count == 1
+
+    # An empty seed is not served as "no results"
+    output = asyncio.run(run("nenci pilossi", []))
+    assert "https://pelosi" in output
@@ -0,0 +1,110 @@
+"""Tests for the HNSW ANN index and its use by similarity_search."""
+
+import asyncio
+import threading
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+
+from app.services import vectorstore as vectorstore_module
+from app.services import ann_index as ann_module
+from app.services.ann_index import ANNIndex, HNSWIndex
+from app.services.vectorstore import VectorStoreService
+
+from tests.conftest import HashEmbeddings
+
+
+def _clustered(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(20, dim))
+    return (centers[rng.integers(0, 20, n)] + 0.5 * rng.normal(size=(n, dim))).astype(np.float32)
+
+
+def test_recall_at_k_against_exact_search(tmp_path):
+    vectors = _clustered(800, 32)
+    index = HNSWIndex(32)
+    index.add([str(i) for i in range(len(vectors))], vectors)
+
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = _clustered(50, 32, seed=1)
+    k = 10
+    hits = 0
+    for query in queries:
+        exact = np.argsort(-(normed @ (query / np.linalg.norm(query))))[:k]
+        hits += len({str(i) for i in exact} & {label for label, _ in index.search(query, k)})
+    assert hits / (k * len(queries)) >= 0.9
+
+    index.save(tmp_path / "idx.npz")
+    loaded = HNSWIndex.load(tmp_path / "idx.npz")
+    assert loaded.search(queries[0], k) == index.search(queries[0], k)
+
+    removed = [label for label, _ in loaded.search(queries[0], 3)]
+    loaded.remove(removed)
+    assert not set(removed) & {label for label, _ in loaded.search(queries[0], k)}
+
+
+def test_incremental_changes_are_saved_on_debounce(tmp_path):
+    vectors = _clustered(40, 8)
+    ann = ANNIndex(tmp_path / "idx.npz")
+    ann.build([{"ids": [str(i) for i in range(20)], "embeddings": vectors[:20]}])
+    saved = (tmp_path / "idx.npz").stat().st_mtime_ns
+
+    ann.add([str(i) for i in range(20, 40)], vectors[20:])
+    assert ann.live_count == 40
+    assert (tmp_path / "idx.npz").stat().st_mtime_ns == saved
+    assert ANNIndex(tmp_path / "idx.npz").live_count == 20
+
+    ann.flush()
+    assert ANNIndex(tmp_path / "idx.npz").live_count == 40
+
+    with patch.object(ann_module, "SAVE_INTERVAL", 0):
+        ann.remove(["0"])
+    assert ANNIndex(tmp_path / "idx.npz").live_count == 39
+
+
+def test_state_is_readable_while_an_insert_holds_the_lock(tmp_path):
+    ann = ANNIndex(tmp_path / "idx.npz")
+    ann.build([{"ids": ["a"], "embeddings": _clustered(1, 8)}])
+    held, release = threading.Event(), threading.Event()
+
+    def long_insert():
+        with ann.lock:
+            held.set()
+            release.wait(5)
+
+    worker = threading.Thread(target=long_insert)
+    worker.start()
+    held.wait(5)
+    try:
+        assert ann.ready and ann.live_count == 1
+    finally:
+        release.set()
+        worker.join()
+
+
+def test_similarity_search_uses_ann_above_threshold(make_vectorstore):
+    service = make_vectorstore(
+        VectorStoreService, HashEmbeddings(), ann_min_chunks=10, chunk_size=40
+    )
+    words = [f"word{i} " for i in range(200)]
+    service.add_documents(
+        ["".join(words[:20]), "".join(words[20:])], [{"video_id": "v1"}, {"video_id": "v2"}]
+    )
+    query = next(service.iter_chunk_batches(columns=("documents",)))["documents"][-1]
+
+    async def _run():
+        exact = await service.similarity_search(query, k=3)  # index missing: exact + build
+        await asyncio.gather(*vectorstore_module._background_tasks)
+        with patch.object(service, "_exact_search", AsyncMock()) as exact_search:
+            approx = await service.similarity_search(query, k=3)
+            exact_search.assert_not_called()
+        return exact, approx
+
+    exact, approx = asyncio.run(_run())
+    assert [d.page_content for d, _ in approx] == [d.page_content for d, _ in exact]
+    assert approx[0][1] > 0.99
+
+    service.delete_by_video_ids(["v1"])  # few enough tombstones to keep the index
+    ann = service._ann_index()
+    assert ann.ready and ann.live_count == service.get_chunk_count()
+    assert all(d.metadata["video_id"] == "v2" for d, _ in asyncio.run(service.similarity_search(query, k=5)))
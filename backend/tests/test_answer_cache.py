@@ -0,0 +1,93 @@
+"""Tests for the semantic answer cache."""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from app.models.chat import ChatMessage
+from app.services import answer_cache, chat as chat_module, user_settings
+from app.services.answer_cache import AnswerCache, CachedAnswer, answer_scope, replay_tokens
+from app.services.chat import AgentChatService
+from app.services.user_settings import UserSettings, UserSettingsCache
+
+
+def test_lookup_matches_similar_questions_within_scope_and_version():
+    cache = AnswerCache(similarity=0.95, max_entries=10, ttl_seconds=60)
+    scope = answer_scope("kb_only", False, [])
+    cache.put("u1", "v1", scope, [1.0, 0.0], CachedAnswer("cached", ("https://a",)))
+
+    assert cache.lookup("u1", "v1", scope, [0.99, 0.05]).text == "cached"
+    assert cache.lookup("u1", "v1", scope, [0.5, 0.5]) is None
+    assert cache.lookup("u2", "v1", scope, [1.0, 0.0]) is None
+    assert cache.lookup("u1", "v1", answer_scope("kb_only", True, []), [1.0, 0.0]) is None
+    history = [ChatMessage(role="user", content="earlier")]
+    assert cache.lookup("u1", "v1", answer_scope("kb_only", False, history), [1.0, 0.0]) is None
+
+    # A new KB version drops the user's answers
+    assert cache.lookup("u1", "v2", scope, [1.0, 0.0]) is None
+    assert cache.lookup("u1", "v1", scope, [1.0, 0.0]) is None
+
+
+def test_entries_expire_and_are_bounded():
+    scope = answer_scope("public", False, [])
+    expired = AnswerCache(similarity=0.95, max_entries=10, ttl_seconds=0)
+    expired.put("u1", "v1", scope, [1.0, 0.0], CachedAnswer("a"))
+    assert expired.lookup("u1", "v1", scope, [1.0, 0.0]) is None
+
+    bounded = AnswerCache(similarity=0.95, max_entries=1, ttl_seconds=60)
+    bounded.put("u1", "v1", scope, [1.0, 0.0], CachedAnswer("first"))
+    bounded.put("u1", "v1", scope, [0.0, 1.0], CachedAnswer("second"))
+    assert bounded.lookup("u1", "v1", scope, [1.0, 0.0]) is None
+    assert bounded.lookup("u1", "v1", scope, [0.0, 1.0]).text == "second"
+
+
+def test_replay_tokens_reassemble_the_answer():
+    text = "  Deep Memory improves\nrecall, see [Source 1].  "
+    tokens = replay_tokens(text)
+    assert len(tokens) > 1
+    assert "".join(tokens) == text
+
+
+def test_kb_only_replays_cached_answer_without_retrieval_or_llm():
+    settings = SimpleNamespace(
+        chat_model="gpt-4o", chat_max_tokens=256,
+        rag_retrieval_k=5, rag_score_threshold=0.3, kb_relevance_threshold=0.5,
+        answer_cache_max_entries=10, answer_cache_similarity=0.95, answer_cache_ttl=60,
+    )
+    llm = FakeListChatModel(responses=["No matching content found."])
+    clients = MagicMock()
+    clients.chat_model.return_value = llm
+    vectorstore = MagicMock()
+    vectorstore.embeddings.aembed_query = AsyncMock(
+        side_effect=[[1.0, 0.0], [0.99, 0.02], [1.0, 0.0]]
+    )
+    search = AsyncMock(return_value=[])
+    settings_cache = UserSettingsCache(ttl_seconds=60)
+    settings_cache.put("u1", UserSettings(kb_version="v1"))
+
+    async def turn():
+        service = AgentChatService(settings)
+        return [c async for c in service.stream("what is new?", [], user_id="u1")]
+
+    async def run():
+        with patch.object(chat_module, "get_clients", return_value=clients), \
+             patch.object(chat_module, "get_user_vectorstore", return_value=vectorstore), \
+             patch.object(chat_module, "search_with_reformulation", search), \
+             patch.object(user_settings, "_cache", settings_cache), \
+             patch.object(answer_cache, "_cache", None):
+            first = await turn()
+            second = await turn()
+            settings_cache.update("u1", kb_version="v2")  # e.g. after an ingest
+            third = await turn()
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+
+    assert search.call_count == 2
+    assert second[-1]["full_response"] == first[-1]["full_response"] == "No matching content found."
+    assert "".join(c["token"] for c in second[:-1]) == "No matching content found."
+    assert len(second) > 2
+    assert second[-1]["kb_relevant"] is False
+    assert third[-1]["full_response"] == "No matching content found."
@@ -0,0 +1,133 @@
+"""Tests for HTTP-first article extraction."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+
+from app.models.errors import AuthenticationError
+from app.services import article_scraper
+from app.services.auth_detection import detect_paywall_html
+
+ARTICLE_HTML = """<html><head>
+<meta property="og:title" content="Reading the Tape">
+</head><body>
+<nav>Home | Markets</nav>
+<article><h1>Ignored heading</h1><p>{body}</p><div class="share-bar">Share</div></article>
+</body></html>""".format(body="Volume confirms price. " * 30)
+
+APP_SHELL_HTML = """<html><body>
+<noscript>You need to enable JavaScript to run this app.</noscript>
+<div id="root"></div><script src="/bundle.js"></script>
+</body></html>"""
+
+
+@pytest.fixture
+def http_pages():
+    pages: dict[str, str] = {}
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(
+            200, text=pages[str(request.url)], headers={"content-type": "text/html"}
+        )
+
+    article_scraper._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    article_scraper._domain_strategies.clear()
+    yield pages, requests
+    article_scraper._http_client = None
+    article_scraper._domain_strategies.clear()
+
+
+def test_static_fetch_skips_the_browser(http_pages):
+    pages, _ = http_pages
+    pages["https://blog.example.com/a"] = ARTICLE_HTML
+
+    with patch.object(article_scraper, "_scrape_with_browser", AsyncMock()) as browser:
+        result = asyncio.run(article_scraper.scrape_article("https://blog.example.com/a"))
+
+    browser.assert_not_awaited()
+    assert result["title"] == "Reading the Tape"
+    assert "Volume confirms price." in result["content_markdown"]
+    assert "Share" not in result["content_markdown"]
+    assert article_scraper._domain_strategies.get("blog.example.com") == "http"
+
+
+def test_js_rendered_page_escalates_and_is_remembered(http_pages):
+    pages, requests = http_pages
+    pages["https://app.example.com/a"] = APP_SHELL_HTML
+    rendered = {"title": "T", "content_markdown": "body", "is_truncated": False}
+
+    with patch.object(
+        article_scraper, "_scrape_with_browser", AsyncMock(return_value=rendered)
+    ) as browser:
+        asyncio.run(article_scraper.scrape_article("https://app.example.com/a"))
+        asyncio.run(article_scraper.scrape_article("https://app.example.com/b"))
+
+    assert browser.await_count == 2
+    assert len(requests) == 1  # second page goes straight to the browser
+
+
+def test_cookie_header_only_includes_matching_domains():
+    cookies = (
+        '[{"name": "sid", "value": "1", "domain": ".example.com"},'
+        ' {"name": "other", "value": "2", "domain": "other.com"}]'
+    )
+
+    assert article_scraper._cookie_header(cookies, "www.example.com") == "sid=1"
+    assert article_scraper._cookie_header(None, "www.example.com") is None
+
+
+def test_detect_paywall_html_ignores_script_text():
+    html = '<html><body><p>Free story</p><script>var t = "Members only";</script></body></html>'
+
+    assert detect_paywall_html(html) is None
+    assert detect_paywall_html(
+        '<html><body><div class="paywall">Subscribe to read</div></body></html>'
+    ) == "Subscribe to read"
+
+
+class _FakePage:
+    def __init__(self, extracted: dict):
+        self.evaluate = AsyncMock(return_value=extracted)
+        self.wait_for_function = AsyncMock()
+        self.route = AsyncMock()
+
+    async def goto(self, url, **kwargs):
+        return None
+
+
+def _fake_pool(page: _FakePage):
+    class _Pool:
+        @asynccontextmanager
+        async def page(self, cookies_json=None, user_agent=None):
+            yield page
+
+    return _Pool()
+
+
+def test_browser_extraction_is_a_single_evaluate():
+    page = _FakePage(
+        {"html": "<html></html>", "paywall": None, "title": "T", "contentHtml": "<p>Body</p>"}
+    )
+
+    with patch.object(article_scraper, "get_browser_pool", return_value=_fake_pool(page)):
+        result = asyncio.run(article_scraper._scrape_with_browser("https://x.com/a", None))
+
+    assert result["title"] == "T"
+    assert result["content_markdown"] == "Body"
+    page.wait_for_function.assert_awaited_once()
+    assert page.evaluate.await_count == 1
+
+
+def test_browser_extraction_raises_on_paywall():
+    page = _FakePage(
+        {"html": "", "paywall": "Members only", "title": None, "contentHtml": "<p>x</p>"}
+    )
+
+    with patch.object(article_scraper, "get_browser_pool", return_value=_fake_pool(page)):
+        with pytest.raises(AuthenticationError):
+            asyncio.run(article_scraper._scrape_with_browser("https://x.com/a", "[]"))
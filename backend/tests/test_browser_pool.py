@@ -0,0 +1,125 @@
+"""Tests for the shared Playwright browser pool (with fake browsers)."""
+
+import asyncio
+
+from app.services.browser_pool import BrowserPool
+
+
+class _FakePage:
+    async def close(self):
+        pass
+
+
+class _FakeContext:
+    def __init__(self):
+        self.cookies: list[dict] = []
+        self.closed = False
+
+    async def add_cookies(self, cookies):
+        self.cookies.extend(cookies)
+
+    async def clear_cookies(self):
+        self.cookies.clear()
+
+    async def new_page(self):
+        return _FakePage()
+
+    async def close(self):
+        self.closed = True
+
+
+class _FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.contexts: list[_FakeContext] = []
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self, user_agent=None):
+        context = _FakeContext()
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        self.connected = False
+
+
+def _pool(**kwargs) -> tuple[BrowserPool, list[_FakeBrowser]]:
+    pool = BrowserPool(**kwargs)
+    launched: list[_FakeBrowser] = []
+
+    async def launch():
+        launched.append(_FakeBrowser())
+        return launched[-1]
+
+    pool._launch_browser = launch
+    return pool, launched
+
+
+def test_reuses_browser_and_context_per_cookie_set():
+    pool, launched = _pool(max_browsers=2, max_contexts=4)
+    cookies = '[{"name": "s", "value": "1", "domain": "x.com", "path": "/"}]'
+
+    async def run():
+        for _ in range(3):
+            async with pool.page(cookies):
+                pass
+        async with pool.page():
+            pass
+
+    asyncio.run(run())
+
+    assert len(launched) == 1
+    assert len(launched[0].contexts) == 2  # one cookie-set context, one anonymous
+
+
+def test_recycles_browser_after_page_limit():
+    pool, launched = _pool(recycle_after=2)
+
+    async def run():
+        for _ in range(3):
+            async with pool.page():
+                pass
+
+    asyncio.run(run())
+
+    assert len(launched) == 2
+    assert not launched[0].connected
+
+
+def test_replaces_disconnected_browser():
+    pool, launched = _pool()
+
+    async def run():
+        async with pool.page():
+            pass
+        launched[0].connected = False
+        async with pool.page():
+            pass
+
+    asyncio.run(run())
+
+    assert len(launched) == 2
+
+
+def test_bounds_concurrent_contexts():
+    pool, launched = _pool(max_browsers=2, max_contexts=2)
+    active = 0
+    peak = 0
+
+    async def scrape():
+        nonlocal active, peak
+        async with pool.page():
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    async def run():
+        await asyncio.gather(*(scrape() for _ in range(6)))
+
+    asyncio.run(run())
+
+    assert peak == 2
+    assert len(launched) == 2
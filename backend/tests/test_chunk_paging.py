@@ -0,0 +1,32 @@
+"""Tests for paged, projected chunk enumeration."""
+
+import asyncio
+
+
+def test_iter_chunk_batches_pages_and_projects(make_vectorstore):
+    service = make_vectorstore()
+    assert list(service.iter_chunk_batches()) == []  # dataset not created yet
+
+    service.add_documents(
+        ["alpha beta gamma " * 10, "delta epsilon " * 10],
+        [{"video_id": "v1", "title": "One"}, {"article_id": "a1", "title": "Two"}],
+    )
+    total = service.get_chunk_count()
+
+    pages = list(service.iter_chunk_batches(columns=("ids",), batch_size=2))
+    assert [len(p["ids"]) for p in pages[:-1]] == [2] * (len(pages) - 1)
+    assert all(set(p) == {"ids"} for p in pages)
+    ids = [i for p in pages for i in p["ids"]]
+    assert len(set(ids)) == len(ids) == total
+
+    async def _collect():
+        return [
+            page async for page in service.aiter_chunk_batches(
+                columns=("ids", "documents", "metadata"), batch_size=3
+            )
+        ]
+
+    full = asyncio.run(_collect())
+    assert [i for p in full for i in p["ids"]] == ids
+    assert {m["title"] for p in full for m in p["metadata"]} == {"One", "Two"}
+    assert all(isinstance(t, str) and t for p in full for t in p["documents"])
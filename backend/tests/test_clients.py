@@ -0,0 +1,47 @@
+"""Tests for the application-scoped client registry."""
+
+import asyncio
+from types import SimpleNamespace
+
+from app.services.clients import ClientRegistry
+
+
+def _settings(**overrides):
+    return SimpleNamespace(
+        openai_api_key="sk-test",
+        http_max_connections=10,
+        http_max_keepalive_connections=5,
+        http_keepalive_seconds=30.0,
+        **overrides,
+    )
+
+
+def test_clients_are_cached_and_share_one_pool():
+    settings = _settings()
+    registry = ClientRegistry(settings)
+
+    chat = registry.chat_model(settings, "gpt-4o", 2048, streaming=True)
+    assert registry.chat_model(settings, "gpt-4o", 2048, streaming=True) is chat
+    assert registry.chat_model(settings, "gpt-4o-mini", 256, temperature=0) is not chat
+    assert chat.root_async_client._client is registry.async_http
+    assert chat.root_client._client is registry.http
+
+    client = registry.openai("sk-test")
+    assert registry.openai("sk-test") is client
+    assert client._client is registry.async_http
+
+    asyncio.run(registry.aclose())
+    assert registry.async_http.is_closed
+
+
+def test_serper_session_is_shared_and_closed():
+    registry = ClientRegistry(_settings())
+
+    async def run():
+        serper = registry.serper("serper-key")
+        assert registry.serper("serper-key") is serper
+        session = serper.aiosession
+        await registry.aclose()
+        return session
+
+    assert asyncio.run(run()).closed
@@ -0,0 +1,112 @@
+"""Tests for the process-wide DeepLake dataset handle pool."""
+
+from unittest.mock import MagicMock
+
+from app.services.dataset_pool import DatasetPool
+
+
+def _factory():
+    return MagicMock()
+
+
+def test_reuses_open_handle():
+    pool = DatasetPool(max_size=4)
+    opener = MagicMock(side_effect=_factory)
+
+    first = pool.get("/data/user-a", True, opener)
+    second = pool.get("/data/user-a", True, opener)
+
+    assert first is second
+    assert opener.call_count == 1
+
+
+def test_read_only_and_writable_are_separate():
+    pool = DatasetPool(max_size=4)
+
+    reader = pool.get("/data/user-a", True, _factory)
+    writer = pool.get("/data/user-a", False, _factory)
+
+    assert reader is not writer
+    assert len(pool) == 2
+
+
+def test_evicts_least_recently_used():
+    pool = DatasetPool(max_size=2)
+    a = pool.get("/data/user-a", True, _factory)
+    pool.get("/data/user-b", True, _factory)
+    pool.get("/data/user-a", True, _factory)  # touch a
+    pool.get("/data/user-c", True, _factory)  # evicts b
+
+    assert len(pool) == 2
+    assert pool.get("/data/user-a", True, _factory) is a
+    opener = MagicMock(side_effect=_factory)
+    pool.get("/data/user-b", True, opener)
+    assert opener.call_count == 1
+
+
+def test_evicts_idle_handles():
+    pool = DatasetPool(max_size=4, idle_seconds=0)
+    a = pool.get("/data/user-a", True, _factory)
+
+    assert pool.get("/data/user-a", True, _factory) is not a
+
+
+def test_write_marks_reader_for_refresh():
+    pool = DatasetPool(max_size=4)
+    reader = pool.get("/data/user-a", True, _factory)
+
+    pool.mark_written("/data/user-a")
+    assert pool.get("/data/user-a", True, _factory) is reader
+    reader.dataset.refresh.assert_called_once()
+
+    pool.get("/data/user-a", True, _factory)
+    reader.dataset.refresh.assert_called_once()
+
+
+def test_failed_refresh_reopens():
+    pool = DatasetPool(max_size=4)
+    reader = pool.get("/data/user-a", True, _factory)
+    reader.dataset.refresh.side_effect = RuntimeError("gone")
+
+    pool.mark_written("/data/user-a")
+    assert pool.get("/data/user-a", True, _factory) is not reader
+
+
+def test_invalidate_drops_both_modes():
+    pool = DatasetPool(max_size=4)
+    pool.get("/data/user-a", True, _factory)
+    pool.get("/data/user-a", False, _factory)
+    pool.get("/data/user-b", True, _factory)
+
+    pool.invalidate("/data/user-a")
+
+    assert len(pool) == 1
+
+
+def test_factory_errors_are_not_cached():
+    pool = DatasetPool(max_size=4)
+    failing = MagicMock(side_effect=RuntimeError("Dataset does not exist"))
+
+    for _ in range(2):
+        try:
+            pool.get("/data/user-a", True, failing)
+        except RuntimeError:
+            pass
+
+    assert failing.call_count == 2
+    assert len(pool) == 0
+
+
+def test_write_locks_are_shared_while_held_and_then_dropped():
+    pool = DatasetPool(max_size=1)
+
+    held = pool.write_lock("/data/user-a")
+    with held:
+        assert pool.write_lock("/data/user-a") is held
+        assert pool.write_lock("/data/user-b") is not held
+    del held
+
+    for user in ("c", "d", "e"):
+        with pool.write_lock(f"/data/user-{user}"):
+            pool.get(f"/data/user-{user}", False, _factory)
+    assert len(pool._write_locks) == 0
@@ -0,0 +1,68 @@
+"""Tests for the non-blocking Supabase access layer."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from app.services import db
+
+
+class _SlowQuery:
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.thread_name = None
+
+    def execute(self):
+        self.thread_name = threading.current_thread().name
+        time.sleep(self.seconds)
+        return "response"
+
+
+def test_slow_queries_do_not_block_the_event_loop():
+    queries = [_SlowQuery(0.2) for _ in range(4)]
+    gaps = []
+
+    async def ticker(stop: asyncio.Event):
+        last = time.perf_counter()
+        while not stop.is_set():
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    async def run():
+        stop = asyncio.Event()
+        tick = asyncio.create_task(ticker(stop))
+        results = await asyncio.gather(*(db.execute(q) for q in queries))
+        stop.set()
+        await tick
+        return results
+
+    executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="supabase")
+    with patch.object(db, "_executor", executor):
+        assert asyncio.run(run()) == ["response"] * 4
+    executor.shutdown()
+
+    assert max(gaps) < 0.1
+    assert all(q.thread_name.startswith("supabase") for q in queries)
+
+
+def test_queries_run_when_default_executor_is_saturated():
+    release = threading.Event()
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        busy = ThreadPoolExecutor(max_workers=1)
+        loop.set_default_executor(busy)
+        ingest = asyncio.create_task(asyncio.to_thread(release.wait, 5))
+        response = await asyncio.wait_for(db.execute(_SlowQuery(0)), timeout=1)
+        release.set()
+        await ingest
+        return response
+
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="supabase")
+    with patch.object(db, "_executor", executor):
+        assert asyncio.run(run()) == "response"
+    executor.shutdown()
@@ -0,0 +1,126 @@
+"""Tests for the document and query embedding caches."""
+
+import asyncio
+
+from langchain_core.embeddings import Embeddings
+
+from app.services.embedding_cache import (
+    CachedEmbeddings,
+    EmbeddingCache,
+    QueryCachedEmbeddings,
+    QueryEmbeddingCache,
+)
+
+
+class _CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.calls: list[list[str]] = []
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.calls.append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return [float(len(text)), 0.0]
+
+
+def test_only_misses_hit_the_api(tmp_path):
+    underlying = _CountingEmbeddings()
+    cache = EmbeddingCache(str(tmp_path / "cache.db"))
+    embeddings = CachedEmbeddings(underlying, cache, model="m")
+
+    first = embeddings.embed_documents(["a", "bb"])
+    second = embeddings.embed_documents(["bb", "ccc", "bb"])
+
+    assert first == [[1.0, 1.0], [2.0, 1.0]]
+    assert second == [[2.0, 1.0], [3.0, 1.0], [2.0, 1.0]]
+    assert underlying.calls == [["a", "bb"], ["ccc"]]
+
+
+def test_cache_is_keyed_by_model(tmp_path):
+    underlying = _CountingEmbeddings()
+    cache = EmbeddingCache(str(tmp_path / "cache.db"))
+
+    CachedEmbeddings(underlying, cache, model="small").embed_documents(["a"])
+    CachedEmbeddings(underlying, cache, model="large").embed_documents(["a"])
+
+    assert len(underlying.calls) == 2
+
+
+def test_cache_persists_across_instances(tmp_path):
+    path = str(tmp_path / "cache.db")
+    EmbeddingCache(path).put_many("m", {"h": [0.5, 0.25]})
+
+    assert EmbeddingCache(path).get_many("m", ["h", "missing"]) == {"h": [0.5, 0.25]}
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.db"), max_entries=2)
+    cache.put_many("m", {"a": [1.0]})
+    cache.put_many("m", {"b": [2.0]})
+    cache.get_many("m", ["a"])
+    cache.put_many("m", {"c": [3.0]})
+
+    assert len(cache) == 2
+    assert set(cache.get_many("m", ["a", "b", "c"])) == {"a", "c"}
+
+
+def test_query_cache_normalizes_and_reuses():
+    underlying = _CountingEmbeddings()
+    calls = []
+    underlying.embed_query = lambda text: calls.append(text) or [1.0]
+    embeddings = QueryCachedEmbeddings(underlying, QueryEmbeddingCache(), model="m")
+
+    embeddings.embed_query("What is  VWAP?")
+    embeddings.embed_query("what is vwap?")
+
+    assert calls == ["What is  VWAP?"]
+
+
+def test_query_cache_expires_entries():
+    cache = QueryEmbeddingCache(ttl_seconds=0)
+    calls = []
+
+    cache.get_or_compute(("m", "q"), lambda: calls.append(1) or [1.0])
+    cache.get_or_compute(("m", "q"), lambda: calls.append(1) or [1.0])
+
+    assert len(calls) == 2
+
+
+def test_query_cache_single_flight():
+    cache = QueryEmbeddingCache()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return [1.0]
+
+    async def run():
+        return await asyncio.gather(
+            *(cache.aget_or_compute(("m", "q"), compute) for _ in range(5))
+        )
+
+    results = asyncio.run(run())
+
+    assert results == [[1.0]] * 5
+    assert len(calls) == 1
+
+
+def test_query_cache_does_not_store_failures():
+    cache = QueryEmbeddingCache()
+
+    async def fail():
+        raise RuntimeError("rate limited")
+
+    async def run():
+        return await asyncio.gather(
+            cache.aget_or_compute(("m", "q"), fail),
+            cache.aget_or_compute(("m", "q"), fail),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert len(cache) == 0
@@ -0,0 +1,49 @@
+"""Tests for token-packed batched embedding and columnar writes."""
+
+import asyncio
+from unittest.mock import patch
+
+from app.services.embedding_engine import BatchedEmbeddings, TokenBudget, pack_batches
+
+from tests.conftest import RecordingEmbeddings
+
+
+def test_pack_batches_respects_token_and_input_limits():
+    assert pack_batches([4, 4, 4, 4], max_tokens=8, max_inputs=10) == [[0, 1], [2, 3]]
+    assert pack_batches([1, 1, 1], max_tokens=100, max_inputs=2) == [[0, 1], [2]]
+    assert pack_batches([50], max_tokens=10, max_inputs=10) == [[0]]
+
+
+def test_token_budget_delays_once_exhausted():
+    budget = TokenBudget(tokens_per_minute=600)  # 10 tokens/s
+
+    assert budget.reserve(600) == 0.0
+    assert 0.9 < budget.reserve(10) <= 1.0
+
+
+def test_batched_embeddings_preserve_order():
+    underlying = RecordingEmbeddings()
+    embeddings = BatchedEmbeddings(
+        underlying, model="text-embedding-3-small", budget=TokenBudget(0),
+        max_tokens_per_request=5, max_inputs_per_request=100,
+    )
+    texts = [f"chunk number {i} " * 2 for i in range(6)]
+
+    sync_vectors = embeddings.embed_documents(texts)
+    async_vectors = asyncio.run(embeddings.aembed_documents(texts))
+
+    expected = [[float(len(t)), 0.0, 1.0] for t in texts]
+    assert sync_vectors == expected
+    assert async_vectors == expected
+    assert len(underlying.requests) > 2  # packed into several requests
+
+
+def test_aadd_documents_writes_columnar_batches(make_vectorstore):
+    service = make_vectorstore()
+
+    with patch("app.services.vectorstore.APPEND_BATCH_ROWS", 2):
+        added = asyncio.run(service.aadd_documents(
+            ["alpha beta gamma " * 10], [{"video_id": "v1", "source_type": "youtube"}]
+        ))
+
+    assert added == service.get_chunk_count() > 2
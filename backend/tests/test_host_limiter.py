@@ -0,0 +1,97 @@
+"""Tests for the adaptive per-host limiter and concurrent knowledge jobs."""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.models.knowledge import JobStatus, VideoSelection
+from app.routers.knowledge import process_knowledge_job
+from app.services.host_limiter import RAMP_AFTER, AdaptiveHostLimiter
+from app.services.job_manager import JobManager
+
+
+def test_ramps_up_after_consecutive_successes():
+    limiter = AdaptiveHostLimiter(max_concurrency=3, max_rate=0)
+
+    async def run():
+        for _ in range(RAMP_AFTER * 5):
+            async with limiter.slot():
+                pass
+
+    asyncio.run(run())
+
+    assert limiter.concurrency == 3
+
+
+def test_throttle_halves_concurrency_and_backs_off():
+    limiter = AdaptiveHostLimiter(max_concurrency=4, max_rate=0)
+    limiter.concurrency = 4
+
+    async def run():
+        async with limiter.slot() as lease:
+            lease.throttled = True
+
+    asyncio.run(run())
+
+    assert limiter.concurrency == 2
+    assert limiter.interval >= 2.0
+
+
+def test_never_exceeds_current_concurrency():
+    limiter = AdaptiveHostLimiter(max_concurrency=2, max_rate=0)
+    limiter.concurrency = 2
+    active = peak = 0
+
+    async def worker():
+        nonlocal active, peak
+        async with limiter.slot():
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    async def run():
+        await asyncio.gather(*(worker() for _ in range(8)))
+
+    asyncio.run(run())
+
+    assert peak == 2
+
+
+def test_knowledge_job_accounting_is_exact(tmp_path):
+    videos = [VideoSelection(video_id=f"v{i}", title=f"Video {i}") for i in range(10)]
+    settings = SimpleNamespace(
+        transcripts_dir=str(tmp_path),
+        shared_video_store_path="",
+        transcription_max_concurrency=4,
+        transcription_max_rate=0,
+        ingest_batch_tokens=1_000_000,
+        ingest_batch_seconds=0,
+    )
+    job_manager = JobManager()
+    job = job_manager.create_job(total_videos=len(videos))
+    vectorstore = MagicMock()
+    vectorstore.aadd_documents = AsyncMock(return_value=10)
+
+    def fake_transcript(video_id, title, cookie, settings, on_rate_limited):
+        if video_id in ("v3", "v7"):
+            raise RuntimeError("No transcript")
+        return f"transcript for {video_id}", True
+
+    async def run():
+        with patch("app.routers.knowledge.fetch_transcript", fake_transcript), \
+             patch("app.routers.knowledge.get_user_vectorstore", return_value=vectorstore), \
+             patch("app.routers.knowledge.update_cached_chunk_count"), \
+             patch("app.services.host_limiter._limiters", {}):
+            await process_knowledge_job(
+                job.id, videos, "Channel", job_manager, settings, MagicMock(), user_id="",
+            )
+
+    asyncio.run(run())
+
+    assert job.processed_videos == 10
+    assert sorted(job.failed_videos) == ["v3", "v7"]
+    assert len(job.succeeded_videos) == 8
+    assert job.status == JobStatus.COMPLETED
+    texts, metadatas = vectorstore.aadd_documents.call_args.args
+    assert sorted(m["video_id"] for m in metadatas) == sorted(job.succeeded_videos)
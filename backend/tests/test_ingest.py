@@ -0,0 +1,71 @@
+"""Tests for streaming micro-batch ingestion."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services.ingest import CHARS_PER_TOKEN, StreamingIngestor
+
+
+def _vectorstore():
+    vectorstore = MagicMock()
+    vectorstore.aadd_documents = AsyncMock(side_effect=lambda texts, metas: len(texts) * 2)
+    return vectorstore
+
+
+def test_commits_when_token_budget_is_reached():
+    vectorstore = _vectorstore()
+    batches = []
+    text = "x" * (CHARS_PER_TOKEN * 10)  # ~10 tokens
+
+    async def on_batch(chunks):
+        batches.append(chunks)
+
+    async def run():
+        async with StreamingIngestor(
+            vectorstore, max_tokens=25, max_seconds=0, on_batch=on_batch
+        ) as ingestor:
+            for i in range(7):
+                await ingestor.add(text, {"video_id": f"v{i}"})
+        return ingestor
+
+    ingestor = asyncio.run(run())
+
+    assert [len(c.args[0]) for c in vectorstore.aadd_documents.call_args_list] == [3, 3, 1]
+    assert batches == [6, 6, 2]
+    assert ingestor.chunks_added == 14
+
+
+def test_flushes_on_time_window():
+    vectorstore = _vectorstore()
+
+    async def run():
+        async with StreamingIngestor(vectorstore, max_tokens=10**9, max_seconds=0.02) as ingestor:
+            await ingestor.add("text", {"video_id": "v1"})
+            await asyncio.sleep(0.1)
+            assert vectorstore.aadd_documents.await_count == 1
+
+    asyncio.run(run())
+
+
+def test_failed_batch_does_not_lose_other_batches():
+    vectorstore = MagicMock()
+    calls = []
+
+    def add_documents(texts, metas):
+        calls.append(texts)
+        if len(calls) == 2:
+            raise RuntimeError("embedding API down")
+        return len(texts)
+
+    vectorstore.aadd_documents = AsyncMock(side_effect=add_documents)
+
+    async def run():
+        async with StreamingIngestor(vectorstore, max_tokens=1, max_seconds=0) as ingestor:
+            for i in range(3):
+                await ingestor.add("x" * 40, {"video_id": f"v{i}"})
+        return ingestor
+
+    ingestor = asyncio.run(run())
+
+    assert ingestor.chunks_added == 2
+    assert ingestor.failed_metadatas == [{"video_id": "v1"}]
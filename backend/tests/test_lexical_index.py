@@ -0,0 +1,60 @@
+"""Tests for the BM25 lexical index and hybrid similarity_search."""
+
+import asyncio
+
+from app.services.lexical_index import LexicalIndex, build_match_query
+from app.services.numpy_vectorstore import NumpyVectorStoreService
+
+from tests.conftest import HashEmbeddings
+
+
+def test_match_query_terms_and_phrases():
+    assert build_match_query("$NVDA") == '"nvda"'
+    assert build_match_query('the "3 bar play" setup') == (
+        '"3 bar play" OR "the 3 bar play setup" OR "the" OR "3" OR "bar" OR "play" OR "setup"'
+    )
+    assert build_match_query("?!") is None
+
+
+def test_bm25_ranks_exact_terms_and_phrases(tmp_path):
+    index = LexicalIndex(str(tmp_path / "lex.db"))
+    index.add(
+        ["c1", "c2", "c3", "c4"],
+        [
+            "Buy $NVDA when price reclaims VWAP",
+            "The 3 bar play is a momentum continuation pattern",
+            "A bar chart can play tricks on you after 3 days",
+            "Nothing relevant here",
+        ],
+        [{"title": "Tickers"}, {}, {}, {"title": "NVDA deep dive"}],
+    )
+
+    assert {c for c, _ in index.search("$nvda", 5)} == {"c1", "c4"}
+    assert index.search("3 bar play", 5)[0][0] == "c2"
+
+    index.remove(["c2"])
+    assert "c2" not in {c for c, _ in index.search("3 bar play", 5)}
+
+
+def test_hybrid_search_recovers_exact_term_hits(make_vectorstore):
+    service = make_vectorstore(
+        NumpyVectorStoreService, HashEmbeddings(), ann_min_chunks=0, chunk_size=1000
+    )
+    texts = [f"general market commentary number {i}" for i in range(30)]
+    texts.append("anchored VWAP is where institutions defend positions")
+    service.add_documents(texts, [{"video_id": f"v{i}"} for i in range(len(texts))])
+
+    def _contents(results):
+        return [doc.page_content for doc, _ in results]
+
+    async def _search(hybrid: bool):
+        return await service.similarity_search("VWAP", k=3, score_threshold=-1.0, hybrid=hybrid)
+
+    dense = asyncio.run(_search(False))
+    hybrid = asyncio.run(_search(True))
+    assert texts[-1] not in _contents(dense)  # random embeddings: dense misses it
+    assert texts[-1] in _contents(hybrid)
+    assert len(hybrid) == 3
+
+    service.delete_by_video_ids([f"v{len(texts) - 1}"])
+    assert texts[-1] not in _contents(asyncio.run(_search(True)))
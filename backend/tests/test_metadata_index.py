@@ -0,0 +1,103 @@
+"""Tests for the source-key -> chunk-id metadata index."""
+
+from collections import OrderedDict
+from unittest.mock import patch
+
+from langchain_deeplake import DeeplakeVectorStore
+
+from app.services.metadata_index import MetadataIndex
+
+
+def test_index_lookup_and_remove(tmp_path):
+    index = MetadataIndex(str(tmp_path / "idx.db"))
+    index.add(
+        ["c1", "c2", "c3"],
+        [
+            {"video_id": "v1", "source_type": "youtube"},
+            {"video_id": "v1", "source_type": "youtube"},
+            {"article_id": "a1", "source_type": "article", "title": "ignored"},
+        ],
+    )
+
+    assert sorted(index.lookup("video_id", ["v1", "v2"])) == ["c1", "c2"]
+    assert sorted(index.lookup("source_type", ["youtube", "article"])) == ["c1", "c2", "c3"]
+
+    index.remove(["c1"])
+    assert index.lookup("video_id", ["v1"]) == ["c2"]
+    assert index.diff(["c2"], [{"video_id": "v1", "source_type": "youtube"}]) == (0, 2)
+
+
+def test_deletes_use_index_and_keep_it_in_sync(make_vectorstore):
+    service = make_vectorstore()
+    service.add_documents(
+        ["alpha beta gamma " * 10, "delta epsilon " * 10],
+        [{"video_id": "v1", "source_type": "youtube"}, {"article_id": "a1", "source_type": "article"}],
+    )
+    total = service.get_chunk_count()
+    assert service.verify_metadata_index() == (0, 0, True)
+
+    index = service._metadata_index()
+    with patch.object(index, "lookup", wraps=index.lookup) as lookup:
+        deleted = service.delete_by_video_ids(["v1"])
+    lookup.assert_called_once_with("video_id", ["v1"])
+
+    assert 0 < deleted < total
+    assert service.get_chunk_count() == total - deleted
+    assert service.delete_by_video_ids(["v1"]) == 0
+    assert service.verify_metadata_index() == (0, 0, True)
+
+
+def test_rebuild_indexes_existing_dataset(tmp_path, make_vectorstore):
+    service = make_vectorstore()
+    service.add_documents(["alpha beta gamma " * 10], [{"collection_id": "col", "source_type": "documentation"}])
+
+    # Simulate a dataset that predates the index
+    (tmp_path / "index" / "kb.db").unlink()
+    with patch("app.services.metadata_index._indexes", OrderedDict()):
+        assert service.verify_metadata_index()[2] is False
+        # incomplete index falls back to the TQL scan and still deletes
+        assert service.delete_by_collection_id("col") > 0
+
+        service.add_documents(["delta epsilon " * 10], [{"article_id": "a1", "source_type": "article"}])
+        count = service.rebuild_metadata_index()
+        assert count == service.get_chunk_count()
+        assert service.verify_metadata_index() == (0, 0, True)
+        assert service.delete_by_article_ids(["a1"]) == count
+
+
+def test_deletes_rows_by_offset_and_heals_the_row_map(make_vectorstore):
+    service = make_vectorstore()
+    texts = [f"document {n} " * 20 for n in range(4)]
+    service.add_documents(texts, [{"video_id": f"v{n}", "source_type": "youtube"} for n in range(4)])
+    dataset = service._open(read_only=False).dataset
+    rows = [str(i) for i in dataset["ids"][:]]
+    index = service._metadata_index()
+    assert index.row_positions(rows) == list(range(len(rows)))
+
+    with patch.object(DeeplakeVectorStore, "delete", side_effect=AssertionError("TQL delete")):
+        deleted = service.delete_by_video_ids(["v1"])
+    survivors = [str(i) for i in dataset["ids"][:]]
+    assert len(survivors) == len(rows) - deleted
+    assert index.row_positions(survivors) == list(range(len(survivors)))
+
+    # A stale row map (rows written behind its back) is detected and rebuilt
+    index.set_rows(list(reversed(survivors)))
+    assert service.delete_by_video_ids(["v2"]) > 0
+    survivors = [str(i) for i in dataset["ids"][:]]
+    assert index.row_positions(survivors) == list(range(len(survivors)))
+    assert service.verify_metadata_index() == (0, 0, True)
+
+
+def test_interrupted_write_leaves_index_incomplete(make_vectorstore):
+    service = make_vectorstore()
+    service.add_documents(["alpha beta gamma " * 10], [{"video_id": "v1", "source_type": "youtube"}])
+    index = service._metadata_index()
+    assert index.complete
+
+    with patch.object(service, "_after_write", side_effect=RuntimeError("crash")):
+        try:
+            service.add_documents(["delta epsilon " * 10], [{"video_id": "v2", "source_type": "youtube"}])
+        except RuntimeError:
+            pass
+    assert index.complete is False
+    assert service.delete_by_video_ids(["v2"]) > 0  # falls back to the scan
@@ -0,0 +1,102 @@
+"""Tests for the local NumPy vector backend."""
+
+import asyncio
+import sqlite3
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from app.services.numpy_vectorstore import NumpyVectorStoreService, VectorFileStore
+from app.services.vectorstore import get_user_vectorstore
+
+from tests.conftest import RecordingEmbeddings
+
+
+def _vectors(n: int, dim: int = 16, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+
+
+def _store_with(tmp_path, n: int, dtype: str = "float32") -> tuple[VectorFileStore, np.ndarray]:
+    store = VectorFileStore(str(tmp_path / "store"), dtype)
+    vectors = _vectors(n)
+    store.add(
+        [f"c{i}" for i in range(n)],
+        [f"doc {i}" for i in range(n)],
+        [{"video_id": f"v{i % 5}"} for i in range(n)],
+        vectors.tolist(),
+    )
+    return store, vectors
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+def test_search_matches_exact_cosine(tmp_path, dtype):
+    store, vectors = _store_with(tmp_path, 200, dtype)
+    query = _vectors(1, seed=1)[0]
+
+    results = store.search(query.tolist(), k=5)
+
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = np.argsort(-(normed @ (query / np.linalg.norm(query))))[:5]
+    assert [doc.page_content for doc, _ in results] == [f"doc {i}" for i in expected]
+    assert results[0][0].metadata == {"video_id": f"v{expected[0] % 5}"}
+    scores = [score for _, score in results]
+    assert scores == sorted(scores, reverse=True) and scores[0] <= 1.0001
+
+
+def test_delete_compact_and_reopen(tmp_path):
+    store, vectors = _store_with(tmp_path, 1000)
+    deleted = store.delete(store.ids_where("video_id", ["v0", "v1"]))
+    assert deleted == 400
+    assert store.generation == 1  # 40% dead rows triggered compaction
+    assert store.count() == 600
+
+    reopened = VectorFileStore(str(tmp_path / "store"))
+    assert reopened.count() == 600
+    target = vectors[7]  # c7 -> v2, still live
+    assert reopened.search(target.tolist(), k=1)[0][0].page_content == "doc 7"
+    assert all(
+        doc.metadata["video_id"] not in ("v0", "v1")
+        for doc, _ in reopened.search(target.tolist(), k=600)
+    )
+
+
+def test_rows_stay_aligned_after_torn_or_failed_appends(tmp_path):
+    store, vectors = _store_with(tmp_path, 10)
+    row_bytes = store.dim * store.dtype.itemsize
+    with open(store._vectors_path, "ab") as f:
+        f.write(b"\0" * (row_bytes // 2))  # crash mid-append
+
+    reopened = VectorFileStore(str(tmp_path / "store"))
+    assert reopened._vectors_path.stat().st_size == 10 * row_bytes
+
+    # Duplicate id: the sidecar insert fails after the vectors were written
+    with pytest.raises(sqlite3.IntegrityError):
+        reopened.add(["c0"], ["dup"], [{}], _vectors(1, seed=2).tolist())
+    assert reopened._vectors_path.stat().st_size == 10 * row_bytes
+
+    extra = _vectors(1, seed=3)
+    reopened.add(["c10"], ["doc 10"], [{}], extra.tolist())
+    assert reopened.search(extra[0].tolist(), k=1)[0][0].page_content == "doc 10"
+    assert reopened.search(vectors[3].tolist(), k=1)[0][0].page_content == "doc 3"
+    assert VectorFileStore(str(tmp_path / "store")).count() == 11
+
+
+def test_service_backend_selected_by_settings(tmp_settings):
+    settings = tmp_settings(vectorstore_backend="numpy")
+    with patch("app.services.vectorstore._get_embeddings", return_value=RecordingEmbeddings()):
+        service = get_user_vectorstore("numpy-user", settings)
+    assert isinstance(service, NumpyVectorStoreService)
+
+    added = asyncio.run(service.aadd_documents(
+        ["alpha beta gamma " * 10, "delta " * 10],
+        [{"video_id": "v1"}, {"article_id": "a1"}],
+    ))
+    assert service.get_chunk_count() == added
+    results = asyncio.run(service.similarity_search("anything", k=2))
+    assert len(results) == 2
+
+    assert service.delete_by_article_ids(["a1"]) > 0
+    assert service.verify_metadata_index() == (0, 0, True)
+    remaining = [m for p in service.iter_chunk_batches(columns=("metadata",)) for m in p["metadata"]]
+    assert remaining and all(m == {"video_id": "v1"} for m in remaining)
@@ -0,0 +1,67 @@
+"""Tests for scraping request interception."""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from app.services.resource_blocker import BlockStats, block_heavy_resources, is_tracker
+
+
+class _FakePage:
+    def __init__(self):
+        self.handler = None
+
+    async def route(self, pattern, handler):
+        self.handler = handler
+
+
+def _route(url: str, resource_type: str):
+    return SimpleNamespace(
+        request=SimpleNamespace(url=url, resource_type=resource_type),
+        abort=AsyncMock(),
+        continue_=AsyncMock(),
+    )
+
+
+def test_is_tracker_matches_subdomains():
+    assert is_tracker("https://www.google-analytics.com/g/collect")
+    assert is_tracker("https://bat.bing.com/bat.js")
+    assert not is_tracker("https://www.bing.com/search")
+    assert not is_tracker("https://example.com/app.js")
+
+
+def test_blocks_heavy_resources_and_counts_them():
+    page = _FakePage()
+    stats = BlockStats()
+
+    async def run():
+        await block_heavy_resources(page, "https://news.example.com/a", stats)
+        routes = [
+            _route("https://news.example.com/hero.jpg", "image"),
+            _route("https://news.example.com/app.js", "script"),
+            _route("https://www.googletagmanager.com/gtm.js", "script"),
+        ]
+        for route in routes:
+            await page.handler(route)
+        return routes
+
+    image, script, tracker = asyncio.run(run())
+
+    image.abort.assert_awaited_once()
+    script.continue_.assert_awaited_once()
+    tracker.abort.assert_awaited_once()
+    assert stats.blocked_requests == 2
+    assert stats.by_kind == {"image": 1, "tracker": 1}
+    assert stats.estimated_bytes_saved > 0
+
+
+def test_allow_listed_domains_are_not_intercepted():
+    page = _FakePage()
+
+    with patch(
+        "app.services.resource_blocker.settings",
+        SimpleNamespace(scrape_block_resources=True, scrape_block_allow_domains=["example.com"]),
+    ):
+        asyncio.run(block_heavy_resources(page, "https://docs.example.com/a"))
+
+    assert page.handler is None
@@ -0,0 +1,118 @@
+"""Tests for shared retrieval helpers."""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from langchain_core.documents import Document
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from app.services import chat as chat_module
+from app.services.chat import AgentChatService
+from app.services.retrieval import _load_vocabulary, reciprocal_rank_fusion, search_with_reformulation
+from app.services.typo_corrector import KBVocabulary
+
+
+def _doc(text: str, source: str = "") -> Document:
+    return Document(page_content=text, metadata={"source": source})
+
+
+def test_rrf_prefers_documents_ranked_in_both_lists():
+    a, b, c = _doc("a"), _doc("b"), _doc("c")
+
+    fused = reciprocal_rank_fusion([[(a, 0.9), (b, 0.8)], [(b, 0.7), (c, 0.6)]], limit=3)
+
+    assert [doc.page_content for doc, _ in fused] == ["b", "a", "c"]
+    assert fused[0][1] == 0.8  # best score kept
+
+
+def test_rrf_respects_limit():
+    results = [(_doc(str(i)), 1.0 - i / 10) for i in range(5)]
+
+    assert len(reciprocal_rank_fusion([results], limit=2)) == 2
+
+
+def _vectorstore(results_by_query: dict[str, list[tuple]]):
+    async def search(query, **kwargs):
+        return results_by_query[query]
+
+    return SimpleNamespace(similarity_search=AsyncMock(side_effect=search))
+
+
+def test_speculative_results_used_when_query_unchanged():
+    hit = [(_doc("x"), 0.9)]
+    vectorstore = _vectorstore({"vwap": hit})
+    settings = SimpleNamespace(speculative_retrieval=True, local_query_correction=False)
+
+    with patch("app.services.retrieval.reformulate_query", AsyncMock(return_value="VWAP")):
+        results = asyncio.run(
+            search_with_reformulation("vwap", vectorstore, settings, k=5, score_threshold=0.3)
+        )
+
+    assert results == hit
+    assert vectorstore.similarity_search.await_count == 1
+
+
+def test_reformulated_results_are_fused():
+    raw = [(_doc("raw"), 0.4)]
+    corrected = [(_doc("pelosi"), 0.9)]
+    vectorstore = _vectorstore({"nenci pilossi": raw, "Nancy Pelosi": corrected})
+    settings = SimpleNamespace(speculative_retrieval=True, local_query_correction=False)
+
+    with patch(
+        "app.services.retrieval.reformulate_query", AsyncMock(return_value="Nancy Pelosi")
+    ):
+        results = asyncio.run(
+            search_with_reformulation(
+                "nenci pilossi", vectorstore, settings, k=5, score_threshold=0.3
+            )
+        )
+
+    assert [doc.page_content for doc, _ in results] == ["pelosi", "raw"]
+
+
+def test_partial_vocabulary_is_bootstrapped_before_use(tmp_path):
+    # Ingested into a pre-existing dataset: only the new chunk's words are known
+    vocabulary = KBVocabulary(tmp_path / "user-test.json")
+    vocabulary.add_texts(["recent upload"])
+
+    async def pages(columns):
+        yield {"documents": ["older transcript about earnings"], "metadata": [{}]}
+
+    vectorstore = SimpleNamespace(deeplake_path="user-test", aiter_chunk_batches=pages)
+    settings = SimpleNamespace(local_query_correction=True)
+
+    async def run():
+        with patch("app.services.retrieval.get_vocabulary", return_value=vocabulary):
+            loaded = await _load_vocabulary(vectorstore, settings)
+            assert not loaded.complete
+            while loaded.building:
+                await asyncio.sleep(0.01)
+        return loaded
+
+    loaded = asyncio.run(run())
+
+    assert loaded.complete
+    assert "earnings" in loaded.index
+    assert KBVocabulary(tmp_path / "user-test.json").complete
+
+
+def test_kb_only_relevance_uses_best_fused_score():
+    settings = SimpleNamespace(
+        chat_model="gpt-4o", chat_max_tokens=256,
+        rag_retrieval_k=5, rag_score_threshold=0.3, kb_relevance_threshold=0.5,
+        answer_cache_max_entries=0,
+    )
+    clients = MagicMock()
+    clients.chat_model.return_value = FakeListChatModel(responses=["answer"])
+    # RRF order: a document found by both queries outranks the best-scoring one
+    fused = [(_doc("both", "https://a"), 0.4), (_doc("best", "https://b"), 0.9)]
+
+    async def run():
+        with patch.object(chat_module, "get_clients", return_value=clients), \
+             patch.object(chat_module, "get_user_vectorstore", return_value=MagicMock()), \
+             patch.object(chat_module, "search_with_reformulation", AsyncMock(return_value=fused)):
+            service = AgentChatService(settings)
+            return [c async for c in service.stream("question", [], user_id="u1")]
+
+    assert asyncio.run(run())[-1]["kb_relevant"] is True
@@ -0,0 +1,79 @@
+"""Tests for the cross-user transcript and chunk embedding store."""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.models.knowledge import VideoSelection
+from app.routers.knowledge import process_knowledge_job
+from app.services.job_manager import JobManager
+from app.services.numpy_vectorstore import NumpyVectorStoreService
+from app.services.shared_videos import SharedVideoStore
+
+from tests.conftest import RecordingEmbeddings
+
+
+def test_chunk_sets_are_keyed_by_transcript_and_chunking(tmp_path):
+    store = SharedVideoStore(str(tmp_path / "shared.db"))
+    store.put_chunks("v1", "hash", 50, 0, "model", ["a", "b"], [[1.0, 2.0], [3.0, 4.0]])
+
+    assert store.get_chunks("v1", "hash", 50, 0, "model") == (["a", "b"], [[1.0, 2.0], [3.0, 4.0]])
+    assert store.get_chunks("v1", "other-hash", 50, 0, "model") is None
+    assert store.get_chunks("v1", "hash", 100, 0, "model") is None
+
+
+def test_second_user_reuses_embeddings_in_own_dataset(tmp_path, make_vectorstore):
+    embeddings = RecordingEmbeddings()
+    services = [
+        make_vectorstore(
+            NumpyVectorStoreService, embeddings,
+            subdir=user, shared_video_store_path=str(tmp_path / "shared.db"),
+        )
+        for user in ("u1", "u2")
+    ]
+    transcript = "alpha beta gamma " * 10
+    meta = {"video_id": "v1", "source_type": "youtube", "title": "Video"}
+
+    first = asyncio.run(services[0].aadd_documents([transcript], [meta]))
+    requests = len(embeddings.requests)
+    second = asyncio.run(services[1].aadd_documents([transcript, "delta " * 10], [meta, {}]))
+
+    assert first > 0 and second > first
+    # Only the non-video document is embedded for the second user
+    embedded = [text for batch in embeddings.requests[requests:] for text in batch]
+    assert embedded and all("delta" in text for text in embedded)
+    assert services[0].get_chunk_count() == first
+    assert services[1].get_chunk_count() == second
+
+
+def test_job_shares_only_public_transcripts(tmp_path):
+    videos = [VideoSelection(video_id=v, title=v) for v in ("public", "members")]
+    settings = SimpleNamespace(
+        transcripts_dir=str(tmp_path / "transcripts"),
+        shared_video_store_path=str(tmp_path / "shared.db"),
+        transcription_max_concurrency=2,
+        transcription_max_rate=0,
+        ingest_batch_tokens=1_000_000,
+        ingest_batch_seconds=0,
+    )
+    fetch = MagicMock(side_effect=lambda video_id, *args: (f"text of {video_id}", video_id == "public"))
+
+    def run_job():
+        job_manager = JobManager()
+        job = job_manager.create_job(total_videos=len(videos))
+        vectorstore = MagicMock()
+        vectorstore.aadd_documents = AsyncMock(return_value=1)
+        with patch("app.routers.knowledge.fetch_transcript", fetch), \
+             patch("app.routers.knowledge.get_user_vectorstore", return_value=vectorstore), \
+             patch("app.routers.knowledge.update_cached_chunk_count"), \
+             patch("app.services.host_limiter._limiters", {}), \
+             patch("app.services.shared_videos._stores", {}):
+            asyncio.run(process_knowledge_job(
+                job.id, videos, "Channel", job_manager, settings, MagicMock(), user_id="",
+            ))
+        return job
+
+    assert len(run_job().succeeded_videos) == 2
+    assert len(run_job().succeeded_videos) == 2
+    fetched = [c.args[0] for c in fetch.call_args_list]
+    assert sorted(fetched) == ["members", "members", "public"]
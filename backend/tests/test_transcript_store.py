@@ -0,0 +1,130 @@
+"""Tests for the video-ID-keyed transcript store and transcript endpoints."""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from app.dependencies import get_settings, get_supabase
+from app.main import app
+from app.services import transcript_store
+from app.services.transcript_store import BLOCK_SIZE, TranscriptStore
+
+
+def test_put_read_range_and_replace(tmp_path):
+    store = TranscriptStore(str(tmp_path))
+    text = "".join(f"line {i}\n" for i in range(40_000))  # several blocks
+    entry = store.put("abc123", "Same Title", text)
+    data = text.encode("utf-8")
+
+    assert len(entry.blocks) == -(-len(data) // BLOCK_SIZE)
+    assert store.read_text("abc123") == text
+    start = BLOCK_SIZE + 10
+    with patch.object(transcript_store, "_decompress", wraps=transcript_store._decompress) as decode:
+        assert store.read(entry, start, start + 100) == data[start:start + 100]
+    assert decode.call_count == 1
+
+    # Same title, different video: no collision
+    store.put("xyz789", "Same Title", "other transcript")
+    assert store.read_text("abc123") == text
+
+    replaced = store.put("abc123", "Same Title", "new text")
+    assert replaced.etag != entry.etag
+    assert not (tmp_path / entry.filename).exists()
+    assert store.read_text("abc123") == "new text"
+
+    assert store.delete("abc123")
+    assert store.entry("abc123") is None
+    assert not (tmp_path / replaced.filename).exists()
+
+
+def test_legacy_title_file_is_migrated_only_for_its_video(tmp_path):
+    (tmp_path / "My-Video.md").write_text(
+        "# My Video\n\n**Video:** https://youtube.com/watch?v=vid1\n\n---\n\nhello world",
+        encoding="utf-8",
+    )
+    store = TranscriptStore(str(tmp_path))
+
+    assert store.migrate_legacy("vid2", "My Video") is None
+    entry = store.migrate_legacy("vid1", "My Video")
+    assert entry is not None
+    assert store.read_text("vid1") == "hello world"
+    assert not (tmp_path / "My-Video.md").exists()
+
+
+def test_read_latest_retries_after_concurrent_replace(tmp_path):
+    store = TranscriptStore(str(tmp_path))
+    old = store.put("vid1", "Title", "old text")
+    store.put("vid1", "Title", "new text")  # removes old.filename
+
+    entry, data = store.read_latest(old)
+    assert data == b"new text"
+    assert entry.etag != old.etag
+
+
+def test_transcript_endpoints_support_etag_and_ranges(tmp_path, auth_client):
+    store = TranscriptStore(str(tmp_path))
+    store.put("vid1", "Title", "0123456789" * 10)
+    supabase = MagicMock()
+    supabase.table.return_value.select.return_value.eq.return_value.eq.return_value.execute.return_value = \
+        SimpleNamespace(data=[{
+            "video_id": "vid1", "title": "Title", "url": "https://youtube.com/watch?v=vid1",
+            "is_transcribed": True,
+        }])
+    app.dependency_overrides[get_settings] = lambda: SimpleNamespace(transcripts_dir=str(tmp_path))
+    app.dependency_overrides[get_supabase] = lambda: supabase
+
+    with patch.object(transcript_store, "_stores", {str(tmp_path): store}):
+        full = auth_client.get("/v1/api/knowledge/videos/vid1/transcript")
+        assert full.status_code == 200
+        assert full.json()["content"] == "0123456789" * 10
+        etag = full.headers["etag"]
+
+        cached = auth_client.get(
+            "/v1/api/knowledge/videos/vid1/transcript", headers={"If-None-Match": etag}
+        )
+        assert cached.status_code == 304
+
+        part = auth_client.get(
+            "/v1/api/knowledge/videos/vid1/transcript/text", headers={"Range": "bytes=5-14"}
+        )
+        assert part.status_code == 206
+        assert part.text == "5678901234"
+        assert part.headers["content-range"] == "bytes 5-14/100"
+
+        tail = auth_client.get(
+            "/v1/api/knowledge/videos/vid1/transcript/text", headers={"Range": "bytes=-3"}
+        )
+        assert tail.text == "789"
+
+        beyond = auth_client.get(
+            "/v1/api/knowledge/videos/vid1/transcript/text", headers={"Range": "bytes=200-"}
+        )
+        assert beyond.status_code == 416
+
+        # A range read racing a re-transcription gets the new version whole
+        stale = store.entry("vid1")
+        current = store.put("vid1", "Title", "replaced")
+        with patch.object(store, "entry", side_effect=[stale, current]):
+            raced = auth_client.get(
+                "/v1/api/knowledge/videos/vid1/transcript/text", headers={"Range": "bytes=5-14"}
+            )
+        assert raced.status_code == 200
+        assert raced.text == "replaced"
+        assert raced.headers["etag"] == f'"{current.etag}"'
+
+        # Unmigrated title-named files are served in place, without writing
+        (tmp_path / "Title.md").write_text(
+            "# Title\n\nhttps://youtube.com/watch?v=vid1\n\n---\n\nlegacy body", encoding="utf-8"
+        )
+        store.delete("vid1")
+        legacy = auth_client.get("/v1/api/knowledge/videos/vid1/transcript")
+        assert legacy.status_code == 200
+        assert legacy.json()["content"] == "legacy body"
+        assert auth_client.get(
+            "/v1/api/knowledge/videos/vid1/transcript", headers={"If-None-Match": legacy.headers["etag"]}
+        ).status_code == 304
+        ranged = auth_client.get(
+            "/v1/api/knowledge/videos/vid1/transcript/text", headers={"Range": "bytes=7-10"}
+        )
+        assert ranged.status_code == 206 and ranged.text == "body"
+        assert (tmp_path / "Title.md").exists()
+        assert store.entry("vid1") is None
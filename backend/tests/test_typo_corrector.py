@@ -0,0 +1,104 @@
+"""Tests for the local KB-vocabulary typo corrector."""
+
+from app.services.typo_corrector import KBVocabulary, SymSpellIndex, edit_distance
+
+
+def _vocabulary(tmp_path) -> KBVocabulary:
+    vocabulary = KBVocabulary(tmp_path / "user-test.json")
+    vocabulary.add_texts(
+        ["nancy pelosi bought call options on nvidia before the earnings report"],
+        [{"title": "Nancy Pelosi Trades NVDA", "channel": "Unusual Whales"}],
+    )
+    return vocabulary
+
+
+def test_edit_distance_counts_transpositions():
+    assert edit_distance("pelosi", "pelosi", 2) == 0
+    assert edit_distance("pleosi", "pelosi", 2) == 1
+    assert edit_distance("nenci", "nancy", 2) == 2
+    assert edit_distance("abcdef", "uvwxyz", 2) is None
+
+
+def test_lookup_only_accepts_clear_typos():
+    index = SymSpellIndex()
+    index.add("hold", 10)
+    index.add("options", 10)
+    index.add("earnings", 10)
+    index.add("bands", 1)
+    index.add("market", 5)
+    index.add("marker", 5)
+
+    assert index.lookup("optins") == "options"
+    assert index.lookup("earnigns") == "earnings"
+    assert index.lookup("gold") is None      # too short to tell from a valid word
+    assert index.lookup("bonds") is None     # target too rare
+    assert index.lookup("markey") is None    # ambiguous
+
+
+def test_corrects_names_from_titles(tmp_path):
+    corrected, resolved = _vocabulary(tmp_path).correct("pelosy whales trades")
+
+    assert corrected == "Pelosi whales trades"
+    assert resolved
+
+
+def test_valid_out_of_kb_words_and_acronyms_go_to_llm(tmp_path):
+    vocabulary = _vocabulary(tmp_path)
+    vocabulary.add_texts(["hold the API key"] * 5)
+
+    assert vocabulary.correct("gold stock") == ("gold stock", False)
+    assert vocabulary.correct("CPI earnings") == ("CPI earnings", False)
+    assert vocabulary.correct("nvda trades") == ("nvda trades", False)  # KB writes NVDA
+    assert vocabulary.correct("nenci pilossi")[1] is False  # "nenci" is left to the LLM
+
+
+def test_known_and_short_tokens_are_kept(tmp_path):
+    corrected, resolved = _vocabulary(tmp_path).correct("is nvidia up 5% on earnings?")
+
+    assert corrected == "is nvidia up 5% on earnings?"
+    assert resolved
+
+
+def test_unresolvable_tokens_request_fallback(tmp_path):
+    _, resolved = _vocabulary(tmp_path).correct("pelosi quantum cryptography")
+
+    assert not resolved
+
+
+def test_vocabulary_persists_incrementally(tmp_path):
+    vocabulary = _vocabulary(tmp_path)
+    snapshot = (tmp_path / "user-test.json").read_bytes()
+    vocabulary.add_texts(["quarterly guidance"], [{"title": "Guidance Outlook"}])
+
+    # A batch appends to the log instead of rewriting the snapshot
+    assert (tmp_path / "user-test.json").read_bytes() == snapshot
+    reloaded = KBVocabulary(tmp_path / "user-test.json")
+    assert reloaded.correct("pelosy")[0] == "Pelosi"
+    assert reloaded.correct("guidence")[0] == "Guidance"
+    assert reloaded.index.counts["pelosi"] == vocabulary.index.counts["pelosi"]
+
+
+def test_only_marked_vocabulary_is_complete(tmp_path):
+    path = tmp_path / "user-test.json"
+    _vocabulary(tmp_path)
+    assert not KBVocabulary(path).complete  # may hold only recently ingested chunks
+
+    KBVocabulary(path).mark_complete()
+    assert KBVocabulary(path).complete
+
+    cleared = KBVocabulary(tmp_path / "other.json")
+    cleared.clear()
+    assert KBVocabulary(tmp_path / "other.json").complete
+
+
+def test_torn_log_line_is_dropped(tmp_path):
+    vocabulary = _vocabulary(tmp_path)
+    vocabulary.add_texts(["guidance"])
+    with open(vocabulary.log_path, "a", encoding="utf-8") as f:
+        f.write('{"words": {"trunc')
+
+    reloaded = KBVocabulary(tmp_path / "user-test.json")
+    assert "guidance" in reloaded.index
+    assert not reloaded.log_path.exists()
+    reloaded.add_texts(["earnings"])
+    assert KBVocabulary(tmp_path / "user-test.json").index.counts["earnings"] == 2
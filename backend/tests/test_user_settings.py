@@ -0,0 +1,64 @@
+"""Tests for the per-user settings cache."""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from app.services import user_settings
+from app.services.chat import AgentChatService
+from app.services.chunk_count import update_cached_chunk_count
+from app.services.user_settings import UserSettingsCache
+
+
+def _supabase(row: dict | None) -> MagicMock:
+    supabase = MagicMock()
+    query = supabase.table.return_value.select.return_value.eq.return_value
+    query.execute.return_value = SimpleNamespace(data=[row] if row else [])
+    return supabase
+
+
+def test_load_caches_until_invalidated_or_expired():
+    cache = UserSettingsCache(ttl_seconds=60)
+    supabase = _supabase({"enabled": True, "total_chunks": 7, "updated_at": "t1"})
+
+    first = cache.load("u1", supabase)
+    assert (first.deep_memory, first.total_chunks, first.kb_version) == (True, 7, "t1")
+    cache.load("u1", supabase)
+    assert supabase.table.call_count == 1
+
+    cache.invalidate("u1")
+    cache.load("u1", supabase)
+    assert supabase.table.call_count == 2
+
+    expired = UserSettingsCache(ttl_seconds=0)
+    expired.load("u1", supabase)
+    expired.load("u1", supabase)
+    assert supabase.table.call_count == 4
+
+
+def test_chunk_count_updates_cached_entry():
+    cache = UserSettingsCache(ttl_seconds=60)
+    cache.load("u1", _supabase({"enabled": False, "total_chunks": 7, "updated_at": "t1"}))
+    supabase = _supabase({"total_chunks": 7})
+
+    with patch.object(user_settings, "_cache", cache):
+        update_cached_chunk_count(supabase, "u1", 3)
+
+    cached = cache.peek("u1")
+    assert cached.total_chunks == 10
+    assert cached.kb_version != "t1"
+
+
+def test_chat_decides_retrieval_mode_without_supabase_when_cached():
+    cache = UserSettingsCache(ttl_seconds=60)
+    supabase = _supabase({"enabled": True, "total_chunks": 1, "updated_at": "t1"})
+    settings = SimpleNamespace(chat_model="gpt-4o", chat_max_tokens=256)
+
+    async def run():
+        with patch.object(user_settings, "_cache", cache), \
+             patch("app.services.chat.get_clients"):
+            service = AgentChatService(settings, supabase=supabase)
+            return [await service._check_deep_memory("u1") for _ in range(3)]
+
+    assert asyncio.run(run()) == [True, True, True]
+    assert supabase.table.call_count == 1